@@ -1,7 +1,9 @@
 '''
 Steering models available for this kit.
 '''
+from collections import namedtuple
 from enum import Enum
+from math import hypot, radians, tan
 
 class SteeringModels(Enum):
 	'''
@@ -30,4 +32,80 @@ class ManueverType(Enum):
 		# probably needs a dedicated thread?
 	
 	EMERGENCY_BRAKE = 5
-		# not implemented, but the idea is to mimic ABS?
\ No newline at end of file
+		# not implemented, but the idea is to mimic ABS?
+
+'''
+Maneuver table: every (SteeringModels, ManueverType, is_reversing) is resolved once into a `ManueverPlan`,
+so a drive command is a dict lookup instead of a branch chain.
+- `wheel_directions`: +1 forward / -1 reverse, wheel order (front left, front right, rear left, rear right)
+- `duty_ratios`: fraction of the commanded duty per wheel (same order); the fastest wheel gets 1.0
+- `steering_angles`: (front axle, rear axle) [deg], positive = right, `None` = axle does not pivot
+'''
+ManueverPlan = namedtuple('ManueverPlan', ('wheel_directions', 'duty_ratios', 'steering_angles'))
+
+_FORWARD = (1, 1, 1, 1)
+_FULL_DUTY = (1.0, 1.0, 1.0, 1.0)
+_SPIN_LEFT = (-1, 1, -1, 1)
+	# skid/mecanum turn in place: left wheels back, right wheels forward
+
+def _pivot_duty_ratios(front_offset: float, rear_offset: float, turn_radius: float, track_width: float, is_left_turn: bool) -> tuple[float, ...]:
+	'''
+		Wheel speed is proportional to its distance from the instantaneous center of rotation.
+		`front_offset`, `rear_offset`: distance of each axle from the center along the car [m]
+		`turn_radius`: distance of the center from the car's centerline [m]
+	'''
+	inner_radius = turn_radius - track_width / 2
+	outer_radius = turn_radius + track_width / 2
+	left_radius, right_radius = (inner_radius, outer_radius) if is_left_turn else (outer_radius, inner_radius)
+
+	wheel_radii = (
+		hypot(front_offset, left_radius), hypot(front_offset, right_radius),
+		hypot(rear_offset, left_radius), hypot(rear_offset, right_radius)
+	)
+	fastest_wheel_radius = max(wheel_radii)
+	return tuple(round(wheel_radius / fastest_wheel_radius, 4) for wheel_radius in wheel_radii)
+
+def build_manuever_table(wheelbase: float, track_width: float, max_steering_angle: float) -> dict[tuple, ManueverPlan]:
+	'''
+		Returns `{(steering_model, manuever, is_reversing): ManueverPlan}` for every combination.
+		MAINTAIN_LANE drives straight (lane keeping corrects on top of it); EMERGENCY_BRAKE has all duties at 0.
+		Reversing flips every wheel direction and keeps the steering.
+	'''
+	steering_tangent = tan(radians(max_steering_angle))
+	forward_plans = {}
+
+	for steering_model in SteeringModels:
+		centered_steering = {
+			SteeringModels.SINGLE_PIVOTING_AXLE: (0, None),
+			SteeringModels.DUAL_PIVOTING_AXLE: (0, 0)
+		}.get(steering_model, (None, None))
+		straight_plan = ManueverPlan(_FORWARD, _FULL_DUTY, centered_steering)
+		forward_plans[(steering_model, ManueverType.STRAIGHT)] = straight_plan
+		forward_plans[(steering_model, ManueverType.MAINTAIN_LANE)] = straight_plan
+
+		for manuever, is_left_turn in ((ManueverType.TURN_LEFT, True), (ManueverType.TURN_RIGHT, False)):
+			steering_angle = -max_steering_angle if is_left_turn else max_steering_angle
+
+			if steering_model in (SteeringModels.CRAB_WALKING, SteeringModels.MECANUM):
+				wheel_directions = _SPIN_LEFT if is_left_turn else tuple(-direction for direction in _SPIN_LEFT)
+				plan = ManueverPlan(wheel_directions, _FULL_DUTY, (None, None))
+			elif steering_model == SteeringModels.SINGLE_PIVOTING_AXLE:
+				# center of rotation on the rear axle line
+				plan = ManueverPlan(_FORWARD,
+						_pivot_duty_ratios(wheelbase, 0.0, wheelbase / steering_tangent, track_width, is_left_turn),
+						(steering_angle, None))
+			else:
+				# DUAL_PIVOTING_AXLE: axles counter-steer, center of rotation midway between them
+				plan = ManueverPlan(_FORWARD,
+						_pivot_duty_ratios(wheelbase / 2, wheelbase / 2, (wheelbase / 2) / steering_tangent, track_width, is_left_turn),
+						(steering_angle, -steering_angle))
+			forward_plans[(steering_model, manuever)] = plan
+
+		forward_plans[(steering_model, ManueverType.EMERGENCY_BRAKE)] = ManueverPlan(_FORWARD, (0.0, 0.0, 0.0, 0.0), centered_steering)
+
+	manuever_table = {}
+	for (steering_model, manuever), plan in forward_plans.items():
+		manuever_table[(steering_model, manuever, False)] = plan
+		manuever_table[(steering_model, manuever, True)] = plan._replace(
+			wheel_directions = tuple(-direction for direction in plan.wheel_directions))
+	return manuever_table
@@ -9,9 +9,23 @@ class I2C_Driver_Model(Enum):
 	TLC59108F = 'tlc59108f'
 	PCA9685 = 'pca9685'
 
+class GPIO_Backend_Model(Enum):
+	RPI_GPIO = 'rpi_gpio'
+		# RPi.GPIO-compatible module named by `GPIO_SETTINGS['GPIO_MODULE']` (e.g. OPi.GPIO on an OrangePi)
+	CHARDEV = 'chardev'
+		# libgpiod v2 on `/dev/gpiochipN`: any Linux board (MangoPi, ...), multi-line requests
+	SIMULATED = 'simulated'
+
 GENERAL_SETTINGS = {
 	'_IS_DEBUG_MODE': False
 }
+
+# --------- `tracing.py`
+TRACING_SETTINGS = {
+	'IS_TRACING_ENABLED': False,
+		# off: each trace point costs one attribute check
+	'TRACE_BUFFER_CAPACITY': 65536		# records (28 B each), oldest overwritten first
+}
 """
 merge below with `GENERAL_SETTINGS`?
 class I2C_Device_Channels(Enum):
@@ -38,6 +52,15 @@ MAIN_I2C_DRIVER_CHANNEL_CONSTANTS = {
 	'REAR_RIGHT_MOTOR_CHANNEL': 7
 }
 
+# --------- `gpio_backend.py` (GPIO Backend Config)
+GPIO_SETTINGS = {
+	'GPIO_BACKEND': GPIO_Backend_Model.RPI_GPIO,
+	'GPIO_MODULE': 'RPi.GPIO',
+	'GPIO_CHIP_PATH': '/dev/gpiochip0',
+		# chardev: line offsets on this chip are the BCM numbers on a Pi
+	'GPIO_CONSUMER_NAME': 'rpi_car'
+}
+
 # --------- `ultrasonic_sensor.py` (Ultrasonic Sensor Config)
 ULTRASONIC_SENSOR_SETTINGS = {
 	'DEFAULT_SPEED_OF_SOUND': 346.2,		# [m/s]: 298.15 K, 1 atm, dry air
@@ -46,7 +69,13 @@ ULTRASONIC_SENSOR_SETTINGS = {
 	'MINIMUM_DETECTION_DISTANCE': 2.5,		# [mm]
 	'MAXIMUM_DETECTION_DISTANCE': 3000.0,	# [mm]
 	'TRIGGER_PULSE_TIME_LENGTH': 0.00001,	# [s]: 10 us
-	'SETUP_SETTLING_TIME': 0.5				# [s]: 0.5 s
+	'SETUP_SETTLING_TIME': 0.5,				# [s]: 0.5 s
+	'IS_EDGE_TIMING_ENABLED': None,
+		# True: sleep until timestamped ECHO edges arrive; False: busy-poll the ECHO pin
+		# None: edges on backends that timestamp them at the edge (chardev, simulated) and on RPi.GPIO with a separate ECHO pin;
+		#	a shared TRIG/ECHO pin on RPi.GPIO still polls (use GPIO_BACKEND = GPIO_Backend_Model.CHARDEV to avoid it)
+	'ECHO_START_TIMEOUT': 0.002				# [s]: trigger -> ECHO rising (HC-SR04 burst: ~0.45 ms); later => sensor timeout
+		# echo deadline = `ECHO_START_TIMEOUT` + round trip to the max. distance: bounds every ping (plus up to one more waiting out a previous echo)
 }
 
 # --------- `i2c_pwm_driver.py` (I2C Driver Config)
@@ -74,9 +103,37 @@ GENERAL_I2C_PWM_DRIVER_SETTINGS = {
 	'I2C_DEVICE_ADDRESS': 0x40,
 }
 
-GENERAL_I2C_DEVICE_SETTINGS['I2C_DEVICE_NAME'] = 'MAIN_PCA9685' if GENERAL_I2C_DEVICE_SETTINGS['I2C_DEVICE'] is I2C_Driver_Model.PCA9685 else 'CH592F'
+GENERAL_I2C_DEVICE_SETTINGS['I2C_DEVICE_NAME'] = {
+	I2C_Driver_Model.PCA9685: 'MAIN_PCA9685',
+	I2C_Driver_Model.TLC59108F: 'MAIN_TLC59108F'
+}.get(GENERAL_I2C_DEVICE_SETTINGS['I2C_DEVICE'], 'CH592F')
 GENERAL_I2C_PWM_DRIVER_SETTINGS['I2C_MAX_BITS'] = 2 ** GENERAL_I2C_PWM_DRIVER_SETTINGS['I2C_BIT_RESOLUTION'] - 1
 
+# --------- `i2c_retry.py` (I2C Retry / Circuit Breaker Config)
+I2C_FAULT_TOLERANCE_SETTINGS = {
+	'MAX_ATTEMPTS': 3,					# tries per transaction (1 => no retry)
+	'TIME_BUDGET': 0.002,				# [s]: per-call retry budget
+	'BASE_BACKOFF': 0.0001,				# [s]
+	'MAX_BACKOFF': 0.001,				# [s]
+	'BREAKER_FAILURE_THRESHOLD': 5,		# consecutive failed calls before failing fast
+	'BREAKER_RESET_TIMEOUT': 1.0		# [s]: open -> half-open probe
+}
+
+# --------- `i2c_simulated.py` (Simulated I2C Bus Config)
+SIMULATED_I2C_BUS_SETTINGS = {
+	'BUS_FREQUENCY': 100000,				# [Hz]: standard mode; 400000 for fast mode
+	'TRANSACTION_OVERHEAD_TIME': 0.00005,	# [s]: per-transaction syscall/driver cost on top of wire time
+	'IS_REALTIME': False,
+		# True: sleep for the modelled latency; False: only accumulate simulated bus time
+}
+
+I2C_RECORDING_SETTINGS = {
+	'IS_RECORDING_ENABLED': False,
+		# True: every bus opened through `i2c_bus.acquire_bus()` is wrapped in a `Recording_I2C_Bus`
+	'RECORDING_PATH': 'i2c_session.i2crec',
+	'FLUSH_THRESHOLD_BYTES': 65536
+}
+
 # --------- `travel_motor.py` (DRV8835 Config)
 DRV8835_SETTINGS = {
 	'ARE_MOTORS_REVERSE_MOUNTED': False,
@@ -90,7 +147,54 @@ DRV8835_SETTINGS = {
 	'I2C_DRIVER_REAR_RIGHT_MOTOR_CHANNEL': 3
 }
 
+MOTOR_CONTROL_LOOP_SETTINGS = {
+	'CONTROL_RATE': 100,				# [Hz]
+	'MAX_ACCELERATION': 8000,			# [duty/s]: 12-bit duty, 0 -> full in ~0.5 s
+	'MAX_JERK': 80000					# [duty/s^2]
+}
+
+MOTION_PLAN_SETTINGS = {
+	'FULL_DUTY_SPEED': 0.5				# [m/s] at full duty; rough linear estimate for distance segments
+}
+
+# --------- `wheel_speed_control.py` (Closed-Loop Wheel Speed Config)
+WHEEL_SPEED_CONTROL_SETTINGS = {
+	'FRONT_LEFT_ENCODER_PIN': 6,
+	'FRONT_RIGHT_ENCODER_PIN': 13,
+	'REAR_LEFT_ENCODER_PIN': 19,
+	'REAR_RIGHT_ENCODER_PIN': 20,
+	'TICKS_PER_REVOLUTION': 20,			# encoder disc slots (rising edges per wheel turn)
+	'WHEEL_DIAMETER': 0.065,			# [m]
+	'SPEED_WINDOW': 0.1,				# [s]: ticks in this window are averaged into one speed estimate
+	'STALL_TIMEOUT': 0.25,				# [s]: no tick for this long => wheel stopped
+	'CONTROL_RATE': 100,				# [Hz]
+	'PROPORTIONAL_GAIN': 3000,			# [duty/(m/s)]
+	'INTEGRAL_GAIN': 12000,				# [duty/m]
+	'DERIVATIVE_GAIN': 0				# [duty/(m/s^2)]
+}
+
+# --------- `motor_calibration.py` (Duty <-> Velocity Calibration Config)
+MOTOR_CALIBRATION_SETTINGS = {
+	'CALIBRATION_PATH': 'motor_calibration.json',
+		# missing file => linear default from `MOTION_PLAN_SETTINGS['FULL_DUTY_SPEED']`
+	'LOOKUP_TABLE_SIZE': 256,			# entries per wheel/direction in each resampled lookup table
+	'DUTY_BIN_WIDTH': 64,				# [duty]: logged samples are averaged per bin
+	'MIN_MOVING_SPEED': 0.01			# [m/s]: slower counts as stalled (deadband)
+}
+
+# --------- `actuation_models.py` (Chassis Geometry Config); measure on the car
+CHASSIS_SETTINGS = {
+	'WHEELBASE': 0.14,					# [m]: front axle to rear axle
+	'TRACK_WIDTH': 0.12,				# [m]: left wheel to right wheel
+	'MAX_STEERING_ANGLE': 30			# [deg]: pivoting-axle lock used for TURN_LEFT/TURN_RIGHT
+}
+
 # --------- `servomotor.py` (Servomotor Config)
 SERVOMOTOR_SETTINGS = {
-
+	'FRONT_STEERING_SERVOMOTOR_CHANNEL': 8,
+	'REAR_STEERING_SERVOMOTOR_CHANNEL': 9,
+		# PCA9685 only; first channels free of both the DRV8835 motors (`DRV8835_SETTINGS`, 0..3)
+		# and `MAIN_I2C_DRIVER_CHANNEL_CONSTANTS` (0..7). Motors + servos: two block writes, one `write_many()` call
+	'CENTER_PULSE': 1500,				# [us]
+	'PULSE_PER_DEGREE': 1000 / 90		# [us/deg]: 1000..2000 us over 90 deg
 }
\ No newline at end of file
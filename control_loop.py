@@ -0,0 +1,94 @@
+'''
+Fixed-rate control loop thread shared by `travel_motor.MotorControlLoop` and `wheel_speed_control.WheelSpeedController`.
+
+Subclasses implement `_tick()` (one control update) and optionally `_on_stop()` (leave the actuators safe).
+Ticks are scheduled on `perf_counter()`; a tick that runs past the next one's start counts as an overrun,
+and the missed ticks are dropped instead of run back to back.
+
+'''
+import threading
+from time import perf_counter
+
+class FixedRateLoop:
+
+	def __init__(self, control_rate: float, thread_name: str = 'fixed_rate_loop'):
+		'''
+			`control_rate` [Hz]
+		'''
+		self.control_period = 1.0 / control_rate
+		self.thread_name = thread_name
+		self._stop_event = threading.Event()
+		self._thread = None
+		self.reset_stats()
+
+	def start(self) -> None:
+		if self._thread is not None:
+			return
+		self._stop_event.clear()
+		self._thread = threading.Thread(target = self._run, name = self.thread_name)
+		self._thread.daemon = True
+		self._thread.start()
+
+	def stop(self, timeout: float = 1.0) -> None:
+		'''
+			Stops the thread, then calls `_on_stop()`.
+		'''
+		if self._thread is None:
+			return
+		self._stop_event.set()
+		self._thread.join(timeout)
+		self._thread = None
+		self._on_stop()
+
+	def reset_stats(self) -> None:
+		self.tick_count = 0
+		self.overrun_count = 0
+		self.total_jitter = 0.0
+		self.max_jitter = 0.0
+		self.total_tick_time = 0.0
+		self.max_tick_time = 0.0
+
+	def get_stats(self) -> dict:
+		'''
+			Jitter: |actual tick start - scheduled tick start| [us]; overrun: a tick that ran past the next tick's start.
+		'''
+		return {
+			'control_rate': 1.0 / self.control_period,
+			'ticks': self.tick_count,
+			'overruns': self.overrun_count,
+			'mean_jitter_us': (self.total_jitter / self.tick_count * 1e6) if self.tick_count else 0.0,
+			'max_jitter_us': self.max_jitter * 1e6,
+			'mean_tick_time_us': (self.total_tick_time / self.tick_count * 1e6) if self.tick_count else 0.0,
+			'max_tick_time_us': self.max_tick_time * 1e6
+		}
+
+	def _tick(self) -> None:
+		raise NotImplementedError
+
+	def _on_stop(self) -> None:
+		pass
+
+	def _run(self) -> None:
+		next_tick_time = perf_counter()
+		while not self._stop_event.is_set():
+			tick_start_time = perf_counter()
+			jitter = abs(tick_start_time - next_tick_time)
+			self.total_jitter += jitter
+			self.max_jitter = max(self.max_jitter, jitter)
+
+			try:
+				self._tick()
+			except Exception as e:
+				print(f'{type(self).__name__}::_run()::{e}')
+
+			tick_end_time = perf_counter()
+			self.tick_count += 1
+			self.total_tick_time += tick_end_time - tick_start_time
+			self.max_tick_time = max(self.max_tick_time, tick_end_time - tick_start_time)
+
+			next_tick_time += self.control_period
+			if tick_end_time > next_tick_time:
+				self.overrun_count += 1
+				next_tick_time = tick_end_time
+					# drop the missed ticks instead of bursting to catch up
+			self._stop_event.wait(max(0.0, next_tick_time - perf_counter()))
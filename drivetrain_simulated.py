@@ -0,0 +1,102 @@
+'''
+Simulated motors + wheel encoders standing in for `TravelMotor` in `wheel_speed_control.py`; needs no GPIO or I2C.
+
+Each `SimulatedWheel` settles at
+	`gain` * (|duty| - `deadband_duty`) / (I2C_MAX_BITS - `deadband_duty`) * `full_duty_speed`
+with a first-order lag `time_constant`; `gain` < 1 models load, battery sag or slip.
+`SimulatedDrivetrain.advance(now)` integrates the wheels in fixed sub-steps on its own clock
+and feeds each encoder tick, with an interpolated timestamp, to `WheelEncoder.record_tick()`.
+
+'''
+from math import exp
+
+from actuation_models import SteeringModels, ManueverType, build_manuever_table
+from config import GENERAL_I2C_PWM_DRIVER_SETTINGS, CHASSIS_SETTINGS, MOTION_PLAN_SETTINGS
+
+I2C_MAX_BITS = GENERAL_I2C_PWM_DRIVER_SETTINGS['I2C_MAX_BITS']
+FULL_DUTY_SPEED = MOTION_PLAN_SETTINGS['FULL_DUTY_SPEED']
+
+class SimulatedWheel:
+
+	def __init__(self, gain: float = 1.0, deadband_duty: float = 0.0, full_duty_speed: float = FULL_DUTY_SPEED, time_constant: float = 0.1):
+		'''
+			`time_constant` [s]: time to reach ~63% of a speed step
+		'''
+		self.gain = gain
+		self.deadband_duty = deadband_duty
+		self.full_duty_speed = full_duty_speed
+		self.time_constant = time_constant
+
+	def get_steady_speed(self, duty: float) -> float:
+		'''
+			Signed [m/s] the wheel settles at for a signed duty.
+		'''
+		duty_magnitude = min(abs(duty), I2C_MAX_BITS)
+		if duty_magnitude <= self.deadband_duty:
+			return 0.0
+		speed = self.gain * self.full_duty_speed * (duty_magnitude - self.deadband_duty) / (I2C_MAX_BITS - self.deadband_duty)
+		return speed if duty > 0 else -speed
+
+class SimulatedDrivetrain:
+	'''
+		Drivetrain interface of `TravelMotor` used by the controllers:
+		`get_wheel_speed_targets()`, `apply_wheel_duties()`, `stop()`, `emergency_stop()`.
+	'''
+
+	def __init__(self, encoders: list, wheels: list[SimulatedWheel] = None,
+			  steering_model: SteeringModels = SteeringModels.CRAB_WALKING, simulation_step: float = 0.0005):
+		'''
+			`encoders`: `WheelEncoder`s in wheel order, fed with simulated ticks
+			`simulation_step` [s]: integration sub-step
+		'''
+		self.encoders = list(encoders)
+		self.wheels = list(wheels) if wheels is not None else [SimulatedWheel() for _ in self.encoders]
+		self.steering_model = steering_model
+		self.simulation_step = simulation_step
+		self._manuever_table = build_manuever_table(CHASSIS_SETTINGS['WHEELBASE'], CHASSIS_SETTINGS['TRACK_WIDTH'], CHASSIS_SETTINGS['MAX_STEERING_ANGLE'])
+
+		self.time = 0.0
+		self.wheel_duties = [0, 0, 0, 0]
+		self.wheel_speeds = [0.0, 0.0, 0.0, 0.0]
+		self._wheel_distances = [0.0, 0.0, 0.0, 0.0]
+			# distance rolled either way [m]; encoders cannot tell direction
+		self.update_count = 0
+
+	def get_time(self) -> float:
+		return self.time
+
+	def get_wheel_speed_targets(self, speed: float, manuever: ManueverType, is_reversing: bool = False) -> tuple[list[float], tuple]:
+		if speed < 0:
+			is_reversing = True
+		plan = self._manuever_table[(self.steering_model, manuever, bool(is_reversing))]
+		return [abs(speed) * wheel_direction * duty_ratio for wheel_direction, duty_ratio in zip(plan.wheel_directions, plan.duty_ratios)], ()
+
+	def apply_wheel_duties(self, signed_wheel_duties: list[float], servomotor_pulses: tuple = ()) -> None:
+		self.wheel_duties = [max(-I2C_MAX_BITS, min(I2C_MAX_BITS, int(wheel_duty))) for wheel_duty in signed_wheel_duties]
+		self.update_count += 1
+
+	def stop(self) -> None:
+		self.apply_wheel_duties([0, 0, 0, 0])
+
+	def emergency_stop(self) -> None:
+		self.stop()
+
+	def advance(self, now: float) -> None:
+		'''
+			Runs the simulation up to `now` [s].
+		'''
+		while self.time < now:
+			step = min(self.simulation_step, now - self.time)
+			for wheel_index, (wheel, encoder) in enumerate(zip(self.wheels, self.encoders)):
+				speed = self.wheel_speeds[wheel_index]
+				speed += (wheel.get_steady_speed(self.wheel_duties[wheel_index]) - speed) * (1.0 - exp(-step / wheel.time_constant))
+				self.wheel_speeds[wheel_index] = speed
+
+				start_distance = self._wheel_distances[wheel_index]
+				end_distance = start_distance + abs(speed) * step
+				self._wheel_distances[wheel_index] = end_distance
+
+				tick_distance = 1.0 / encoder.ticks_per_meter
+				for tick_index in range(int(start_distance / tick_distance) + 1, int(end_distance / tick_distance) + 1):
+					encoder.record_tick(self.time + step * (tick_index * tick_distance - start_distance) / (end_distance - start_distance))
+			self.time += step
@@ -0,0 +1,187 @@
+'''
+Pluggable GPIO backends for `TravelMotor`, `UltrasonicSensor` and `WheelEncoder`.
+
+A backend implements `GPIO_Backend`. Pins are BCM numbers / chip line offsets; values are 0/1.
+- `RPi_GPIO_Backend`: any RPi.GPIO-compatible module (`RPi.GPIO`, `OPi.GPIO`, ...)
+- `gpio_chardev.Chardev_GPIO_Backend`: libgpiod v2 on `/dev/gpiochipN`; pins set up together share
+	one line request, so `write_many()` / `read_many()` are a single ioctl
+- `gpio_simulated.Simulated_GPIO_Backend`: in-memory pins with scripted edges, for running without a board
+
+Edge callbacks are called as `callback(pin, level, timestamp_ns)`: `level` 1 for a rising edge, 0 for a falling one,
+`timestamp_ns` on `time.monotonic_ns()`'s clock (CLOCK_MONOTONIC: the kernel's own event timestamp on the chardev backend).
+`GPIO_Backend.has_edge_timestamps` tells whether `timestamp_ns` is the time of the edge itself
+or only the time the callback ran (RPi.GPIO: callback thread latency and jitter included).
+
+`acquire_gpio()` hands out one process-wide backend chosen by `GPIO_SETTINGS['GPIO_BACKEND']`;
+`register_gpio()` installs one (e.g. a `Simulated_GPIO_Backend`) before the devices are created.
+
+'''
+import threading
+from importlib import import_module
+from time import monotonic_ns
+
+from config import GPIO_Backend_Model, GPIO_SETTINGS
+
+GPIO_BACKEND = GPIO_SETTINGS['GPIO_BACKEND']
+GPIO_MODULE = GPIO_SETTINGS['GPIO_MODULE']
+
+PULL_NONE = 0
+PULL_UP = 1
+PULL_DOWN = 2
+
+EDGE_RISING = 1
+EDGE_FALLING = 2
+EDGE_BOTH = 3
+
+class GPIO_Backend:
+	'''
+		Backend interface. Multi-pin calls are the fast path: backends that can set / read several
+		lines in one call override `write_many()` / `read_many()`.
+	'''
+
+	has_edge_timestamps = False
+
+	def setup_outputs(self, pins: list[int], initial_value: int = 0) -> None:
+		raise NotImplementedError
+
+	def setup_inputs(self, pins: list[int], pull: int = PULL_NONE) -> None:
+		raise NotImplementedError
+
+	def write(self, pin: int, value: int) -> None:
+		self.write_many([pin], [value])
+
+	def write_many(self, pins: list[int], values: list[int]) -> None:
+		raise NotImplementedError
+
+	def read(self, pin: int) -> int:
+		return self.read_many([pin])[0]
+
+	def read_many(self, pins: list[int]) -> list[int]:
+		raise NotImplementedError
+
+	def add_edge_callback(self, pin: int, edge: int, callback) -> None:
+		'''
+			Configures `pin` as an input and calls `callback(pin, level, timestamp_ns)` on every `edge`.
+		'''
+		raise NotImplementedError
+
+	def remove_edge_callback(self, pin: int) -> None:
+		raise NotImplementedError
+
+	def release(self, pins: list[int]) -> None:
+		'''
+			Returns the pins to the system (inputs, no callbacks).
+		'''
+		raise NotImplementedError
+
+	def close(self) -> None:
+		pass
+
+class RPi_GPIO_Backend(GPIO_Backend):
+	'''
+		Wraps an RPi.GPIO-compatible module in BCM numbering. The module reports neither edge timestamps nor levels:
+		callbacks get `monotonic_ns()` taken in its callback thread, and a level worked out from the edge order
+		(re-reading the pin there would see a short pulse as already over).
+	'''
+
+	def __init__(self, module_name: str = GPIO_MODULE):
+		self.GPIO = import_module(module_name)
+		if self.GPIO.getmode() is None:
+			self.GPIO.setmode(self.GPIO.BCM)
+		self.GPIO.setwarnings(False)
+
+		self._pulls = {
+			PULL_NONE: self.GPIO.PUD_OFF,
+			PULL_UP: self.GPIO.PUD_UP,
+			PULL_DOWN: self.GPIO.PUD_DOWN
+		}
+		self._edges = {
+			EDGE_RISING: self.GPIO.RISING,
+			EDGE_FALLING: self.GPIO.FALLING,
+			EDGE_BOTH: self.GPIO.BOTH
+		}
+
+	def setup_outputs(self, pins: list[int], initial_value: int = 0) -> None:
+		self.GPIO.setup(list(pins), self.GPIO.OUT, initial = self.GPIO.HIGH if initial_value else self.GPIO.LOW)
+
+	def setup_inputs(self, pins: list[int], pull: int = PULL_NONE) -> None:
+		self.GPIO.setup(list(pins), self.GPIO.IN, pull_up_down = self._pulls[pull])
+
+	def write(self, pin: int, value: int) -> None:
+		self.GPIO.output(pin, value)
+
+	def write_many(self, pins: list[int], values: list[int]) -> None:
+		self.GPIO.output(list(pins), list(values))
+			# one call into the extension, still one register write per pin
+
+	def read(self, pin: int) -> int:
+		return self.GPIO.input(pin)
+
+	def read_many(self, pins: list[int]) -> list[int]:
+		return [self.GPIO.input(pin) for pin in pins]
+
+	def add_edge_callback(self, pin: int, edge: int, callback) -> None:
+		self.GPIO.setup(pin, self.GPIO.IN, pull_up_down = self.GPIO.PUD_OFF)
+		if edge != EDGE_BOTH:
+			level = 1 if edge == EDGE_RISING else 0
+			self.GPIO.add_event_detect(pin, self._edges[edge], callback = lambda channel: callback(channel, level, monotonic_ns()))
+			return
+
+		pin_level = [self.GPIO.input(pin)]
+			# both edges: every edge flips the level the pin had when detection was armed
+		def on_edge(channel):
+			pin_level[0] ^= 1
+			callback(channel, pin_level[0], monotonic_ns())
+		self.GPIO.add_event_detect(pin, self._edges[edge], callback = on_edge)
+
+	def remove_edge_callback(self, pin: int) -> None:
+		self.GPIO.remove_event_detect(pin)
+
+	def release(self, pins: list[int]) -> None:
+		self.GPIO.cleanup(list(pins))
+
+	def close(self) -> None:
+		self.GPIO.cleanup()
+
+def open_gpio(backend_model: GPIO_Backend_Model = GPIO_BACKEND) -> GPIO_Backend:
+	'''
+		Opens a backend; each one only imports its library when selected.
+	'''
+	if backend_model == GPIO_Backend_Model.CHARDEV:
+		from gpio_chardev import Chardev_GPIO_Backend
+		return Chardev_GPIO_Backend()
+	elif backend_model == GPIO_Backend_Model.SIMULATED:
+		from gpio_simulated import Simulated_GPIO_Backend
+		return Simulated_GPIO_Backend()
+	return RPi_GPIO_Backend()
+
+_shared_gpio = None
+_shared_gpio_lock = threading.Lock()
+
+def register_gpio(backend: GPIO_Backend) -> GPIO_Backend:
+	'''
+		Installs `backend` as the process-wide GPIO backend, so devices that call `acquire_gpio()` use it.
+	'''
+	global _shared_gpio
+	with _shared_gpio_lock:
+		if _shared_gpio is not None:
+			raise ValueError('gpio_backend::register_gpio()::a GPIO backend is already open')
+		_shared_gpio = backend
+		return backend
+
+def acquire_gpio() -> GPIO_Backend:
+	'''
+		Returns the process-wide backend, opening the configured one on first use.
+	'''
+	global _shared_gpio
+	with _shared_gpio_lock:
+		if _shared_gpio is None:
+			_shared_gpio = open_gpio()
+		return _shared_gpio
+
+def close_gpio() -> None:
+	global _shared_gpio
+	with _shared_gpio_lock:
+		if _shared_gpio is not None:
+			_shared_gpio.close()
+			_shared_gpio = None
@@ -0,0 +1,213 @@
+'''
+GPIO character-device backend (libgpiod v2 Python bindings, `pip install gpiod`).
+
+Works on any Linux board exposing `/dev/gpiochipN` (Pi, OrangePi, MangoPi, ...), without a vendor GPIO module.
+Pins passed to one `setup_outputs()` / `setup_inputs()` call become one line request, so
+`write_many()` / `read_many()` on them is a single `GPIO_V2_LINE_SET_VALUES` / `GET_VALUES` ioctl
+instead of one call per pin. Re-configuring exactly the pins of an existing request
+(e.g. a shared TRIG/ECHO pin flipping between output and edge-detecting input every ping) reuses the request
+and its reader thread.
+
+Edge events carry the kernel's CLOCK_MONOTONIC timestamp of the interrupt, not the time Python got to it;
+one reader thread per edge request dispatches them. Reader threads of released requests are joined
+after the backend lock is released, so a callback may call back into the backend.
+
+libgpiod v2 Python API: https://git.kernel.org/pub/scm/libs/libgpiod/libgpiod.git/tree/bindings/python
+
+'''
+import threading
+
+from gpio_backend import GPIO_Backend, PULL_NONE, PULL_UP, PULL_DOWN, EDGE_RISING, EDGE_FALLING, EDGE_BOTH
+from config import GPIO_SETTINGS
+
+GPIO_CHIP_PATH = GPIO_SETTINGS['GPIO_CHIP_PATH']
+GPIO_CONSUMER_NAME = GPIO_SETTINGS['GPIO_CONSUMER_NAME']
+
+EDGE_WAIT_TIMEOUT = 0.1
+	# [s]: reader threads re-check their stop flag this often
+
+class Chardev_Line_Group:
+	'''
+		One line request: its lines' settings, their edge callbacks and the reader thread.
+	'''
+
+	def __init__(self, request, line_settings: dict):
+		self.request = request
+		self.line_settings = line_settings
+			# {pin: gpiod.LineSettings}
+		self.callbacks = {}
+		self.is_running = False
+		self.thread = None
+
+class Chardev_GPIO_Backend(GPIO_Backend):
+
+	has_edge_timestamps = True
+
+	def __init__(self, chip_path: str = GPIO_CHIP_PATH, consumer_name: str = GPIO_CONSUMER_NAME):
+		import gpiod
+		from gpiod.line import Bias, Direction, Edge, Value
+
+		self.gpiod = gpiod
+		self.EdgeEvent = gpiod.EdgeEvent
+		self.RequestReleasedError = gpiod.RequestReleasedError
+		self.Direction = Direction
+		self.Value = Value
+		self.chip_path = chip_path
+		self.consumer_name = consumer_name
+
+		self._biases = {PULL_NONE: Bias.DISABLED, PULL_UP: Bias.PULL_UP, PULL_DOWN: Bias.PULL_DOWN}
+		self._edges = {EDGE_RISING: Edge.RISING, EDGE_FALLING: Edge.FALLING, EDGE_BOTH: Edge.BOTH}
+
+		self._line_groups = {}
+			# {pin: Chardev_Line_Group}
+		self._output_values = {}
+			# last written level per output pin, kept when a request has to be rebuilt
+		self._stopped_threads = []
+			# reader threads of released requests, joined outside `_lock` by `_join_stopped_threads()`
+		self._lock = threading.RLock()
+
+	def _open_group(self, line_settings: dict) -> Chardev_Line_Group:
+		request = self.gpiod.request_lines(self.chip_path, consumer = self.consumer_name, config = dict(line_settings))
+		line_group = Chardev_Line_Group(request, dict(line_settings))
+		for pin in line_settings:
+			self._line_groups[pin] = line_group
+		return line_group
+
+	def _close_group(self, line_group: Chardev_Line_Group) -> None:
+		'''
+			Stops the reader and releases the request right away (its lines can be requested again);
+			the reader notices on its next wait and is joined later by `_join_stopped_threads()`.
+		'''
+		line_group.is_running = False
+		line_group.request.release()
+		if (line_group.thread is not None) and (line_group.thread is not threading.current_thread()):
+			self._stopped_threads.append(line_group.thread)
+		for pin in line_group.line_settings:
+			if self._line_groups.get(pin) is line_group:
+				del self._line_groups[pin]
+
+	def _join_stopped_threads(self) -> None:
+		'''
+			Called without `_lock` held: a reader blocked in a callback that takes `_lock` can finish.
+		'''
+		with self._lock:
+			stopped_threads, self._stopped_threads = self._stopped_threads, []
+		for thread in stopped_threads:
+			thread.join()
+
+	def _detach_pins(self, pins) -> None:
+		'''
+			Takes `pins` out of their requests; the other lines of those requests are requested again as they were.
+		'''
+		for line_group in {id(self._line_groups[pin]): self._line_groups[pin] for pin in pins if pin in self._line_groups}.values():
+			self._close_group(line_group)
+			remaining_settings = {pin: settings for pin, settings in line_group.line_settings.items() if pin not in pins}
+			if not remaining_settings:
+				continue
+			for pin, settings in remaining_settings.items():
+				if settings.direction == self.Direction.OUTPUT:
+					settings.output_value = self.Value.ACTIVE if self._output_values.get(pin) else self.Value.INACTIVE
+			remaining_group = self._open_group(remaining_settings)
+			remaining_group.callbacks = {pin: callback for pin, callback in line_group.callbacks.items() if pin in remaining_settings}
+			if remaining_group.callbacks:
+				self._start_edge_thread(remaining_group)
+
+	def _configure(self, line_settings: dict, callbacks: dict = None) -> Chardev_Line_Group:
+		'''
+			`callbacks`: `{pin: callback}` replacing the group's edge callbacks (`None`: none)
+		'''
+		pins = set(line_settings)
+		line_group = self._line_groups.get(next(iter(pins)))
+		if (line_group is not None) and (set(line_group.line_settings) == pins):
+			line_group.request.reconfigure_lines(config = dict(line_settings))
+			line_group.line_settings = dict(line_settings)
+		else:
+			self._detach_pins(pins)
+			line_group = self._open_group(line_settings)
+
+		line_group.callbacks = dict(callbacks or {})
+		if line_group.callbacks and not line_group.is_running:
+			self._start_edge_thread(line_group)
+				# kept running (idle) once started, until the request is released
+		return line_group
+
+	def _start_edge_thread(self, line_group: Chardev_Line_Group) -> None:
+		line_group.is_running = True
+		line_group.thread = threading.Thread(target = self._dispatch_edge_events, args = (line_group,), name = 'gpio_chardev_edges')
+		line_group.thread.daemon = True
+		line_group.thread.start()
+
+	def _dispatch_edge_events(self, line_group: Chardev_Line_Group) -> None:
+		while line_group.is_running:
+			try:
+				if not line_group.request.wait_edge_events(EDGE_WAIT_TIMEOUT):
+					continue
+				edge_events = line_group.request.read_edge_events()
+			except (OSError, ValueError, self.RequestReleasedError):
+				break
+					# request released underneath us
+			for edge_event in edge_events:
+				if not line_group.is_running:
+					break
+				callback = line_group.callbacks.get(edge_event.line_offset)
+				if callback is not None:
+					callback(edge_event.line_offset, 1 if edge_event.event_type == self.EdgeEvent.Type.RISING_EDGE else 0, edge_event.timestamp_ns)
+
+	def setup_outputs(self, pins: list[int], initial_value: int = 0) -> None:
+		value = self.Value.ACTIVE if initial_value else self.Value.INACTIVE
+		with self._lock:
+			self._configure({pin: self.gpiod.LineSettings(direction = self.Direction.OUTPUT, output_value = value) for pin in pins})
+			for pin in pins:
+				self._output_values[pin] = 1 if initial_value else 0
+		self._join_stopped_threads()
+
+	def setup_inputs(self, pins: list[int], pull: int = PULL_NONE) -> None:
+		with self._lock:
+			self._configure({pin: self.gpiod.LineSettings(direction = self.Direction.INPUT, bias = self._biases[pull]) for pin in pins})
+		self._join_stopped_threads()
+
+	def write_many(self, pins: list[int], values: list[int]) -> None:
+		with self._lock:
+			group_values = {}
+				# {id(line_group): (line_group, {pin: Value})}: one ioctl per request
+			for pin, value in zip(pins, values):
+				line_group = self._line_groups[pin]
+				group_values.setdefault(id(line_group), (line_group, {}))[1][pin] = self.Value.ACTIVE if value else self.Value.INACTIVE
+				self._output_values[pin] = 1 if value else 0
+			for line_group, line_values in group_values.values():
+				line_group.request.set_values(line_values)
+
+	def read_many(self, pins: list[int]) -> list[int]:
+		with self._lock:
+			group_pins = {}
+			for pin in pins:
+				line_group = self._line_groups[pin]
+				group_pins.setdefault(id(line_group), (line_group, []))[1].append(pin)
+
+			pin_values = {}
+			for line_group, line_pins in group_pins.values():
+				for pin, value in zip(line_pins, line_group.request.get_values(line_pins)):
+					pin_values[pin] = 1 if value == self.Value.ACTIVE else 0
+			return [pin_values[pin] for pin in pins]
+
+	def add_edge_callback(self, pin: int, edge: int, callback) -> None:
+		with self._lock:
+			self._configure({pin: self.gpiod.LineSettings(direction = self.Direction.INPUT, edge_detection = self._edges[edge])}, {pin: callback})
+		self._join_stopped_threads()
+
+	def remove_edge_callback(self, pin: int) -> None:
+		with self._lock:
+			self._configure({pin: self.gpiod.LineSettings(direction = self.Direction.INPUT)})
+		self._join_stopped_threads()
+
+	def release(self, pins: list[int]) -> None:
+		with self._lock:
+			self._detach_pins(set(pins))
+			for pin in pins:
+				self._output_values.pop(pin, None)
+		self._join_stopped_threads()
+
+	def close(self) -> None:
+		with self._lock:
+			self._detach_pins(set(self._line_groups))
+		self._join_stopped_threads()
@@ -0,0 +1,262 @@
+'''
+In-memory GPIO backend with scripted edges, for running and benchmarking the sensor / motor code without a board:
+`register_gpio(Simulated_GPIO_Backend())` before creating `TravelMotor` / `UltrasonicSensor`.
+
+Every pin has a timeline of `(timestamp_ns, level)`: writes to outputs and scripted edges (`script_edges()`)
+both land on it, and `read()` returns the level in effect at the current time, so a polling loop
+sees an edge exactly when it is scheduled. Edge callbacks are dispatched at their scripted time
+from one background thread, with the scripted timestamp.
+
+Responders react to writes, e.g. `Simulated_Echo_Target` answers a falling TRIG edge
+with an ECHO pulse as long as the round trip to a target at `distance` [m].
+
+'''
+import heapq
+import itertools
+import threading
+from bisect import bisect_right
+from time import monotonic_ns, sleep
+
+from gpio_backend import GPIO_Backend, EDGE_RISING, EDGE_FALLING, PULL_UP
+
+class Simulated_GPIO_Backend(GPIO_Backend):
+
+	has_edge_timestamps = True
+
+	def __init__(self, clock_ns = monotonic_ns):
+		'''
+			`clock_ns`: time source of reads, writes and scripted edges [ns]
+		'''
+		self.clock_ns = clock_ns
+		self._timelines = {}
+			# {pin: ([timestamp_ns, ...], [level, ...])}, ascending
+		self._directions = {}
+			# {pin: 'out' / 'in'}
+		self._responders = {}
+		self._callbacks = {}
+			# {pin: (edge, callback)}
+
+		self._pending_edges = []
+			# heap of (timestamp_ns, sequence, pin, level) for edge callbacks
+		self._sequence = itertools.count()
+		self._condition = threading.Condition()
+		self._dispatch_thread = None
+		self._is_running = False
+		self.reset_stats()
+
+	def reset_stats(self) -> None:
+		self.write_call_count = 0
+		self.pin_write_count = 0
+		self.read_call_count = 0
+		self.pin_read_count = 0
+
+	def get_stats(self) -> dict:
+		return {
+			'write_calls': self.write_call_count,
+			'pin_writes': self.pin_write_count,
+			'read_calls': self.read_call_count,
+			'pin_reads': self.pin_read_count
+		}
+
+	def _set_level(self, pin: int, timestamp_ns: int, level: int) -> None:
+		timestamps, levels = self._timelines.setdefault(pin, ([], []))
+		index = bisect_right(timestamps, timestamp_ns)
+		timestamps.insert(index, timestamp_ns)
+		levels.insert(index, level)
+
+	def _get_level(self, pin: int, timestamp_ns: int) -> int:
+		timeline = self._timelines.get(pin)
+		if timeline is None:
+			return 0
+		timestamps, levels = timeline
+		index = bisect_right(timestamps, timestamp_ns)
+		if index > 1:
+			del timestamps[:index - 1]
+			del levels[:index - 1]
+				# history before the current level is never read again
+			index = 1
+		return levels[index - 1] if index else 0
+
+	def get_level(self, pin: int) -> int:
+		'''
+			Current level of any pin (outputs included), for checks and responders.
+		'''
+		with self._condition:
+			return self._get_level(pin, self.clock_ns())
+
+	def script_edges(self, pin: int, edges: list[tuple[int, int]]) -> None:
+		'''
+			`edges`: `[(timestamp_ns, level), ...]` on `clock_ns`'s clock, e.g. `[(now + 1000, 1), (now + 60000, 0)]`.
+		'''
+		with self._condition:
+			for timestamp_ns, level in edges:
+				self._set_level(pin, timestamp_ns, level)
+				if pin in self._callbacks:
+					heapq.heappush(self._pending_edges, (timestamp_ns, next(self._sequence), pin, level))
+			self._condition.notify_all()
+
+	def add_responder(self, pin: int, responder) -> None:
+		'''
+			`responder(backend, pin, level, timestamp_ns)` is called after every write to `pin`.
+		'''
+		self._responders.setdefault(pin, []).append(responder)
+
+	def setup_outputs(self, pins: list[int], initial_value: int = 0) -> None:
+		timestamp_ns = self.clock_ns()
+		with self._condition:
+			for pin in pins:
+				self._directions[pin] = 'out'
+				self._set_level(pin, timestamp_ns, 1 if initial_value else 0)
+
+	def setup_inputs(self, pins: list[int], pull: int = 0) -> None:
+		timestamp_ns = self.clock_ns()
+		with self._condition:
+			for pin in pins:
+				self._directions[pin] = 'in'
+				if pin not in self._timelines:
+					self._set_level(pin, timestamp_ns, 1 if pull == PULL_UP else 0)
+
+	def write_many(self, pins: list[int], values: list[int]) -> None:
+		timestamp_ns = self.clock_ns()
+		with self._condition:
+			self.write_call_count += 1
+			for pin, value in zip(pins, values):
+				if self._directions.get(pin) != 'out':
+					raise RuntimeError(f'Simulated_GPIO_Backend::write_many()::pin {pin} is not set up as an output')
+				self._set_level(pin, timestamp_ns, 1 if value else 0)
+				self.pin_write_count += 1
+
+		for pin, value in zip(pins, values):
+			for responder in self._responders.get(pin, ()):
+				responder(self, pin, 1 if value else 0, timestamp_ns)
+
+	def read_many(self, pins: list[int]) -> list[int]:
+		timestamp_ns = self.clock_ns()
+		with self._condition:
+			self.read_call_count += 1
+			self.pin_read_count += len(pins)
+			return [self._get_level(pin, timestamp_ns) for pin in pins]
+
+	def add_edge_callback(self, pin: int, edge: int, callback) -> None:
+		with self._condition:
+			self._directions[pin] = 'in'
+			self._callbacks[pin] = (edge, callback)
+			timestamps, levels = self._timelines.get(pin, ((), ()))
+			now_ns = self.clock_ns()
+			for timestamp_ns, level in zip(timestamps, levels):
+				if timestamp_ns > now_ns:
+					heapq.heappush(self._pending_edges, (timestamp_ns, next(self._sequence), pin, level))
+						# edges scripted before the callback was added
+			self._condition.notify_all()
+			if self._dispatch_thread is None:
+				self._is_running = True
+				self._dispatch_thread = threading.Thread(target = self._dispatch_edges, name = 'gpio_simulated_edges')
+				self._dispatch_thread.daemon = True
+				self._dispatch_thread.start()
+
+	def remove_edge_callback(self, pin: int) -> None:
+		with self._condition:
+			self._callbacks.pop(pin, None)
+
+	def _dispatch_edges(self) -> None:
+		with self._condition:
+			while self._is_running:
+				if not self._pending_edges:
+					self._condition.wait()
+					continue
+				wait_time_ns = self._pending_edges[0][0] - self.clock_ns()
+				if wait_time_ns > 0:
+					self._condition.wait(wait_time_ns / 1e9)
+					continue
+
+				timestamp_ns, _, pin, level = heapq.heappop(self._pending_edges)
+				edge, callback = self._callbacks.get(pin, (None, None))
+				if (callback is not None) and (edge & (EDGE_RISING if level else EDGE_FALLING)):
+					self._condition.release()
+					try:
+						callback(pin, level, timestamp_ns)
+					finally:
+						self._condition.acquire()
+
+	def release(self, pins: list[int]) -> None:
+		with self._condition:
+			for pin in pins:
+				self._directions.pop(pin, None)
+				self._callbacks.pop(pin, None)
+
+	def close(self) -> None:
+		with self._condition:
+			self._is_running = False
+			self._condition.notify_all()
+		if self._dispatch_thread is not None:
+			self._dispatch_thread.join()
+			self._dispatch_thread = None
+
+class Simulated_Echo_Target:
+	'''
+		HC-SR04-style responder for TRIG `pin`: on the falling edge of the trigger pulse, ECHO goes high after
+		`response_delay` (the 8-cycle 40 kHz burst) and stays high for the round trip to `distance` [m].
+		`distance = None`: nothing in range, ECHO stays high for `no_echo_pulse_length` (the sensor's own timeout).
+	'''
+
+	def __init__(self, echo_pin: int, distance: float = 1.0, speed_of_sound: float = 346.2,
+			  response_delay: float = 0.00045, no_echo_pulse_length: float = 0.038):
+		'''
+			`response_delay`, `no_echo_pulse_length` [s]
+		'''
+		self.echo_pin = echo_pin
+		self.distance = distance
+		self.speed_of_sound = speed_of_sound
+		self.response_delay = response_delay
+		self.no_echo_pulse_length = no_echo_pulse_length
+		self.ping_count = 0
+		self._is_triggering = False
+
+	def __call__(self, backend: Simulated_GPIO_Backend, pin: int, level: int, timestamp_ns: int) -> None:
+		if level or not self._is_triggering:
+			self._is_triggering = bool(level)
+			return
+			# only a high -> low transition ends a trigger pulse
+		self._is_triggering = False
+		self.ping_count += 1
+		pulse_length = self.no_echo_pulse_length if self.distance is None else 2 * self.distance / self.speed_of_sound
+		echo_start_time_ns = timestamp_ns + int(self.response_delay * 1e9)
+		backend.script_edges(self.echo_pin, [(echo_start_time_ns, 1), (echo_start_time_ns + int(pulse_length * 1e9), 0)])
+
+def main():
+	'''
+		Runs `UltrasonicSensor` and `TravelMotor` on simulated pins (and a simulated I2C bus) and times them.
+	'''
+	from time import perf_counter
+	from gpio_backend import register_gpio
+	from i2c_bus import register_bus, I2C_CHANNEL
+	from i2c_simulated import Simulated_I2C_Bus, Simulated_PCA9685
+	from actuation_models import ManueverType
+	from travel_motor import TravelMotor
+	from ultrasonic_sensor import UltrasonicSensor
+
+	CURRENT_SCOPE = 'gpio_simulated.py::main()::'
+	gpio = register_gpio(Simulated_GPIO_Backend())
+	register_bus(I2C_CHANNEL, Simulated_I2C_Bus([Simulated_PCA9685(0x40)]))
+
+	echo_target = Simulated_Echo_Target(echo_pin = 24, distance = 0.5)
+	gpio.add_responder(23, echo_target)
+	ultrasonic_sensor = UltrasonicSensor(23, echo_pin = 24)
+	start_time = perf_counter()
+	distances = [ultrasonic_sensor.return_distance() for _ in range(20)]
+	print(f'{CURRENT_SCOPE}ultrasonic: {distances[-1]} cm (target {echo_target.distance * 100:.0f} cm), {(perf_counter() - start_time) / len(distances) * 1e3:.2f} ms per ping')
+	ultrasonic_sensor.teardown()
+
+	travel_motor = TravelMotor()
+	gpio.reset_stats()
+	manuevers = [(ManueverType.STRAIGHT, False), (ManueverType.TURN_LEFT, False), (ManueverType.STRAIGHT, True), (ManueverType.TURN_RIGHT, True)]
+	start_time = perf_counter()
+	for move_index in range(1000):
+		manuever, is_reversing = manuevers[move_index % len(manuevers)]
+		travel_motor.move(1000, manuever, is_reversing)
+	print(f'{CURRENT_SCOPE}travel motor: {(perf_counter() - start_time) * 1e3:.2f} us per move(), gpio {gpio.get_stats()}')
+	travel_motor._teardown()
+	gpio.close()
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,146 @@
+'''
+Pluggable I2C bus backends for `I2C_Device`.
+
+A backend is any object exposing the subset of `smbus3.SMBus` that the drivers use
+(see `I2C_Bus`). The default backend is `smbus3.SMBus`; `i2c_simulated.py` provides
+an in-memory bus for running the drivers without a Pi.
+
+Bus registry: `acquire_bus()` hands out one process-wide `Shared_I2C_Bus` per bus channel,
+reference counted and guarded by a re-entrant lock, so every `I2C_Device` on bus 1
+shares a single file handle. Hold `shared_bus.lock` to issue several transactions
+(for one or several devices) back to back without another thread slipping in.
+
+Python 3 I2C smbus lib Documentation: https://pypi.org/project/smbus3/
+
+'''
+import threading
+
+from config import GENERAL_I2C_DEVICE_SETTINGS, I2C_RECORDING_SETTINGS
+
+I2C_CHANNEL = GENERAL_I2C_DEVICE_SETTINGS['I2C_BUS_CHANNEL_NUMBER']
+IS_RECORDING_ENABLED = I2C_RECORDING_SETTINGS['IS_RECORDING_ENABLED']
+
+class I2C_Bus:
+	'''
+		Backend interface (same signatures as `smbus3.SMBus`).
+	'''
+
+	def read_byte_data(self, i2c_addr: int, register: int) -> int:
+		raise NotImplementedError
+
+	def write_byte_data(self, i2c_addr: int, register: int, value: int) -> None:
+		raise NotImplementedError
+
+	def read_i2c_block_data(self, i2c_addr: int, register: int, length: int) -> list[int]:
+		raise NotImplementedError
+
+	def write_i2c_block_data(self, i2c_addr: int, register: int, data: list[int]) -> None:
+		raise NotImplementedError
+
+	def write_byte(self, i2c_addr: int, value: int) -> None:
+		raise NotImplementedError
+
+	def write_many(self, writes: list[tuple[int, int, list[int]]]) -> None:
+		'''
+			`writes`: `[(i2c_addr, register, data), ...]`. Backends that can combine messages override this.
+		'''
+		for i2c_addr, register, data in writes:
+			self.write_i2c_block_data(i2c_addr, register, data)
+
+	def close(self) -> None:
+		pass
+
+def open_smbus(bus_channel: int = I2C_CHANNEL):
+	'''
+		Opens the hardware backend; `smbus3` is only needed when talking to a real bus.
+		Wrapped in an `i2c_recorder.Recording_I2C_Bus` when recording is enabled in `config.py`.
+	'''
+	from smbus3 import SMBus
+	backend = SMBus(bus_channel)
+
+	if IS_RECORDING_ENABLED:
+		from i2c_recorder import Recording_I2C_Bus, I2C_Transaction_Recorder
+		backend = Recording_I2C_Bus(backend, I2C_Transaction_Recorder())
+	return backend
+
+class Shared_I2C_Bus(I2C_Bus):
+	'''
+		Lock-protected wrapper around one backend; obtained through `acquire_bus()`.
+	'''
+
+	def __init__(self, bus_channel: int, backend):
+		self.bus_channel = bus_channel
+		self.backend = backend
+		self.lock = threading.RLock()
+		self.reference_count = 0
+
+	def read_byte_data(self, i2c_addr: int, register: int) -> int:
+		with self.lock:
+			return self.backend.read_byte_data(i2c_addr, register)
+
+	def write_byte_data(self, i2c_addr: int, register: int, value: int) -> None:
+		with self.lock:
+			self.backend.write_byte_data(i2c_addr, register, value)
+
+	def read_i2c_block_data(self, i2c_addr: int, register: int, length: int) -> list[int]:
+		with self.lock:
+			return self.backend.read_i2c_block_data(i2c_addr, register, length)
+
+	def write_i2c_block_data(self, i2c_addr: int, register: int, data: list[int]) -> None:
+		with self.lock:
+			self.backend.write_i2c_block_data(i2c_addr, register, data)
+
+	def write_byte(self, i2c_addr: int, value: int) -> None:
+		with self.lock:
+			self.backend.write_byte(i2c_addr, value)
+
+	def write_many(self, writes: list[tuple[int, int, list[int]]]) -> None:
+		with self.lock:
+			if hasattr(self.backend, 'write_many'):
+				self.backend.write_many(writes)
+			else:
+				for i2c_addr, register, data in writes:
+					self.backend.write_i2c_block_data(i2c_addr, register, data)
+
+	def close(self) -> None:
+		'''
+			Drops one reference; the backend is closed when the last user releases it.
+		'''
+		release_bus(self.bus_channel)
+
+_shared_buses = {}
+_shared_buses_lock = threading.Lock()
+
+def register_bus(bus_channel: int, backend) -> Shared_I2C_Bus:
+	'''
+		Installs `backend` (e.g. a `Simulated_I2C_Bus`) as the shared handle for `bus_channel`,
+		so devices that open the channel themselves (e.g. `TravelMotor`'s driver) use it.
+	'''
+	with _shared_buses_lock:
+		if bus_channel in _shared_buses:
+			raise ValueError(f'i2c_bus::register_bus()::bus {bus_channel} is already open')
+		shared_bus = _shared_buses[bus_channel] = Shared_I2C_Bus(bus_channel, backend)
+		return shared_bus
+
+def acquire_bus(bus_channel: int = I2C_CHANNEL) -> Shared_I2C_Bus:
+	'''
+		Returns the shared handle for `bus_channel`, opening it on first use.
+		Every `acquire_bus()` must be paired with one `release_bus()` (or `close()`).
+	'''
+	with _shared_buses_lock:
+		shared_bus = _shared_buses.get(bus_channel)
+		if shared_bus is None:
+			shared_bus = _shared_buses[bus_channel] = Shared_I2C_Bus(bus_channel, open_smbus(bus_channel))
+		shared_bus.reference_count += 1
+		return shared_bus
+
+def release_bus(bus_channel: int = I2C_CHANNEL) -> None:
+	with _shared_buses_lock:
+		shared_bus = _shared_buses.get(bus_channel)
+		if shared_bus is None:
+			return
+
+		shared_bus.reference_count -= 1
+		if shared_bus.reference_count <= 0:
+			del _shared_buses[bus_channel]
+			shared_bus.backend.close()
@@ -0,0 +1,227 @@
+'''
+Priority-lane I2C write scheduler.
+
+One worker thread per bus channel performs every write submitted to it, so submitted
+transactions from the camera, motor and servo threads never interleave on the wire.
+It is opt-in: `I2C_Device` methods called directly (e.g. `TravelMotor.move()`) still go
+straight to the bus, serialized only by the bus lock, so the scheduler orders the writes
+routed through it, not every access to the bus.
+Callers `submit()` without blocking; each request is tagged with a `BusPriority`
+lane and the worker always drains the most urgent lane first. Queued writes to the
+same device register are coalesced: only the latest value is sent, in the position of the latest
+submission, so it still lands after any overlapping block queued in between.
+An `EMERGENCY_STOP` submission also drops every queued travel motor / auxiliary write,
+so nothing queued before the stop can turn a motor back on after it.
+
+Worst-case latency for a submitted motor command is therefore one in-flight transaction of
+a lower lane plus whatever is already queued in its own/higher lanes.
+
+'''
+import threading
+from collections import OrderedDict
+from functools import partial
+from enum import Enum
+
+from config import GENERAL_SETTINGS, GENERAL_I2C_DEVICE_SETTINGS
+
+_IS_DEBUG_MODE = GENERAL_SETTINGS['_IS_DEBUG_MODE']
+I2C_CHANNEL = GENERAL_I2C_DEVICE_SETTINGS['I2C_BUS_CHANNEL_NUMBER']
+
+class BusPriority(Enum):
+	'''
+		lower value => drained first
+		emergency stop: preempts everything queued, drops queued travel motor / auxiliary writes
+		travel motor: DRV8835 PWM channels
+		steering servo: turning servomotors
+		auxiliary: speaker, lidar motor, lights
+	'''
+	EMERGENCY_STOP = 0
+	TRAVEL_MOTOR = 1
+	STEERING_SERVO = 2
+	AUXILIARY = 3
+
+_STOPPED_LANES = (BusPriority.TRAVEL_MOTOR.value, BusPriority.AUXILIARY.value)
+
+class I2C_Bus_Scheduler:
+
+	def __init__(self, bus_channel: int = I2C_CHANNEL, _is_debug_mode: bool = _IS_DEBUG_MODE):
+		self.bus_channel = bus_channel
+		self._is_debug_mode = _is_debug_mode
+
+		# one lane per priority; key (device id, register) -> (device, register, data)
+		self._lanes = [OrderedDict() for _ in BusPriority]
+		self._condition = threading.Condition()
+		self._is_running = False
+		self._in_flight = False
+		self._worker_thread = None
+
+		self.submitted_count = [0] * len(BusPriority)
+		self.coalesced_count = [0] * len(BusPriority)
+		self.executed_count = [0] * len(BusPriority)
+		self.dropped_count = [0] * len(BusPriority)
+		self.error_count = 0
+		self.last_error = None
+
+	def __enter__(self):
+		self.start()
+		return self
+
+	def __exit__(self, *args) -> None:
+		self.stop()
+
+	def _debug(self, method_name: str, message: str) -> None:
+		if self._is_debug_mode:
+			print(f'I2C_Bus_Scheduler::{method_name}::{message}')
+
+	def start(self) -> None:
+		with self._condition:
+			if self._is_running:
+				return
+			self._is_running = True
+
+		self._worker_thread = threading.Thread(target = self._run, name = f'i2c_bus_{self.bus_channel}')
+		self._worker_thread.daemon = True
+		self._worker_thread.start()
+
+	def stop(self, drain: bool = True, timeout: float = None) -> None:
+		'''
+			Stops the worker; with `drain`, everything already queued is sent first.
+		'''
+		if drain:
+			self.flush(timeout)
+
+		with self._condition:
+			self._is_running = False
+			self._condition.notify_all()
+
+		if self._worker_thread is not None:
+			self._worker_thread.join(timeout)
+			self._worker_thread = None
+
+	def _next_request(self):
+		for lane_index, lane in enumerate(self._lanes):
+			if lane:
+				return lane_index, lane.popitem(last = False)[1]
+		return None, None
+
+	def _run(self) -> None:
+		while True:
+			with self._condition:
+				lane_index, request = self._next_request()
+				while request is None:
+					if not self._is_running:
+						return
+					self._condition.wait()
+					lane_index, request = self._next_request()
+				self._in_flight = True
+
+			device, register_address, data = request
+			is_executed = False
+			try:
+				if callable(data):
+					data()
+				elif isinstance(data, int):
+					device.write(register_address, data)
+				else:
+					device.write_block(register_address, data)
+				is_executed = True
+			except Exception as e:
+				self.error_count += 1
+				self.last_error = e
+				self._debug('_run', f'{device.device_name} reg{register_address}: {e}')
+
+			with self._condition:
+				if is_executed:
+					self.executed_count[lane_index] += 1
+				self._in_flight = False
+				self._condition.notify_all()
+
+	def submit(self, device, register_address: int, data, priority: BusPriority = BusPriority.AUXILIARY) -> None:
+		'''
+			Queues `device.write(register_address, data)` (`data` is an `int`) or
+			`device.write_block(register_address, data)` (`data` is a `list`) and returns immediately.
+			A still-queued request to the same register in the same lane is replaced.
+			ALL_LED registers are rejected: use `submit_all_channels_off()` / `submit_all_channels()`,
+			which go through the driver and keep its shadow registers in sync.
+		'''
+		if getattr(device, '_ALLLED_ON_LSB', 0x100) <= register_address <= getattr(device, '_ALLLED_OFF_MSB', -1):
+			raise ValueError(f'I2C_Bus_Scheduler::submit()::ALL_LED register {register_address:#04x}: use submit_all_channels_off() / submit_all_channels()')
+		self._enqueue(device, register_address, data, priority)
+
+	def _enqueue(self, device, register_address, data, priority: BusPriority) -> None:
+		lane_index = priority.value
+		key = (id(device), register_address)
+
+		with self._condition:
+			if priority == BusPriority.EMERGENCY_STOP:
+				for stopped_lane_index in _STOPPED_LANES:
+					self.dropped_count[stopped_lane_index] += len(self._lanes[stopped_lane_index])
+					self._lanes[stopped_lane_index].clear()
+			
+			lane = self._lanes[lane_index]
+			if key in lane:
+				self.coalesced_count[lane_index] += 1
+				lane.move_to_end(key)
+					# replacing a key keeps its old position: a stale block queued after it would win
+			lane[key] = (device, register_address, data)
+			self.submitted_count[lane_index] += 1
+			self._condition.notify_all()
+
+	def submit_channels(self, pwm_driver, channel_duty_map: dict[int, int], priority: BusPriority = BusPriority.TRAVEL_MOTOR) -> None:
+		'''
+			Non-blocking `pwm_driver.set_channels(channel_duty_map)`.
+		'''
+		for start_register, data in pwm_driver._channel_runs(channel_duty_map):
+			self.submit(pwm_driver, start_register, data, priority)
+
+	def submit_all_channels_off(self, pwm_driver, priority: BusPriority = BusPriority.EMERGENCY_STOP) -> None:
+		'''
+			Non-blocking `pwm_driver.all_channels_off()`.
+		'''
+		self._enqueue(pwm_driver, 'all_channels_off', pwm_driver.all_channels_off, priority)
+
+	def submit_all_channels(self, pwm_driver, duty_cycle: int, priority: BusPriority = BusPriority.AUXILIARY) -> None:
+		'''
+			Non-blocking `pwm_driver.set_all_channels(duty_cycle)`.
+		'''
+		self._enqueue(pwm_driver, 'set_all_channels', partial(pwm_driver.set_all_channels, duty_cycle), priority)
+
+	def pending_count(self) -> int:
+		with self._condition:
+			return sum(len(lane) for lane in self._lanes)
+
+	def flush(self, timeout: float = None) -> bool:
+		'''
+			Blocks until every queued request has been sent. Returns `False` on timeout.
+		'''
+		with self._condition:
+			return self._condition.wait_for(
+				lambda: (not self._is_running) or (not self._in_flight and not any(self._lanes)),
+				timeout
+			)
+
+	def get_stats(self) -> dict:
+		with self._condition:
+			return {
+				priority.name: {
+					'submitted': self.submitted_count[priority.value],
+					'coalesced': self.coalesced_count[priority.value],
+					'executed': self.executed_count[priority.value],
+					'dropped': self.dropped_count[priority.value],
+					'pending': len(self._lanes[priority.value])
+				} for priority in BusPriority
+			} | {'errors': self.error_count}
+
+_bus_schedulers = {}
+_bus_schedulers_lock = threading.Lock()
+
+def get_bus_scheduler(bus_channel: int = I2C_CHANNEL) -> I2C_Bus_Scheduler:
+	'''
+		Returns the (started) scheduler that owns `bus_channel`, creating it on first use.
+	'''
+	with _bus_schedulers_lock:
+		scheduler = _bus_schedulers.get(bus_channel)
+		if scheduler is None:
+			scheduler = _bus_schedulers[bus_channel] = I2C_Bus_Scheduler(bus_channel)
+			scheduler.start()
+		return scheduler
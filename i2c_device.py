@@ -5,32 +5,65 @@ Python 3 I2C smbus lib Documentation: https://pypi.org/project/smbus3/
 I2C smbus Documentation: https://www.kernel.org/doc/html/v4.13/driver-api/i2c.html
 
 '''
-from math import floor
-from time import sleep
-from smbus3 import SMBus
+import threading
+from contextlib import contextmanager, nullcontext
+from time import sleep, perf_counter, perf_counter_ns
 
-from config import GENERAL_SETTINGS, GENERAL_I2C_DEVICE_SETTINGS, GENERAL_I2C_PWM_DRIVER_SETTINGS, MAIN_I2C_DRIVER_CHANNEL_CONSTANTS
+from i2c_bus import acquire_bus
+from i2c_metrics import I2C_Device_Metrics
+from i2c_register import Bit_Field, Register_Map
+from i2c_retry import I2C_Retry_Policy, I2C_Circuit_Breaker, I2C_Device_Unavailable_Error
+from tracing import TRACER, EVENT_I2C_READ, EVENT_I2C_WRITE, EVENT_I2C_WRITE_BLOCK, EVENT_I2C_BUS_ERROR
+from config import I2C_Driver_Model, GENERAL_SETTINGS, GENERAL_I2C_DEVICE_SETTINGS, GENERAL_I2C_PWM_DRIVER_SETTINGS, MAIN_I2C_DRIVER_CHANNEL_CONSTANTS
 
 _IS_DEBUG_MODE = GENERAL_SETTINGS['_IS_DEBUG_MODE']
 I2C_DRIVER_MAX_BITS = GENERAL_I2C_PWM_DRIVER_SETTINGS['I2C_MAX_BITS']
 
 
-config_i2c_device_name = GENERAL_I2C_DEVICE_SETTINGS['I2C_DRIVER_DEVICE_NAME']
+config_i2c_device_name = GENERAL_I2C_DEVICE_SETTINGS['I2C_DEVICE_NAME']
 I2C_DRIVER_DEVICE_NAME = config_i2c_device_name if ((type(config_i2c_device_name) == str) and (len(config_i2c_device_name) > 0)) else 'Generic I2C PWM Driver'
 I2C_CHANNEL = GENERAL_I2C_DEVICE_SETTINGS['I2C_BUS_CHANNEL_NUMBER']
-DEFAULT_DEVICE_ADDRESS = GENERAL_I2C_DEVICE_SETTINGS['DEFAULT_I2C_DEVICE_ADDRESS']
+DEFAULT_DEVICE_ADDRESS = GENERAL_I2C_PWM_DRIVER_SETTINGS['I2C_DEVICE_ADDRESS']
 
 LSB_MASK = 0XFF
 MSB_MASK_BIT_SHIFTS = 8
+SMBUS_BLOCK_MAX_BYTES = 32		# I2C_SMBUS_BLOCK_MAX
+
+class I2C_Driver_Capability_Error(ValueError):
+	'''
+		Raised by `create_pwm_driver()` when the configured driver cannot do what the caller needs (e.g. drive servos).
+	'''
+	pass
 
 class I2C_Device:
 
+	# named bit fields for `read_field` / `write_fields`; self-clearing bits are masked out before caching
+	_REGISTER_MAP = Register_Map()
+
 	def __init__(self, device_address: int = DEFAULT_DEVICE_ADDRESS, 
-			  _is_debug_mode: bool = _IS_DEBUG_MODE, device_name: str = None):
-		self.smbus_obj = SMBus(I2C_CHANNEL)
+			  _is_debug_mode: bool = _IS_DEBUG_MODE, device_name: str = None,
+			  use_register_cache: bool = False, bus = None,
+			  retry_policy: I2C_Retry_Policy = None, circuit_breaker: I2C_Circuit_Breaker = None):
+		'''
+			`bus`: backend implementing `i2c_bus.I2C_Bus` (e.g. `i2c_simulated.Simulated_I2C_Bus`);
+			defaults to the process-wide shared handle for `I2C_CHANNEL` (`i2c_bus.acquire_bus`)
+			`retry_policy`, `circuit_breaker`: default to `I2C_FAULT_TOLERANCE_SETTINGS`
+		'''
+		self.smbus_obj = bus if bus is not None else acquire_bus(I2C_CHANNEL)
 		self.device_address = device_address
 		self._is_debug_mode = _is_debug_mode
 		self.device_name = device_name or I2C_DRIVER_DEVICE_NAME
+		self.metrics = I2C_Device_Metrics(self.device_name, self.device_address)
+		self.retry_policy = retry_policy or I2C_Retry_Policy()
+		self.circuit_breaker = circuit_breaker or I2C_Circuit_Breaker()
+
+		# shadow copy of the register file: serves reads, elides unchanged writes
+		self._register_cache = {} if use_register_cache else None
+		self.register_cache_hits = 0
+		self.register_cache_misses = 0
+
+		# writes staged by `transaction()`: `pending_writes` {register: value}, one per thread
+		self._transaction_state = threading.local()
 	
 	def __enter__(self):
 		return self
@@ -39,8 +72,11 @@ class I2C_Device:
 		self._teardown()
 
 	def _debug(self, method_name: str, message: str, class_name: str = 'I2C_Device') -> None:
-		if self._is_debug_mode:
-			print(f'{class_name}::{method_name}::{message}')
+		'''
+			Call sites guard with `if self._is_debug_mode:` so the f-string `message`
+			is never built on the hot path when debugging is off.
+		'''
+		print(f'{class_name}::{method_name}::{message}')
 
 	def _teardown(self) -> None:
 		'''
@@ -49,12 +85,52 @@ class I2C_Device:
 		'''
 		self.smbus_obj.close()
 
+	def _bus_transaction(self, operation: str, register_address: int, byte_count: int, bus_function, *args):
+		'''
+			Runs one bus call under the device's circuit breaker and retry policy, recording metrics per attempt.
+			Raises `I2C_Device_Unavailable_Error` while the breaker is open,
+			otherwise the last `OSError` once attempts or the time budget run out.
+		'''
+		try:
+			self.circuit_breaker.before_call(self.device_name)
+		except I2C_Device_Unavailable_Error:
+			self.metrics.record_breaker_rejection()
+			raise
+
+		deadline = perf_counter() + self.retry_policy.time_budget
+		attempt = 0
+		while True:
+			start_time_ns = perf_counter_ns()
+			try:
+				result = bus_function(*args)
+			except OSError as e:
+				self.metrics.record(operation, register_address, byte_count, start_time_ns, is_error = True)
+				attempt += 1
+				if TRACER.is_enabled:
+					TRACER.emit(EVENT_I2C_BUS_ERROR, self.device_address, register_address, attempt)
+				backoff = self.retry_policy.get_backoff(attempt)
+				if (attempt >= self.retry_policy.max_attempts) or (perf_counter() + backoff > deadline):
+					if self.circuit_breaker.record_failure():
+						self.metrics.record_breaker_trip()
+					raise
+
+				if self._is_debug_mode:
+					self._debug('_bus_transaction', f'{operation} reg{register_address} attempt {attempt} failed: {e}')
+				self.metrics.record_retry(operation, register_address)
+				sleep(backoff)
+				continue
+
+			self.metrics.record(operation, register_address, byte_count, start_time_ns)
+			self.circuit_breaker.record_success()
+			return result
+
 	def _read_from_register(self, register_address: int) -> int:
 		'''
 			Reads from a given `register_address`.
 			[Example 1a](https://pypi.org/project/smbus3/)
 		'''
-		return self.smbus_obj.read_byte_data(self.device_address, register_address)
+		return self._bus_transaction('read', register_address, 1,
+							   self.smbus_obj.read_byte_data, self.device_address, register_address)
 		## return self.smbus_obj.read_byte_data(self.device_address, register_address, 0)
 	
 	def _write_value_to_register(self, register_address: int, data: int) -> None:
@@ -62,7 +138,73 @@ class I2C_Device:
 			Writers to a given `register_address`.
 			[Example 3](https://pypi.org/project/smbus3/)
 		'''		
-		self.smbus_obj.write_byte_data(self.device_address, register_address, data)
+		self._bus_transaction('write', register_address, 1,
+						self.smbus_obj.write_byte_data, self.device_address, register_address, data)
+
+	def _block_command(self, register_address: int, length: int) -> int:
+		'''
+			Register (command) byte sent for a block transfer starting at `register_address`.
+			Devices that pick auto-increment per transaction (e.g. TLC59108F) add their flags here.
+		'''
+		return register_address
+
+	def _write_block_to_register(self, register_address: int, data: list[int]) -> None:
+		'''
+			Writes consecutive bytes starting at `register_address` in one transaction.
+			Device must have register auto-increment enabled.
+			[Example 4](https://pypi.org/project/smbus3/)
+		'''
+		self._bus_transaction('write_block', register_address, len(data),
+						self.smbus_obj.write_i2c_block_data, self.device_address, self._block_command(register_address, len(data)), data)
+
+	def _write_blocks_to_registers(self, blocks: list[tuple[int, list[int]]]) -> None:
+		'''
+			Writes several blocks through the backend's combined `write_many`.
+		'''
+		self._bus_transaction('write_many', blocks[0][0], sum(len(data) for _, data in blocks),
+						self.smbus_obj.write_many, [(self.device_address, self._block_command(register_address, len(data)), data) for register_address, data in blocks])
+
+	def _read_block_from_register(self, register_address: int, length: int) -> list[int]:
+		'''
+			Reads `length` consecutive bytes starting at `register_address` in one transaction.
+			[Example 4](https://pypi.org/project/smbus3/)
+		'''
+		return self._bus_transaction('read_block', register_address, length,
+							   self.smbus_obj.read_i2c_block_data, self.device_address, self._block_command(register_address, length), length)
+
+	def _cache_register(self, register_address: int, data: int) -> None:
+		if self._register_cache is not None:
+			self._register_cache[register_address] = data & ~self._REGISTER_MAP.self_clearing_bits.get(register_address, 0)
+
+	def fill_register_cache(self, register_address: int, length: int) -> None:
+		'''
+			Populates the shadow registers `register_address..register_address + length - 1`
+			from the device using block reads. Call once at startup.
+		'''
+		if self._register_cache is None:
+			return
+
+		end_register_address = register_address + length
+		while register_address < end_register_address:
+			block_length = min(SMBUS_BLOCK_MAX_BYTES, end_register_address - register_address)
+			for offset, data in enumerate(self._read_block_from_register(register_address, block_length)):
+				self._cache_register(register_address + offset, data)
+			register_address += block_length
+
+	def invalidate_register_cache(self) -> None:
+		'''
+			Drops every shadow register, e.g. after the device is reset.
+		'''
+		if self._register_cache is not None:
+			self._register_cache.clear()
+
+	def get_register_cache_stats(self) -> dict:
+		return {
+			'enabled': self._register_cache is not None,
+			'hits': self.register_cache_hits,
+			'misses': self.register_cache_misses,
+			'cached_registers': len(self._register_cache) if self._register_cache is not None else 0
+		}
 	
 	def bound_duty_cycle(self, input_duty_cycle: int) -> int:
 		output_duty_cycle = input_duty_cycle
@@ -83,21 +225,191 @@ class I2C_Device:
 	
 	def read(self, register_address: int) -> int:
 		'''
+			Served from the shadow register when the cache is enabled and warm.
+			Inside a `transaction()`, returns the staged value if there is one.
 		'''
+		pending_writes = self._get_pending_writes()
+		if (pending_writes is not None) and (register_address in pending_writes):
+			return pending_writes[register_address]
+
+		if self._register_cache is not None:
+			cached_value = self._register_cache.get(register_address)
+			if cached_value is not None:
+				self.register_cache_hits += 1
+				return cached_value
+			self.register_cache_misses += 1
+
 		read_value = self._read_from_register(register_address)
-		self._debug('_read_from_register', f'read {read_value} from reg{register_address}@{self.device_address}')
+		if TRACER.is_enabled:
+			TRACER.emit(EVENT_I2C_READ, self.device_address, register_address, read_value)
+		if self._is_debug_mode:
+			self._debug('_read_from_register', f'read {read_value} from reg{register_address}@{self.device_address}')
+		self._cache_register(register_address, read_value)
 
 		return read_value
 	
 	def write(self, register_address: int, data: int) -> None:
 		'''
 		just a nicer name to call I guess ¯\_(ツ)_/¯
+		skipped when the shadow register already holds `data`
 		'''
-		self._debug('write', f'writing {data} to reg{register_address}@{self.device_address}')
+		pending_writes = self._get_pending_writes()
+		if pending_writes is not None:
+			pending_writes[register_address] = data
+			return
+
+		if self._register_cache is not None:
+			if self._register_cache.get(register_address) == data:
+				self.register_cache_hits += 1
+				return
+			self.register_cache_misses += 1
+
+		if TRACER.is_enabled:
+			TRACER.emit(EVENT_I2C_WRITE, self.device_address, register_address, data)
+		if self._is_debug_mode:
+			self._debug('write', f'writing {data} to reg{register_address}@{self.device_address}')
 			# can `import inspect` and do `inspect.currentframe().f_code_co_name`
 			# Source: https://stackoverflow.com/a/1140513
 
 		self._write_value_to_register(register_address = register_address, data = data)
+		self._cache_register(register_address, data)
+
+	def read_field(self, field_name: str) -> int:
+		field = self._REGISTER_MAP[field_name]
+		return field.get(self.read(field.register_address))
+
+	def write_fields(self, field_values: dict[str, int]) -> None:
+		'''
+			Applies `{field_name: value}` (e.g. `{'SLEEP': 0, 'AI': 1, 'OUTDRV': 1}`) with one
+			read-modify-write per register touched; the write is skipped if the register does not change.
+			Self-clearing bits (e.g. PCA9685 RESTART) are only written when named explicitly.
+		'''
+		for register_address, field_updates in self._REGISTER_MAP.group_by_register(field_values).items():
+			old_value = self.read(register_address) & ~self._REGISTER_MAP.self_clearing_bits.get(register_address, 0)
+			new_value = old_value
+			for field, value in field_updates:
+				new_value = field.set(new_value, value)
+			if new_value != old_value:
+				self.write(register_address, new_value)
+
+	@contextmanager
+	def update_fields(self):
+		'''
+			Stages field changes in a dict and applies them on exit through `write_fields`:
+				with pwm_driver.update_fields() as fields:
+					fields['INVRT'] = 0
+					fields['OUTDRV'] = 1
+			Nothing is written if the block raises.
+		'''
+		field_values = {}
+		yield field_values
+		self.write_fields(field_values)
+
+	def write_block(self, register_address: int, data: list[int]) -> None:
+		'''
+			Writes `data` to consecutive registers starting at `register_address` as one bus transaction.
+			With the cache enabled, only the span between the first and last changed byte is sent.
+		'''
+		self.write_blocks([(register_address, data)])
+
+	def _trim_cached_block(self, register_address: int, data: list[int]):
+		'''
+			Returns `(register_address, data)` cut down to the bytes that differ from the shadow registers,
+			or `None` if nothing changed.
+		'''
+		if self._register_cache is None:
+			return register_address, data
+
+		changed_offsets = [offset for offset, value in enumerate(data)
+				  if self._register_cache.get(register_address + offset) != value]
+		if not changed_offsets:
+			self.register_cache_hits += 1
+			return None
+		self.register_cache_misses += 1
+
+		return register_address + changed_offsets[0], data[changed_offsets[0]:changed_offsets[-1] + 1]
+
+	def write_blocks(self, blocks: list[tuple[int, list[int]]]) -> None:
+		'''
+			Writes several `(register_address, data)` blocks. Backends with `write_many`
+			(e.g. `i2c_rdwr.I2C_RDWR_Bus`) send them all in one kernel call.
+		'''
+		pending_writes = self._get_pending_writes()
+		if pending_writes is not None:
+			for register_address, data in blocks:
+				for offset, value in enumerate(data):
+					pending_writes[register_address + offset] = value
+			return
+
+		trimmed_blocks = []
+		for register_address, data in blocks:
+			trimmed_block = self._trim_cached_block(register_address, data)
+			if trimmed_block is not None:
+				trimmed_blocks.append(trimmed_block)
+		if not trimmed_blocks:
+			return
+		blocks = trimmed_blocks
+
+		if TRACER.is_enabled:
+			for register_address, data in blocks:
+				TRACER.emit(EVENT_I2C_WRITE_BLOCK, self.device_address, register_address, len(data))
+		if self._is_debug_mode:
+			self._debug('write_blocks', f'writing {blocks}@{self.device_address}')
+
+		if (len(blocks) > 1) and hasattr(self.smbus_obj, 'write_many'):
+			self._write_blocks_to_registers(blocks)
+		else:
+			for register_address, data in blocks:
+				self._write_block_to_register(register_address = register_address, data = data)
+
+		for register_address, data in blocks:
+			for offset, value in enumerate(data):
+				self._cache_register(register_address + offset, value)
+
+	def _get_pending_writes(self) -> dict[int, int]:
+		'''
+			The calling thread's staged writes, `None` outside a `transaction()`.
+		'''
+		return getattr(self._transaction_state, 'pending_writes', None)
+
+	def _discard_pending_writes(self) -> None:
+		pending_writes = self._get_pending_writes()
+		if pending_writes is not None:
+			pending_writes.clear()
+
+	@contextmanager
+	def transaction(self):
+		'''
+			`with driver.transaction(): ...`
+			Stages every `write`/`write_block(s)`/`write_pwm`/`set_channels` made by this thread inside the block
+			and sends them on exit as the fewest contiguous block writes, holding the bus lock once.
+			Registers are sent in address order, so keep mode/prescale sequences out of transactions.
+			Nothing is sent if the block raises; nested transactions join the outer one.
+			Each thread stages into its own dict, so concurrent transactions on one driver do not mix.
+		'''
+		if self._get_pending_writes() is not None:
+			yield self
+			return
+
+		pending_writes = self._transaction_state.pending_writes = {}
+		try:
+			yield self
+		finally:
+			self._transaction_state.pending_writes = None
+
+		self._commit_writes(pending_writes)
+
+	def _commit_writes(self, pending_writes: dict[int, int]) -> None:
+		blocks = []
+		for register_address in sorted(pending_writes):
+			if blocks and (blocks[-1][0] + len(blocks[-1][1]) == register_address) and (len(blocks[-1][1]) < SMBUS_BLOCK_MAX_BYTES):
+				blocks[-1][1].append(pending_writes[register_address])
+			else:
+				blocks.append((register_address, [pending_writes[register_address]]))
+
+		bus_lock = getattr(self.smbus_obj, 'lock', None)
+		with bus_lock if bus_lock is not None else nullcontext():
+			self.write_blocks(blocks)
 
 	def write_pwm(self, register_address: int, data: int) -> None:
 		'''
@@ -105,60 +417,160 @@ class I2C_Device:
 		'''
 		raise NotImplementedError
 
+def _build_led_payloads(step_count: int) -> tuple[bytes, ...]:
+	'''
+		`[0, 0, OFF_L, OFF_H]` for every OFF step 0..`step_count`; `step_count` (4096) sets the full-OFF bit of OFF_H.
+	'''
+	return tuple(bytes((0, 0, off_step & LSB_MASK, off_step >> MSB_MASK_BIT_SHIFTS)) for off_step in range(step_count + 1))
+
+def _build_servo_payloads(led_payloads: tuple[bytes, ...], servo_period: int) -> tuple[bytes, ...]:
+	'''
+		Payload for every pulse width 0..`servo_period` [us]: `led_payloads[pulse * step_count // servo_period]`,
+		capped at the last step (never full-OFF). Reuses the `bytes` objects of `led_payloads`.
+	'''
+	step_count = len(led_payloads) - 1
+	return tuple(led_payloads[min(pulse * step_count // servo_period, step_count - 1)] for pulse in range(servo_period + 1))
+
 class PCA9685_PWM_Driver(I2C_Device):
 
+	IS_SERVO_CAPABLE = True
+		# 50 Hz through the prescaler
+
 	# PCA9685 Constants
 	_MODE1				= 0x00	# 7.3.1
 	_MODE2				= 0x01	# 7.3.2
 	_SUBADR1			= 0x02	# 7.3.6
 	_SUBADR2			= 0x03	# ""
 	_SUBADR3			= 0x04	# ""
+	_ALLCALLADR			= 0x05	# 7.3.7
+	_ALLLED_ON_LSB		= 0xFA	# 7.3.4 Table 8
+	_ALLLED_ON_MSB		= 0xFB	# 7.3.4 Table 8
 	_ALLLED_OFF_LSB		= 0xFC	# 7.3.4 Table 8
 	_ALLLED_OFF_MSB		= 0xFD	# 7.3.4 Table 8
 	_PRESCALE			= 0xFE	# 7.3.4 Table 8
 
+	_FULL_ON_OFF_BIT			= 0x10	# 7.3.3 bit 4 of LEDn_ON_H / LEDn_OFF_H
+
+	DEFAULT_ALLCALL_ADDRESS		= 0x70	# 7-bit; ALLCALLADR power-on value is 0xE0
+
+	_GENERAL_CALL_ADDRESS		= 0x00	# 7.6 Software reset
+	_SWRST						= 0x06	# ""
+
+	_REGISTER_MAP = Register_Map([
+		Bit_Field('RESTART', _MODE1, 7, is_self_clearing = True),	# 7.3.1 Table 5
+		Bit_Field('EXTCLK', _MODE1, 6),
+		Bit_Field('AI', _MODE1, 5),
+		Bit_Field('SLEEP', _MODE1, 4),
+		Bit_Field('SUB1', _MODE1, 3),
+		Bit_Field('SUB2', _MODE1, 2),
+		Bit_Field('SUB3', _MODE1, 1),
+		Bit_Field('ALLCALL', _MODE1, 0),
+		Bit_Field('INVRT', _MODE2, 4),								# 7.3.2 Table 6
+		Bit_Field('OCH', _MODE2, 3),
+		Bit_Field('OUTDRV', _MODE2, 2),
+		Bit_Field('OUTNE', _MODE2, 0, width = 2)
+	])
+
 	_CHANNEL_0_ON_LSB	= 0x06	# 7.3.3 Table 7
 	_CHANNEL_0_ON_MSB	= 0x07	# 7.3.3 Table 7
 	_CHANNEL_0_OFF_LSB	= 0x08	# 7.3.3 Table 7
 	_CHANNEL_0_OFF_MSB	= 0x09	# 7.3.3 Table 7
-
-	def __init__(self, address: int = 0x40, global_frequency: int = 50, name: str = None):
-		super().__init__(self, device_address = address or DEFAULT_DEVICE_ADDRESS, 
-			  _is_debug_mode = _IS_DEBUG_MODE, device_name = name or 'PCA9685_Main')
+	_CHANNEL_REGISTER_WIDTH	= 4		# ON_L, ON_H, OFF_L, OFF_H
+
+	_OSCILLATOR_CLOCK_FREQUENCY	= 25000000	# [Hz] internal clock (pp1)
+	_STEP_COUNT					= 4096		# 12-bit counter
+	_SERVO_PERIOD				= 20000		# [us] one period at 50 Hz
+
+	# packed LEDn_ON_L..LEDn_OFF_H payloads, ready for a block write
+	_LED_PAYLOADS = _build_led_payloads(_STEP_COUNT)
+		# [off_step], ON = 0; [_STEP_COUNT] = full OFF
+	_SERVO_PAYLOADS = _build_servo_payloads(_LED_PAYLOADS, _SERVO_PERIOD)
+		# [pulse in us]
+
+	def __init__(self, address: int = 0x40, global_frequency: int = 50, name: str = None,
+			  use_register_cache: bool = False, bus = None):
+		super().__init__(device_address = address or DEFAULT_DEVICE_ADDRESS, 
+			  _is_debug_mode = _IS_DEBUG_MODE, device_name = name or 'PCA9685_Main',
+			  use_register_cache = use_register_cache, bus = bus)
 		# ...
 
 		self._frequency = global_frequency
-		self._set_frequency()
+		self._initialize_device()
+	
+	def _initialize_device(self) -> None:
+		self._set_frequency(mode_fields = {'AI': 1})
+			# AI rides along with the wake-up write
+		self.fill_register_cache(self._MODE1, self._CHANNEL_0_ON_LSB + 16 * self._CHANNEL_REGISTER_WIDTH)
+			# MODE1..LED15_OFF_H; PRE_SCALE is cached by `_set_frequency`
+
+	def reset(self) -> None:
+		'''
+			Software reset (SWRST) then re-apply frequency and auto-increment.
+			Note: SWRST is a general call, every PCA9685 on the bus is reset.
+			[Software reset](https://www.nxp.com/docs/en/data-sheet/PCA9685.pdf) 7.6
+		'''
+		self._bus_transaction('write_control', self._SWRST, 1,
+			self.smbus_obj.write_byte, self._GENERAL_CALL_ADDRESS, self._SWRST)
+		self.invalidate_register_cache()
+		sleep(0.0005)
+			# oscillator needs 500 us to come up (7.3.1.1)
+		self._initialize_device()
 		# note one reason for migration is that PCA9685 has a 
 		# global frequency setting, each channel cannot be independently set
 	
-	def _set_frequency(self, frequency: int = None) -> None:
+	def _set_frequency(self, frequency: int = None, mode_fields: dict[str, int] = None) -> None:
 		'''
 			Default: 50 Hz
+			`mode_fields`: other MODE1 fields to apply in the same wake-up write (e.g. `{'AI': 1}`)
 			[PWM frequency PRE_SCALE](https://www.nxp.com/docs/en/data-sheet/PCA9685.pdf) 7.3.5
 		'''
-		OSCILLATOR_CLOCK_FREQUENCY = 25000000.0		# internal clock is default 25 MHz (pp1)
-
+		mode_fields = mode_fields or {}
 		frequency = frequency if frequency else self._frequency
 
-		prescale_value = OSCILLATOR_CLOCK_FREQUENCY / 4096.0
-			# TODO: magic ##: 4096 b/c 12-bits
-		prescale_value /= float(frequency)
-		prescale_value -= 1.0
-		prescale_value = int(floor(prescale_value + 0.5))
-		self._debug('_setup_frequency', f'prescale_value is: {prescale_value}', 'PCA9685')
+		prescale_value = self.get_prescale(frequency)
+		if self._is_debug_mode:
+			self._debug('_setup_frequency', f'prescale_value is: {prescale_value}', 'PCA9685')
+
+		mode = self.read(self._MODE1)
+		if (not self._REGISTER_MAP['SLEEP'].get(mode)) and (self.read(self._PRESCALE) == prescale_value):
+			self.write_fields(mode_fields)
+			return
+			# already running at this frequency: skip the sleep/restart cycle
 
 		# bunch of code from https://github.com/sunfounder/SunFounder_PCA9685/blob/master/PCA9685.py
-		old_mode = self.read(self._MODE1)
-		new_mode = (old_mode & 0x7F) | 0x10
-		self.write(self._MODE1, new_mode)
+		# MODE1 is read once; each step below is a single write
+		register_map = self._REGISTER_MAP
+		mode &= ~register_map.self_clearing_bits[self._MODE1]
+		self.write(self._MODE1, register_map['SLEEP'].set(mode, 1))
+			# PRE_SCALE is only writable while asleep
 		self.write(self._PRESCALE, prescale_value)
 
-		self.write(self._MODE1, old_mode)
+		awake_mode = register_map['SLEEP'].set(mode, 0)
+			# power-on MODE1 has SLEEP set; restoring it verbatim would leave the oscillator off
+		for field_name, value in mode_fields.items():
+			awake_mode = register_map[field_name].set(awake_mode, value)
+		self.write(self._MODE1, awake_mode)
 		sleep(0.005)
-		self.write(self._MODE1, old_mode | 0x80)
+		self.write(self._MODE1, register_map['RESTART'].set(awake_mode, 1))
+
+	@classmethod
+	def get_prescale(cls, frequency: int) -> int:
+		'''
+			round(25 MHz / (4096 * frequency)) - 1, in integer arithmetic.
+			[PWM frequency PRE_SCALE](https://www.nxp.com/docs/en/data-sheet/PCA9685.pdf) 7.3.5 (Equation 1)
+		'''
+		period_clocks = cls._STEP_COUNT * frequency
+		return (2 * cls._OSCILLATOR_CLOCK_FREQUENCY + period_clocks) // (2 * period_clocks) - 1
+
+	def _enable_auto_increment(self) -> None:
+		'''
+			Sets MODE1 AI so a block write walks ON_L -> ON_H -> OFF_L -> OFF_H.
+			[Register auto-increment](https://www.nxp.com/docs/en/data-sheet/PCA9685.pdf) 7.3.1
+		'''
+		self.write_fields({'AI': 1})
 	
-	def two_byte_parser(self, unsigned_double_byte: int):
+	@staticmethod
+	def two_byte_parser(unsigned_double_byte: int):
 		'''
 			Extracts the least significant byte (LSB) and most significant byte (MSB) from a double byte.
 			Method useful for PCA9685.
@@ -167,14 +579,120 @@ class PCA9685_PWM_Driver(I2C_Device):
 		MSB = unsigned_double_byte >> MSB_MASK_BIT_SHIFTS
 		return LSB, MSB
 	
+	@classmethod
+	def get_led_payload(cls, off_step: int) -> bytes:
+		'''
+			Precomputed `[ON_L, ON_H, OFF_L, OFF_H]` for ON = 0, OFF = `off_step` (0..4095),
+			or 4096 for full OFF (bit 4 of LEDn_OFF_H, 7.3.3). Full ON is `on_step = 4096` (`get_all_led_payload`).
+		'''
+		if not (0 <= off_step <= cls._STEP_COUNT):
+			raise ValueError(f'PCA9685_PWM_Driver::get_led_payload()::off step {off_step} outside 0..{cls._STEP_COUNT}')
+		return cls._LED_PAYLOADS[off_step]
+
+	@classmethod
+	def get_all_led_payload(cls, off_step: int, on_step: int = 0) -> bytes:
+		'''
+			`[ON_L, ON_H, OFF_L, OFF_H]` for an ALL_LED / LEDn write; the precomputed table when ON = 0.
+		'''
+		if on_step == 0:
+			return cls.get_led_payload(off_step)
+		return bytes([*cls.two_byte_parser(on_step), *cls.two_byte_parser(off_step)])
+
 	def write_pwm(self, channel: int, off_step: int, on_step: int = 0) -> None:
+		'''
+			Writes LEDn_ON_L..LEDn_OFF_H as one auto-increment block write
+			so ON and OFF are never observed half-updated.
+		'''
+		if on_step == 0:
+			self.write_block(self._CHANNEL_0_ON_LSB + 4 * channel, self.get_led_payload(off_step))
+			return
+
 		on_LSB, on_MSB = self.two_byte_parser(on_step)
 		off_LSB, off_MSB = self.two_byte_parser(off_step)
 		
-		self.write(self._CHANNEL_0_ON_LSB + 4 * channel, on_LSB)
-		self.write(self._CHANNEL_0_ON_MSB + 4 * channel, on_MSB)
-		self.write(self._CHANNEL_0_OFF_LSB + 4 * channel, off_LSB)
-		self.write(self._CHANNEL_0_OFF_MSB + 4 * channel, off_MSB)
+		self.write_block(self._CHANNEL_0_ON_LSB + 4 * channel, [on_LSB, on_MSB, off_LSB, off_MSB])
+
+	def _channel_runs(self, channel_duty_map: dict[int, int]) -> list[tuple[int, list[int]]]:
+		'''
+			Groups `{channel: off_step}` into contiguous LEDn register runs.
+			Returns `[(start_register, data), ...]`; each run fits in one SMBus block write.
+		'''
+		max_channels_per_run = SMBUS_BLOCK_MAX_BYTES // self._CHANNEL_REGISTER_WIDTH
+		runs = []
+		run_start_channel = None
+		run_length = 0
+		run_data = []
+
+		for channel in sorted(channel_duty_map):
+			if run_data and ((channel != run_start_channel + run_length) or (run_length >= max_channels_per_run)):
+				runs.append((self._CHANNEL_0_ON_LSB + self._CHANNEL_REGISTER_WIDTH * run_start_channel, run_data))
+				run_data = []
+			
+			if not run_data:
+				run_start_channel = channel
+				run_length = 0
+
+			run_data += self.get_led_payload(channel_duty_map[channel])
+			run_length += 1
+
+		if run_data:
+			runs.append((self._CHANNEL_0_ON_LSB + self._CHANNEL_REGISTER_WIDTH * run_start_channel, run_data))
+
+		return runs
+
+	def set_channels(self, channel_duty_map: dict[int, int]) -> None:
+		'''
+			Batch update of several channels, e.g. `{4: 1000, 5: 1000, 6: 1000, 7: 1000}`.
+			Adjacent channels are sent as one block write starting at `_CHANNEL_0_ON_LSB`
+			(up to 8 channels per write b/c of the 32-byte SMBus block limit).
+		'''
+		self.write_blocks(self._channel_runs(channel_duty_map))
+
+	def _cache_all_channels(self, register_offset: int, data: list[int]) -> None:
+		'''
+			Mirrors an ALL_LED write into the LEDn shadow registers so later writes are not wrongly elided.
+		'''
+		for channel in range(16):
+			for offset, value in enumerate(data):
+				self._cache_register(self._CHANNEL_0_ON_LSB + self._CHANNEL_REGISTER_WIDTH * channel + register_offset + offset, value)
+
+	def all_channels_off(self) -> None:
+		'''
+			Emergency stop: sets the full-OFF bit on every channel with one 1-byte write to ALL_LED_OFF_H.
+			A later `write_pwm`/`set_channels` on a channel rewrites its OFF_H and resumes it.
+			Sent immediately, even inside a `transaction()`, whose staged writes are dropped.
+			[ALL_LED](https://www.nxp.com/docs/en/data-sheet/PCA9685.pdf) 7.3.4
+		'''
+		self._discard_pending_writes()
+		self._write_value_to_register(self._ALLLED_OFF_MSB, self._FULL_ON_OFF_BIT)
+		self._cache_all_channels(self._CHANNEL_0_OFF_MSB - self._CHANNEL_0_ON_LSB, [self._FULL_ON_OFF_BIT])
+
+	def set_all_channels(self, off_step: int, on_step: int = 0) -> None:
+		'''
+			Sets every channel to the same value with one block write to ALL_LED_ON_L..ALL_LED_OFF_H.
+			Sent immediately, even inside a `transaction()`, whose staged writes are dropped.
+		'''
+		self._discard_pending_writes()
+		data = self.get_all_led_payload(off_step, on_step)
+		self._write_block_to_register(self._ALLLED_ON_LSB, data)
+		self._cache_all_channels(0, data)
+
+	def enable_allcall(self, group_address: int = DEFAULT_ALLCALL_ADDRESS, is_enabled: bool = True) -> None:
+		'''
+			Makes this board respond to the LED All Call address (7-bit `group_address`).
+			[ALLCALLADR](https://www.nxp.com/docs/en/data-sheet/PCA9685.pdf) 7.3.7
+		'''
+		self.write(self._ALLCALLADR, group_address << 1)
+		self.write_fields({'ALLCALL': is_enabled})
+
+	def set_subaddress(self, subaddress_index: int, group_address: int = None) -> None:
+		'''
+			Programs SUBADR1..3 (`subaddress_index` 1..3) to the 7-bit `group_address`; `None` disables it.
+			[SUBADRx](https://www.nxp.com/docs/en/data-sheet/PCA9685.pdf) 7.3.6
+		'''
+		if group_address is not None:
+			self.write(self._SUBADR1 + subaddress_index - 1, group_address << 1)
+		self.write_fields({f'SUB{subaddress_index}': group_address is not None})
 
 	def set_motor_pwm(self, channel: int, duty_cycle: int) -> None:
 		self.write_pwm(channel, duty_cycle)
@@ -183,10 +701,37 @@ class PCA9685_PWM_Driver(I2C_Device):
 		'''
 		Note: servomotor pulse needs to be at a frequency of 50 Hz
 		'''
-		pulse = pulse * 4096 // 20000
-			# TODO: magic ##: 4096 is resolution for 12-bits
-			# TODO: magic ##: Servomotors like 50 Hz; 20k us is time period for that		
-		self.write_pwm(channel, pulse)
+		if not (0 <= pulse <= self._SERVO_PERIOD):
+			raise ValueError(f'PCA9685_PWM_Driver::set_servomotor_pwm()::pulse {pulse} us outside 0..{self._SERVO_PERIOD}')
+		self.write_block(self._CHANNEL_0_ON_LSB + 4 * channel, self._SERVO_PAYLOADS[pulse])
+			# pulse [us] * 4096 // 20000 (50 Hz period), precomputed
+
+class PCA9685_Group(I2C_Device):
+	'''
+		Broadcast handle for every PCA9685 listening on an ALLCALL/SUBADR `group_address`
+		(see `PCA9685_PWM_Driver.enable_allcall`/`set_subaddress`). Write-only.
+		`members` are the per-board drivers whose shadow registers are kept in sync.
+	'''
+
+	def __init__(self, group_address: int = PCA9685_PWM_Driver.DEFAULT_ALLCALL_ADDRESS,
+			  members: list[PCA9685_PWM_Driver] = None, name: str = None, bus = None):
+		super().__init__(device_address = group_address, 
+			  _is_debug_mode = _IS_DEBUG_MODE, device_name = name or 'PCA9685_Group', bus = bus)
+		self.members = list(members or [])
+
+	def all_channels_off(self) -> None:
+		'''
+			Stops every channel on every board in the group with one transaction.
+		'''
+		self._write_value_to_register(PCA9685_PWM_Driver._ALLLED_OFF_MSB, PCA9685_PWM_Driver._FULL_ON_OFF_BIT)
+		for member in self.members:
+			member._cache_all_channels(PCA9685_PWM_Driver._CHANNEL_0_OFF_MSB - PCA9685_PWM_Driver._CHANNEL_0_ON_LSB, [PCA9685_PWM_Driver._FULL_ON_OFF_BIT])
+
+	def set_all_channels(self, off_step: int, on_step: int = 0) -> None:
+		data = PCA9685_PWM_Driver.get_all_led_payload(off_step, on_step)
+		self._write_block_to_register(PCA9685_PWM_Driver._ALLLED_ON_LSB, data)
+		for member in self.members:
+			member._cache_all_channels(0, data)
 
 class ATMEGA328P_DEVICE(I2C_Device):
 	# TODO: prototype for our first MCU I2C slave, before moving onto less-documented CH592F
@@ -196,24 +741,125 @@ class CH592F_Device(I2C_Device):
 	# TODO: for later versions when we I2C slave the MCU
 	pass
 
-'''
 class TLC59108F_PWM_Driver(I2C_Device):
+	'''
+		8-channel, 8-bit PWM driver. One byte per channel (PWM0..PWM7 at 0x02..0x09), so a full
+		8-channel update is a single 8-byte auto-increment write (vs 32 bytes on the PCA9685).
+		Duties are taken in the shared 12-bit scale (`I2C_DRIVER_MAX_BITS`) and scaled to 8 bits.
+		Note: PWM frequency is fixed at 97 kHz (no per-chip prescaler), fine for the DRV8835 but not for servos.
+		[TLC59108F Datasheet](https://www.ti.com/lit/ds/symlink/tlc59108f.pdf)
+	'''
+
+	IS_SERVO_CAPABLE = False
+		# no `set_servomotor_pwm()`: `create_pwm_driver(is_servo_required = True)` refuses this driver
 
 	# TLC59108F Constants
 	_MODE1		= 0x00	# 8.6.2
 	_MODE2		= 0x01	# 8.6.3
+	_CHANNEL_0	= 0x02	# 8.6.4
+	_GRPPWM		= 0x0A	# 8.6.5
+	_GRPFREQ	= 0x0B	# 8.6.6
+	_LEDOUT0	= 0x0C	# 8.6.7
+	_LEDOUT1	= 0x0D	# 8.6.7
 	_SUBADR1	= 0x0E	# 8.6.8
 	_SUBADR2	= 0x0F	# 8.6.8
 	_SUBADR3	= 0x10	# 8.6.8
-	_CHANNEL_0	= 0x02	# 8.6.4
 	_ALLCALLADR = 0x11	# 8.6.9 (turn off for all)
-	_GRPFREQ	= 0x0B	# 8.6.6
 
-	def __init__(self):
-		super().__init__(self, device_address = DEFAULT_DEVICE_ADDRESS, 
-			  _is_debug_mode = _IS_DEBUG_MODE, device_name = 'TLC59108F_Main')
-		# ...
-	
-	def write(self, channel: int, data: int) -> None:
-		raise NotImplementedError
-'''
\ No newline at end of file
+	_CHANNEL_COUNT					= 8
+	_REGISTER_COUNT					= 0x12		# MODE1..ALLCALLADR
+	_LEDOUT_INDIVIDUAL_PWM			= 0xAA		# 8.6.7: 0b10 per LED -> PWMx controls LEDx
+	_AUTO_INCREMENT_ALL				= 0x80		# 8.6.1 Table 1 control register AI2:AI0 = 100
+	_AUTO_INCREMENT_BRIGHTNESS		= 0xA0		# 8.6.1 Table 1 AI2:AI0 = 101, PWM0..PWM7 only (rolls over)
+	_DUTY_CYCLE_BIT_SHIFT			= I2C_DRIVER_MAX_BITS.bit_length() - 8
+		# 12-bit -> 8-bit
+
+	_REGISTER_MAP = Register_Map([
+		Bit_Field('AI', _MODE1, 5, width = 3),		# 8.6.2 (AI2:AI0, read-only)
+		Bit_Field('OSC', _MODE1, 4),				# 8.6.2, set at power-on
+		Bit_Field('SUB1', _MODE1, 3),
+		Bit_Field('SUB2', _MODE1, 2),
+		Bit_Field('SUB3', _MODE1, 1),
+		Bit_Field('ALLCALL', _MODE1, 0),
+		Bit_Field('EFCLR', _MODE2, 7),				# 8.6.3
+		Bit_Field('DMBLNK', _MODE2, 5),
+		Bit_Field('OCH', _MODE2, 3)
+	])
+
+	def __init__(self, address: int = 0x40, name: str = None,
+			  use_register_cache: bool = False, bus = None):
+		super().__init__(device_address = address or DEFAULT_DEVICE_ADDRESS, 
+			  _is_debug_mode = _IS_DEBUG_MODE, device_name = name or 'TLC59108F_Main',
+			  use_register_cache = use_register_cache, bus = bus)
+		self._initialize_device()
+
+	def _initialize_device(self) -> None:
+		self.write_fields({'OSC': 0})
+		sleep(0.0005)
+			# oscillator needs 500 us to stabilize (8.6.2)
+		self.write_block(self._LEDOUT0, [self._LEDOUT_INDIVIDUAL_PWM, self._LEDOUT_INDIVIDUAL_PWM])
+		self.fill_register_cache(self._MODE1, self._REGISTER_COUNT)
+
+	def _block_command(self, register_address: int, length: int) -> int:
+		'''
+			Auto-increment is selected per transaction by the control register's AI bits, not by MODE1.
+		'''
+		is_brightness_run = (self._CHANNEL_0 <= register_address) and (register_address + length <= self._CHANNEL_0 + self._CHANNEL_COUNT)
+		return (self._AUTO_INCREMENT_BRIGHTNESS if is_brightness_run else self._AUTO_INCREMENT_ALL) | register_address
+
+	def scale_duty_cycle(self, duty_cycle: int) -> int:
+		'''
+			12-bit duty (0..4095) -> 8-bit PWMx value (0..255).
+		'''
+		return self.bound_duty_cycle(duty_cycle) >> self._DUTY_CYCLE_BIT_SHIFT
+
+	def write_pwm(self, channel: int, duty_cycle: int) -> None:
+		self.write(self._CHANNEL_0 + channel, self.scale_duty_cycle(duty_cycle))
+
+	def _channel_runs(self, channel_duty_map: dict[int, int]) -> list[tuple[int, list[int]]]:
+		'''
+			Groups `{channel: duty}` into contiguous PWMx runs: `[(start_register, data), ...]`.
+		'''
+		runs = []
+		for channel in sorted(channel_duty_map):
+			if runs and (runs[-1][0] + len(runs[-1][1]) == self._CHANNEL_0 + channel):
+				runs[-1][1].append(self.scale_duty_cycle(channel_duty_map[channel]))
+			else:
+				runs.append((self._CHANNEL_0 + channel, [self.scale_duty_cycle(channel_duty_map[channel])]))
+		return runs
+
+	def set_channels(self, channel_duty_map: dict[int, int]) -> None:
+		'''
+			Batch update; all 8 channels fit in one 8-byte block write.
+		'''
+		self.write_blocks(self._channel_runs(channel_duty_map))
+
+	def set_all_channels(self, duty_cycle: int) -> None:
+		self.write_block(self._CHANNEL_0, [self.scale_duty_cycle(duty_cycle)] * self._CHANNEL_COUNT)
+
+	def all_channels_off(self) -> None:
+		self.set_all_channels(0)
+
+	def set_motor_pwm(self, channel: int, duty_cycle: int) -> None:
+		self.write_pwm(channel, duty_cycle)
+
+def create_pwm_driver(i2c_driver_model: I2C_Driver_Model = GENERAL_I2C_DEVICE_SETTINGS['I2C_DEVICE'],
+					  is_servo_required: bool = False, **kwargs) -> I2C_Device:
+	'''
+		Builds the PWM driver selected by `GENERAL_I2C_DEVICE_SETTINGS['I2C_DEVICE']`.
+		`is_servo_required`: raise `I2C_Driver_Capability_Error` up front, before touching the bus,
+		if the driver cannot generate servo pulses (instead of failing mid-maneuver)
+		`kwargs` go to the driver constructor (`address`, `name`, `use_register_cache`, `bus`, ...).
+	'''
+	if i2c_driver_model is I2C_Driver_Model.PCA9685:
+		driver_class = PCA9685_PWM_Driver
+	elif i2c_driver_model is I2C_Driver_Model.TLC59108F:
+		driver_class = TLC59108F_PWM_Driver
+		kwargs.pop('global_frequency', None)
+			# fixed 97 kHz
+	else:
+		raise NotImplementedError(f'i2c_device::create_pwm_driver()::{i2c_driver_model} driver not implemented')
+
+	if is_servo_required and not driver_class.IS_SERVO_CAPABLE:
+		raise I2C_Driver_Capability_Error(f'i2c_device::create_pwm_driver()::{i2c_driver_model} cannot drive steering servos; use a PCA9685 or a steering model without servos')
+	return driver_class(**kwargs)
@@ -0,0 +1,141 @@
+'''
+Always-on I2C transaction metrics.
+
+Every `I2C_Device` owns an `I2C_Device_Metrics`; each bus transaction records
+count, payload bytes and latency per (operation, register), plus errors and retries.
+Latency goes into a fixed log2 histogram (bucket `i` holds latencies in [2^(i-1), 2^i) us),
+so recording is a dict lookup and a handful of integer adds.
+
+Counters are updated without a lock (one bus owner is the expected case);
+`snapshot()` returns a plain-dict copy that is safe to hand to other threads.
+
+'''
+import threading
+import weakref
+from time import perf_counter_ns
+
+HISTOGRAM_BUCKET_COUNT = 20		# last bucket: >= 2^18 us (~262 ms)
+DEFAULT_DUMP_INTERVAL = 5.0		# [s]
+
+class I2C_Register_Stats:
+	__slots__ = ('transaction_count', 'byte_count', 'error_count', 'retry_count', 'total_latency_ns', 'max_latency_ns', 'latency_histogram')
+
+	def __init__(self):
+		self.transaction_count = 0
+		self.byte_count = 0
+		self.error_count = 0
+		self.retry_count = 0
+		self.total_latency_ns = 0
+		self.max_latency_ns = 0
+		self.latency_histogram = [0] * HISTOGRAM_BUCKET_COUNT
+
+	def to_dict(self) -> dict:
+		return {
+			'transactions': self.transaction_count,
+			'bytes': self.byte_count,
+			'errors': self.error_count,
+			'retries': self.retry_count,
+			'mean_latency_us': (self.total_latency_ns / self.transaction_count / 1000) if self.transaction_count else 0.0,
+			'max_latency_us': self.max_latency_ns / 1000,
+			'latency_histogram_us': list(self.latency_histogram)
+		}
+
+class I2C_Device_Metrics:
+
+	def __init__(self, device_name: str, device_address: int):
+		self.device_name = device_name
+		self.device_address = device_address
+		self._register_stats = {}
+			# (operation, register_address) -> I2C_Register_Stats
+		self.breaker_trip_count = 0
+		self.breaker_rejected_count = 0
+		_all_device_metrics.add(self)
+
+	def _get_stats(self, operation: str, register_address: int) -> I2C_Register_Stats:
+		stats = self._register_stats.get((operation, register_address))
+		if stats is None:
+			stats = self._register_stats[(operation, register_address)] = I2C_Register_Stats()
+		return stats
+
+	def record(self, operation: str, register_address: int, byte_count: int, start_time_ns: int, is_error: bool = False) -> None:
+		'''
+			`start_time_ns` from `time.perf_counter_ns()` taken just before the transaction.
+		'''
+		latency_ns = perf_counter_ns() - start_time_ns
+		stats = self._get_stats(operation, register_address)
+
+		stats.transaction_count += 1
+		if is_error:
+			stats.error_count += 1
+		else:
+			stats.byte_count += byte_count
+		stats.total_latency_ns += latency_ns
+		if latency_ns > stats.max_latency_ns:
+			stats.max_latency_ns = latency_ns
+		stats.latency_histogram[min((latency_ns // 1000).bit_length(), HISTOGRAM_BUCKET_COUNT - 1)] += 1
+
+	def record_retry(self, operation: str, register_address: int) -> None:
+		self._get_stats(operation, register_address).retry_count += 1
+
+	def record_breaker_trip(self) -> None:
+		self.breaker_trip_count += 1
+
+	def record_breaker_rejection(self) -> None:
+		self.breaker_rejected_count += 1
+
+	def reset(self) -> None:
+		self._register_stats = {}
+		self.breaker_trip_count = 0
+		self.breaker_rejected_count = 0
+
+	def snapshot(self) -> dict:
+		register_stats = dict(self._register_stats)
+		totals = {'transactions': 0, 'bytes': 0, 'errors': 0, 'retries': 0}
+		registers = {}
+
+		for (operation, register_address), stats in sorted(register_stats.items()):
+			stats_dict = stats.to_dict()
+			registers[f'{operation}@0x{register_address:02X}'] = stats_dict
+			for key in totals:
+				totals[key] += stats_dict[key]
+		totals['breaker_trips'] = self.breaker_trip_count
+		totals['breaker_rejections'] = self.breaker_rejected_count
+
+		return {
+			'device_name': self.device_name,
+			'device_address': self.device_address,
+			'totals': totals,
+			'registers': registers
+		}
+
+_all_device_metrics = weakref.WeakSet()
+
+def get_all_snapshots() -> list[dict]:
+	return [device_metrics.snapshot() for device_metrics in list(_all_device_metrics)]
+
+def format_snapshots(snapshots: list[dict]) -> str:
+	lines = []
+	for snapshot in snapshots:
+		totals = snapshot['totals']
+		lines.append(f"{snapshot['device_name']}@0x{snapshot['device_address']:02X}: "
+			   f"{totals['transactions']} transactions, {totals['bytes']} B, {totals['errors']} errors, {totals['retries']} retries, "
+			   f"{totals['breaker_trips']} breaker trips")
+		for register_key, stats in snapshot['registers'].items():
+			lines.append(f"\t{register_key}: n={stats['transactions']} mean={stats['mean_latency_us']:.1f}us max={stats['max_latency_us']:.1f}us")
+	return '\n'.join(lines)
+
+def start_periodic_dump(interval: float = DEFAULT_DUMP_INTERVAL, output = print) -> threading.Event:
+	'''
+		Calls `output(format_snapshots(get_all_snapshots()))` every `interval` seconds
+		from a daemon thread. Set the returned event to stop.
+	'''
+	stop_event = threading.Event()
+
+	def _dump_loop():
+		while not stop_event.wait(interval):
+			output(format_snapshots(get_all_snapshots()))
+
+	dump_thread = threading.Thread(target = _dump_loop, name = 'i2c_metrics_dump')
+	dump_thread.daemon = True
+	dump_thread.start()
+	return stop_event
@@ -0,0 +1,144 @@
+'''
+Raw `I2C_RDWR` bus backend: talks to `/dev/i2c-N` through `ioctl` instead of `smbus3`.
+
+Several messages (for several registers, or several devices) are packed into one
+combined transaction and handed to the kernel in a single call, using preallocated
+`ctypes` message/buffer arrays so the hot path does no allocation.
+Select it per device: `PCA9685_PWM_Driver(bus = I2C_RDWR_Bus(1))`.
+
+For testing, pass any object with `ioctl(request, arg)`/`close()` as `i2c_dev`
+(e.g. `i2c_simulated.Simulated_I2C_Dev`).
+
+I2C_RDWR Documentation: https://www.kernel.org/doc/html/latest/i2c/dev-interface.html
+
+'''
+import ctypes
+import os
+import threading
+
+from i2c_bus import I2C_Bus
+from config import GENERAL_I2C_DEVICE_SETTINGS
+
+I2C_CHANNEL = GENERAL_I2C_DEVICE_SETTINGS['I2C_BUS_CHANNEL_NUMBER']
+
+# <linux/i2c-dev.h>, <linux/i2c.h>
+I2C_RDWR = 0x0707
+I2C_M_RD = 0x0001
+I2C_RDWR_IOCTL_MAX_MSGS = 42
+
+MAX_MESSAGE_LENGTH = 257		# register byte + a full 256-byte register file
+
+class I2C_Msg(ctypes.Structure):
+	_fields_ = [
+		('addr', ctypes.c_uint16),
+		('flags', ctypes.c_uint16),
+		('len', ctypes.c_uint16),
+		('buf', ctypes.POINTER(ctypes.c_uint8))
+	]
+
+class I2C_RDWR_Ioctl_Data(ctypes.Structure):
+	_fields_ = [
+		('msgs', ctypes.POINTER(I2C_Msg)),
+		('nmsgs', ctypes.c_uint32)
+	]
+
+class Linux_I2C_Dev:
+	'''
+		Thin wrapper around the `/dev/i2c-N` file descriptor.
+	'''
+
+	def __init__(self, bus_channel: int):
+		import fcntl
+		self._fcntl_ioctl = fcntl.ioctl
+		self.file_descriptor = os.open(f'/dev/i2c-{bus_channel}', os.O_RDWR)
+
+	def ioctl(self, request: int, arg: int) -> int:
+		return self._fcntl_ioctl(self.file_descriptor, request, arg)
+
+	def close(self) -> None:
+		os.close(self.file_descriptor)
+
+class I2C_RDWR_Bus(I2C_Bus):
+
+	def __init__(self, bus_channel: int = I2C_CHANNEL, i2c_dev = None):
+		self.bus_channel = bus_channel
+		self.i2c_dev = i2c_dev if i2c_dev is not None else Linux_I2C_Dev(bus_channel)
+		self._lock = threading.Lock()
+
+		# preallocated message table and per-message buffers
+		self._messages = (I2C_Msg * I2C_RDWR_IOCTL_MAX_MSGS)()
+		self._buffers = [(ctypes.c_uint8 * MAX_MESSAGE_LENGTH)() for _ in range(I2C_RDWR_IOCTL_MAX_MSGS)]
+		for message, buffer in zip(self._messages, self._buffers):
+			message.buf = ctypes.cast(buffer, ctypes.POINTER(ctypes.c_uint8))
+		self._ioctl_data = I2C_RDWR_Ioctl_Data(ctypes.cast(self._messages, ctypes.POINTER(I2C_Msg)), 0)
+		self._ioctl_data_address = ctypes.addressof(self._ioctl_data)
+
+	def _set_write_message(self, message_index: int, i2c_addr: int, first_byte: int, data = ()) -> None:
+		'''
+			Fills the preallocated buffer in place: `[first_byte, *data]`.
+		'''
+		message = self._messages[message_index]
+		message.addr = i2c_addr
+		message.flags = 0
+		message.len = 1 + len(data)
+
+		buffer = self._buffers[message_index]
+		buffer[0] = first_byte
+		if data:
+			buffer[1:message.len] = data
+
+	def _set_read_message(self, message_index: int, i2c_addr: int, length: int) -> None:
+		message = self._messages[message_index]
+		message.addr = i2c_addr
+		message.flags = I2C_M_RD
+		message.len = length
+
+	def _transfer(self, message_count: int) -> None:
+		self._ioctl_data.nmsgs = message_count
+		self.i2c_dev.ioctl(I2C_RDWR, self._ioctl_data_address)
+
+	def read_byte_data(self, i2c_addr: int, register: int) -> int:
+		return self.read_i2c_block_data(i2c_addr, register, 1)[0]
+
+	def write_byte_data(self, i2c_addr: int, register: int, value: int) -> None:
+		with self._lock:
+			self._set_write_message(0, i2c_addr, register, (value,))
+			self._transfer(1)
+
+	def read_i2c_block_data(self, i2c_addr: int, register: int, length: int) -> list[int]:
+		'''
+			Register-pointer write + repeated-START read in one combined transaction.
+		'''
+		with self._lock:
+			self._set_write_message(0, i2c_addr, register)
+			self._set_read_message(1, i2c_addr, length)
+			self._transfer(2)
+			return list(self._buffers[1][:length])
+
+	def write_i2c_block_data(self, i2c_addr: int, register: int, data: list[int]) -> None:
+		'''
+			Not limited to the 32-byte SMBus block size.
+		'''
+		with self._lock:
+			self._set_write_message(0, i2c_addr, register, data)
+			self._transfer(1)
+
+	def write_byte(self, i2c_addr: int, value: int) -> None:
+		with self._lock:
+			self._set_write_message(0, i2c_addr, value)
+			self._transfer(1)
+
+	def write_many(self, writes: list[tuple[int, int, list[int]]]) -> None:
+		'''
+			`writes`: `[(i2c_addr, register, data), ...]`, possibly for several devices.
+			Sent as combined transactions of up to `I2C_RDWR_IOCTL_MAX_MSGS` messages per kernel call.
+		'''
+		with self._lock:
+			for chunk_start in range(0, len(writes), I2C_RDWR_IOCTL_MAX_MSGS):
+				chunk = writes[chunk_start:chunk_start + I2C_RDWR_IOCTL_MAX_MSGS]
+				for message_index, (i2c_addr, register, data) in enumerate(chunk):
+					self._set_write_message(message_index, i2c_addr, register, data)
+				self._transfer(len(chunk))
+
+	def close(self) -> None:
+		self.i2c_dev.close()
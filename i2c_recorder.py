@@ -0,0 +1,259 @@
+'''
+Record/replay of I2C bus transactions for offline performance analysis.
+
+`Recording_I2C_Bus` wraps any backend and appends one binary record per transaction
+to an `I2C_Transaction_Recorder`:
+	(monotonic ns timestamp, duration ns, address, operation, register, flags, payload length) + payload
+Both times are uint64, so neither wraps within a session.
+Records are packed into an in-memory `bytearray` and written out in large chunks,
+so recording costs a `struct.pack` and an `extend` per transaction.
+A recorder appends to an existing recording, so a bus that is closed and reopened keeps adding to the same file.
+Set `I2C_RECORDING_SETTINGS['IS_RECORDING_ENABLED']` to record every bus opened through `i2c_bus.acquire_bus()`,
+or pass `bus = Recording_I2C_Bus(backend, recorder)` to a single `I2C_Device`.
+
+Replay:
+- `replay_to_bus()`: re-issues the recorded transactions verbatim on another bus (e.g. `Simulated_I2C_Bus`)
+- `replay_through_device()`: feeds the recorded register writes through a driver, so driver-side
+	changes (block writes, shadow-register elision, transactions) can be compared on the same session
+
+'''
+import struct
+import threading
+from collections import namedtuple
+from time import perf_counter_ns, sleep
+
+from i2c_bus import I2C_Bus
+from config import I2C_RECORDING_SETTINGS
+
+RECORDING_PATH = I2C_RECORDING_SETTINGS['RECORDING_PATH']
+FLUSH_THRESHOLD_BYTES = I2C_RECORDING_SETTINGS['FLUSH_THRESHOLD_BYTES']
+
+RECORDING_FILE_MAGIC = b'I2CREC02'
+RECORD_HEADER = struct.Struct('<QQBBBBH')		# 22 bytes + payload
+
+OPERATION_READ_BYTE = 1
+OPERATION_WRITE_BYTE = 2
+OPERATION_READ_BLOCK = 3
+OPERATION_WRITE_BLOCK = 4
+OPERATION_WRITE_CONTROL = 5		# `write_byte()`: no register, the value is stored in `register`
+
+FLAG_ERROR = 0x01
+
+I2C_Transaction_Record = namedtuple('I2C_Transaction_Record',
+	('timestamp_ns', 'duration_ns', 'address', 'operation', 'register', 'is_error', 'payload'))
+
+class I2C_Transaction_Recorder:
+
+	def __init__(self, path: str = RECORDING_PATH, flush_threshold_bytes: int = FLUSH_THRESHOLD_BYTES):
+		self.path = path
+		self.flush_threshold_bytes = flush_threshold_bytes
+		self._buffer = bytearray()
+		self._lock = threading.Lock()
+		self.record_count = 0
+
+		with open(self.path, 'a+b') as recording_file:
+			if recording_file.tell() == 0:
+				recording_file.write(RECORDING_FILE_MAGIC)
+				return
+			recording_file.seek(0)
+			if recording_file.read(len(RECORDING_FILE_MAGIC)) != RECORDING_FILE_MAGIC:
+				raise ValueError(f'I2C_Transaction_Recorder::__init__()::{path} exists and is not an I2C recording of this version')
+
+	def record(self, start_time_ns: int, duration_ns: int, address: int, operation: int, register: int,
+			payload = b'', is_error: bool = False) -> None:
+		with self._lock:
+			self._buffer += RECORD_HEADER.pack(start_time_ns, duration_ns, address, operation, register,
+									  FLAG_ERROR if is_error else 0, len(payload))
+			self._buffer += bytes(payload)
+			self.record_count += 1
+			if len(self._buffer) >= self.flush_threshold_bytes:
+				self._flush_locked()
+
+	def _flush_locked(self) -> None:
+		with open(self.path, 'ab') as recording_file:
+			recording_file.write(self._buffer)
+		self._buffer.clear()
+
+	def flush(self) -> None:
+		with self._lock:
+			if self._buffer:
+				self._flush_locked()
+
+	def close(self) -> None:
+		self.flush()
+
+class Recording_I2C_Bus(I2C_Bus):
+	'''
+		Passes every call through to `bus` and records it, including failed ones (flagged, payload as sent).
+	'''
+
+	def __init__(self, bus, recorder: I2C_Transaction_Recorder):
+		self.bus = bus
+		self.recorder = recorder
+
+	def _call(self, operation: int, address: int, register: int, payload, bus_function, *args):
+		start_time_ns = perf_counter_ns()
+		try:
+			result = bus_function(*args)
+		except OSError:
+			self.recorder.record(start_time_ns, perf_counter_ns() - start_time_ns, address, operation, register, payload, is_error = True)
+			raise
+		duration_ns = perf_counter_ns() - start_time_ns
+
+		if operation == OPERATION_READ_BYTE:
+			payload = (result,)
+		elif operation == OPERATION_READ_BLOCK:
+			payload = result
+		self.recorder.record(start_time_ns, duration_ns, address, operation, register, payload)
+		return result
+
+	def read_byte_data(self, i2c_addr: int, register: int) -> int:
+		return self._call(OPERATION_READ_BYTE, i2c_addr, register, b'', self.bus.read_byte_data, i2c_addr, register)
+
+	def write_byte_data(self, i2c_addr: int, register: int, value: int) -> None:
+		self._call(OPERATION_WRITE_BYTE, i2c_addr, register, (value,), self.bus.write_byte_data, i2c_addr, register, value)
+
+	def read_i2c_block_data(self, i2c_addr: int, register: int, length: int) -> list[int]:
+		return self._call(OPERATION_READ_BLOCK, i2c_addr, register, b'', self.bus.read_i2c_block_data, i2c_addr, register, length)
+
+	def write_i2c_block_data(self, i2c_addr: int, register: int, data: list[int]) -> None:
+		self._call(OPERATION_WRITE_BLOCK, i2c_addr, register, data, self.bus.write_i2c_block_data, i2c_addr, register, data)
+
+	def write_byte(self, i2c_addr: int, value: int) -> None:
+		self._call(OPERATION_WRITE_CONTROL, i2c_addr, value, b'', self.bus.write_byte, i2c_addr, value)
+
+	def write_many(self, writes: list[tuple[int, int, list[int]]]) -> None:
+		'''
+			Recorded as one block write per message; the combined call's duration is split evenly between them.
+		'''
+		start_time_ns = perf_counter_ns()
+		is_error = False
+		try:
+			if hasattr(self.bus, 'write_many'):
+				self.bus.write_many(writes)
+			else:
+				for i2c_addr, register, data in writes:
+					self.bus.write_i2c_block_data(i2c_addr, register, data)
+		except OSError:
+			is_error = True
+			raise
+		finally:
+			duration_ns = (perf_counter_ns() - start_time_ns) // max(1, len(writes))
+			for i2c_addr, register, data in writes:
+				self.recorder.record(start_time_ns, duration_ns, i2c_addr, OPERATION_WRITE_BLOCK, register, data, is_error)
+
+	def close(self) -> None:
+		self.recorder.close()
+		self.bus.close()
+
+def read_recording(path: str = RECORDING_PATH):
+	'''
+		Yields `I2C_Transaction_Record`s in recorded order.
+	'''
+	with open(path, 'rb') as recording_file:
+		if recording_file.read(len(RECORDING_FILE_MAGIC)) != RECORDING_FILE_MAGIC:
+			raise ValueError(f'i2c_recorder::read_recording()::{path} is not an I2C recording')
+		data = recording_file.read()
+
+	offset = 0
+	while offset < len(data):
+		timestamp_ns, duration_ns, address, operation, register, flags, payload_length = RECORD_HEADER.unpack_from(data, offset)
+		offset += RECORD_HEADER.size
+		payload = data[offset:offset + payload_length]
+		offset += payload_length
+		yield I2C_Transaction_Record(timestamp_ns, duration_ns, address, operation, register, bool(flags & FLAG_ERROR), payload)
+
+def summarize_recording(records) -> dict:
+	'''
+		Transaction count, payload bytes and total measured bus time [s] of a recording.
+	'''
+	summary = {'transactions': 0, 'bytes': 0, 'errors': 0, 'bus_time': 0.0}
+	for record in records:
+		summary['transactions'] += 1
+		summary['bytes'] += len(record.payload) if record.operation != OPERATION_WRITE_CONTROL else 1
+		summary['errors'] += record.is_error
+		summary['bus_time'] += record.duration_ns / 1e9
+	return summary
+
+def replay_to_bus(records, bus, is_timed: bool = False) -> None:
+	'''
+		Re-issues every successful transaction on `bus`. With `is_timed`, keeps the recorded spacing between calls.
+	'''
+	first_timestamp_ns = replay_start_time_ns = None
+	for record in records:
+		if record.is_error:
+			continue
+
+		if is_timed:
+			if first_timestamp_ns is None:
+				first_timestamp_ns, replay_start_time_ns = record.timestamp_ns, perf_counter_ns()
+			wait_time_ns = (record.timestamp_ns - first_timestamp_ns) - (perf_counter_ns() - replay_start_time_ns)
+			if wait_time_ns > 0:
+				sleep(wait_time_ns / 1e9)
+
+		if record.operation == OPERATION_READ_BYTE:
+			bus.read_byte_data(record.address, record.register)
+		elif record.operation == OPERATION_WRITE_BYTE:
+			bus.write_byte_data(record.address, record.register, record.payload[0])
+		elif record.operation == OPERATION_READ_BLOCK:
+			bus.read_i2c_block_data(record.address, record.register, len(record.payload))
+		elif record.operation == OPERATION_WRITE_BLOCK:
+			bus.write_i2c_block_data(record.address, record.register, list(record.payload))
+		elif record.operation == OPERATION_WRITE_CONTROL:
+			bus.write_byte(record.address, record.register)
+
+def replay_through_device(records, device, register_mask: int = 0xFF) -> None:
+	'''
+		Feeds the recorded register writes addressed to `device.device_address` through `device.write` / `device.write_blocks`.
+		`register_mask` strips command-byte flags (e.g. `0x1F` for TLC59108F auto-increment flags).
+		Reads and control bytes are skipped: they do not change what the driver has to send.
+	'''
+	for record in records:
+		if record.is_error or (record.address != device.device_address):
+			continue
+
+		if record.operation == OPERATION_WRITE_BYTE:
+			device.write(record.register & register_mask, record.payload[0])
+		elif record.operation == OPERATION_WRITE_BLOCK:
+			device.write_blocks([(record.register & register_mask, list(record.payload))])
+
+def main():
+	'''
+		Records a simulated session with a plain driver, then replays it against a cached driver.
+	'''
+	import os
+	import tempfile
+	from i2c_simulated import Simulated_I2C_Bus, Simulated_PCA9685
+	from i2c_device import PCA9685_PWM_Driver
+
+	CURRENT_SCOPE = 'i2c_recorder.py::main()::'
+	recording_path = os.path.join(tempfile.gettempdir(), 'i2c_session.i2crec')
+	if os.path.exists(recording_path):
+		os.remove(recording_path)
+			# recorders append
+
+	recorder = I2C_Transaction_Recorder(recording_path)
+	recorded_bus = Simulated_I2C_Bus([Simulated_PCA9685(0x40)])
+	pwm_driver = PCA9685_PWM_Driver(address = 0x40, bus = Recording_I2C_Bus(recorded_bus, recorder))
+	for duty_cycle in (0, 500, 1000, 1000, 1000, 500, 0):
+		for channel in range(4, 8):
+			pwm_driver.set_motor_pwm(channel, duty_cycle)
+	recorder.close()
+
+	summary = summarize_recording(read_recording(recording_path))
+	print(f'{CURRENT_SCOPE}recorded: {summary["transactions"]} transactions, {summary["bytes"]} B')
+
+	replay_bus = Simulated_I2C_Bus([Simulated_PCA9685(0x40)])
+	replay_to_bus(read_recording(recording_path), replay_bus)
+	stats = replay_bus.get_stats()
+	print(f'{CURRENT_SCOPE}verbatim replay: {stats["transactions"]} transactions, {stats["bus_time"] * 1e6:.0f} us')
+
+	replay_bus = Simulated_I2C_Bus([Simulated_PCA9685(0x40)])
+	cached_pwm_driver = PCA9685_PWM_Driver(address = 0x40, bus = replay_bus, use_register_cache = True)
+	replay_bus.reset_stats()
+	replay_through_device(read_recording(recording_path), cached_pwm_driver)
+	stats = replay_bus.get_stats()
+	print(f'{CURRENT_SCOPE}replay through cached driver: {stats["transactions"]} transactions, {stats["bus_time"] * 1e6:.0f} us')
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,65 @@
+'''
+Declarative bit-field descriptions of device registers (MODE1/MODE2, ...).
+
+A driver lists its fields once as `Register_Map([Bit_Field('SLEEP', MODE1, 4), ...])`;
+`I2C_Device.write_fields()` / `update_fields()` then group staged field changes by register
+and apply each register with a single read-modify-write (vs one bus read + write per bit
+in `_deprecated/pca9685.py`'s `set_sleep_bit()`, `set_outdrv_bit()`, ...).
+
+'''
+
+class Bit_Field:
+	__slots__ = ('name', 'register_address', 'shift', 'width', 'mask', 'is_self_clearing')
+
+	def __init__(self, name: str, register_address: int, shift: int, width: int = 1, is_self_clearing: bool = False):
+		'''
+			`shift`: position of the field's least significant bit (0 = LSB)
+			`is_self_clearing`: the device clears the bit by itself (e.g. PCA9685 RESTART);
+				it is never written back unless explicitly set
+		'''
+		if (shift < 0) or (shift + width > 8):
+			raise ValueError(f'Bit_Field::__init__()::{name} (bits {shift}..{shift + width - 1}) does not fit in a byte')
+		self.name = name
+		self.register_address = register_address
+		self.shift = shift
+		self.width = width
+		self.mask = ((1 << width) - 1) << shift
+		self.is_self_clearing = is_self_clearing
+
+	def get(self, register_value: int) -> int:
+		return (register_value & self.mask) >> self.shift
+
+	def set(self, register_value: int, value: int) -> int:
+		'''
+			Returns `register_value` with this field replaced by `value`.
+		'''
+		value = int(value)
+		if (value < 0) or (value >> self.width):
+			raise ValueError(f'Bit_Field::set()::{value} does not fit in {self.name} ({self.width} bit)')
+		return (register_value & ~self.mask) | (value << self.shift)
+
+class Register_Map:
+
+	def __init__(self, fields: list[Bit_Field] = ()):
+		self.fields = {field.name: field for field in fields}
+		self.self_clearing_bits = {}
+			# {register_address: mask}
+		for field in fields:
+			if field.is_self_clearing:
+				self.self_clearing_bits[field.register_address] = self.self_clearing_bits.get(field.register_address, 0) | field.mask
+
+	def __getitem__(self, field_name: str) -> Bit_Field:
+		try:
+			return self.fields[field_name]
+		except KeyError:
+			raise KeyError(f'Register_Map::unknown field {field_name}') from None
+
+	def group_by_register(self, field_values: dict[str, int]) -> dict[int, list[tuple[Bit_Field, int]]]:
+		'''
+			`{field_name: value}` -> `{register_address: [(field, value), ...]}`, registers in ascending order.
+		'''
+		register_updates = {}
+		for field_name, value in field_values.items():
+			field = self[field_name]
+			register_updates.setdefault(field.register_address, []).append((field, value))
+		return dict(sorted(register_updates.items()))
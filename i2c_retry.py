@@ -0,0 +1,128 @@
+'''
+Bounded-latency error handling for `I2C_Device` bus transactions.
+
+`I2C_Retry_Policy`: retry a failed transaction (NACK, bus glitch => `OSError`) with
+jittered exponential backoff, but never past a per-call time budget.
+`I2C_Circuit_Breaker`: after `failure_threshold` consecutive failed calls the device is
+considered dead and calls fail fast with `I2C_Device_Unavailable_Error` for `reset_timeout`
+seconds; then one trial call is let through (half-open) to probe for recovery, while
+every other caller keeps failing fast until it succeeds.
+
+So a dead servo board costs the motor loop at most one time budget, then nothing.
+
+'''
+import threading
+from random import uniform
+from time import monotonic
+
+from config import I2C_FAULT_TOLERANCE_SETTINGS
+
+DEFAULT_MAX_ATTEMPTS = I2C_FAULT_TOLERANCE_SETTINGS['MAX_ATTEMPTS']
+DEFAULT_TIME_BUDGET = I2C_FAULT_TOLERANCE_SETTINGS['TIME_BUDGET']
+DEFAULT_BASE_BACKOFF = I2C_FAULT_TOLERANCE_SETTINGS['BASE_BACKOFF']
+DEFAULT_MAX_BACKOFF = I2C_FAULT_TOLERANCE_SETTINGS['MAX_BACKOFF']
+DEFAULT_FAILURE_THRESHOLD = I2C_FAULT_TOLERANCE_SETTINGS['BREAKER_FAILURE_THRESHOLD']
+DEFAULT_RESET_TIMEOUT = I2C_FAULT_TOLERANCE_SETTINGS['BREAKER_RESET_TIMEOUT']
+
+class I2C_Device_Unavailable_Error(OSError):
+	'''
+		Raised without touching the bus while a device's circuit breaker is open.
+	'''
+	pass
+
+class I2C_Retry_Policy:
+
+	def __init__(self, max_attempts: int = DEFAULT_MAX_ATTEMPTS, time_budget: float = DEFAULT_TIME_BUDGET,
+			  base_backoff: float = DEFAULT_BASE_BACKOFF, max_backoff: float = DEFAULT_MAX_BACKOFF):
+		'''
+			`max_attempts`: total tries per call (1 => no retry)
+			`time_budget` [s]: no retry is started if its backoff would end past this budget
+			`base_backoff`, `max_backoff` [s]: backoff before retry n is uniform in [0, min(max, base * 2^(n-1))]
+		'''
+		self.max_attempts = max_attempts
+		self.time_budget = time_budget
+		self.base_backoff = base_backoff
+		self.max_backoff = max_backoff
+
+	def get_backoff(self, attempt: int) -> float:
+		'''
+			Full-jitter backoff after the `attempt`-th failure (1-based).
+		'''
+		return uniform(0.0, min(self.max_backoff, self.base_backoff * (2 ** (attempt - 1))))
+
+class I2C_Circuit_Breaker:
+
+	CLOSED = 'closed'
+	OPEN = 'open'
+	HALF_OPEN = 'half_open'
+
+	def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD, reset_timeout: float = DEFAULT_RESET_TIMEOUT):
+		self.failure_threshold = failure_threshold
+		self.reset_timeout = reset_timeout
+
+		self.state = self.CLOSED
+		self.consecutive_failures = 0
+		self.opened_time = 0.0
+		self.trip_count = 0
+		self.rejected_count = 0
+
+		self.trial_start_time = None
+			# half-open: when the one trial call was let through (`None`: no trial in flight)
+		self._lock = threading.Lock()
+
+	def before_call(self, device_name: str = '') -> None:
+		'''
+			Raises `I2C_Device_Unavailable_Error` while open, and in half-open while the trial call is in flight.
+			Once `reset_timeout` has passed, the caller that gets through becomes the single trial call.
+			A trial that never reports back (e.g. raised something other than `OSError`) is replaced after `reset_timeout`.
+		'''
+		if self.state == self.CLOSED:
+			return
+
+		with self._lock:
+			now = monotonic()
+			if self.state == self.OPEN:
+				is_rejected = now - self.opened_time < self.reset_timeout
+			elif self.state == self.HALF_OPEN:
+				is_rejected = (self.trial_start_time is not None) and (now - self.trial_start_time < self.reset_timeout)
+			else:
+				return
+
+			if is_rejected:
+				self.rejected_count += 1
+				raise I2C_Device_Unavailable_Error(f'I2C_Circuit_Breaker::{device_name} unavailable after {self.consecutive_failures} consecutive failures')
+			self.state = self.HALF_OPEN
+			self.trial_start_time = now
+
+	def record_success(self) -> None:
+		if (self.state == self.CLOSED) and (self.consecutive_failures == 0):
+			return
+				# the common case: no lock per healthy transaction
+		with self._lock:
+			self.consecutive_failures = 0
+			self.state = self.CLOSED
+			self.trial_start_time = None
+
+	def record_failure(self) -> bool:
+		'''
+			Returns `True` if this failure tripped the breaker.
+		'''
+		with self._lock:
+			self.consecutive_failures += 1
+			if (self.state == self.HALF_OPEN) or (self.consecutive_failures >= self.failure_threshold):
+				is_trip = self.state != self.OPEN
+				self.state = self.OPEN
+				self.opened_time = monotonic()
+				self.trial_start_time = None
+				if is_trip:
+					self.trip_count += 1
+				return is_trip
+			return False
+
+	def get_stats(self) -> dict:
+		return {
+			'state': self.state,
+			'consecutive_failures': self.consecutive_failures,
+			'trips': self.trip_count,
+			'rejected': self.rejected_count
+		}
@@ -0,0 +1,530 @@
+'''
+In-memory I2C bus backend and register-level device models.
+
+Lets `i2c_device.py` (and anything built on it) run and be benchmarked without a Pi:
+`PCA9685_PWM_Driver(bus = Simulated_I2C_Bus([Simulated_PCA9685(0x40)]))`.
+
+Latency model: every transaction costs its wire time at `bus_frequency`
+(9 clocks per byte incl. ACK, + START/RESTART/STOP) plus a fixed `transaction_overhead_time`.
+Simulated time is always accumulated in `bus_time`; with `is_realtime` the caller also sleeps for it.
+
+PCA9685 model: register file with power-on defaults, MODE1 AI auto-increment (LED15_OFF_H -> MODE1,
+ALL_LED_ON_L..PRE_SCALE -> MODE1), PRE_SCALE only writable while SLEEP, self-clearing RESTART,
+ALL_LED broadcast registers, ALLCALL/SUBADR addressing and SWRST over the general call address.
+[PCA9685 Datasheet](https://www.nxp.com/docs/en/data-sheet/PCA9685.pdf)
+
+'''
+import ctypes
+import errno
+import random
+import threading
+from time import sleep
+
+from i2c_bus import I2C_Bus
+from i2c_rdwr import I2C_RDWR, I2C_M_RD, I2C_RDWR_Ioctl_Data
+from config import SIMULATED_I2C_BUS_SETTINGS
+
+BUS_FREQUENCY = SIMULATED_I2C_BUS_SETTINGS['BUS_FREQUENCY']
+TRANSACTION_OVERHEAD_TIME = SIMULATED_I2C_BUS_SETTINGS['TRANSACTION_OVERHEAD_TIME']
+IS_REALTIME = SIMULATED_I2C_BUS_SETTINGS['IS_REALTIME']
+
+CLOCKS_PER_BYTE = 9			# 8 data bits + ACK
+GENERAL_CALL_ADDRESS = 0x00
+
+class Simulated_I2C_Bus(I2C_Bus):
+
+	def __init__(self, devices: list = None, bus_frequency: int = BUS_FREQUENCY,
+			  transaction_overhead_time: float = TRANSACTION_OVERHEAD_TIME, is_realtime: bool = IS_REALTIME):
+		self.devices = list(devices or [])
+		self.bus_frequency = bus_frequency
+		self.transaction_overhead_time = transaction_overhead_time
+		self.is_realtime = is_realtime
+		self._lock = threading.Lock()
+
+		self.reset_stats()
+
+	def attach(self, device) -> None:
+		self.devices.append(device)
+
+	def reset_stats(self) -> None:
+		self.transaction_count = 0
+		self.byte_count = 0
+		self.bus_time = 0.0		# [s]
+
+	def get_stats(self) -> dict:
+		return {
+			'transactions': self.transaction_count,
+			'bytes': self.byte_count,
+			'bus_time': self.bus_time
+		}
+
+	def _responders(self, i2c_addr: int) -> list:
+		responders = [device for device in self.devices if device.responds_to(i2c_addr)]
+		if not responders:
+			raise OSError(errno.EREMOTEIO, f'Simulated_I2C_Bus::no ACK from 0x{i2c_addr:02X}')
+		return responders
+
+	def _account(self, clocks: int, payload_bytes: int) -> None:
+		'''
+			`clocks` on the wire (START/RESTART/STOP counted as one clock each).
+		'''
+		latency = clocks / self.bus_frequency + self.transaction_overhead_time
+		self.transaction_count += 1
+		self.byte_count += payload_bytes
+		self.bus_time += latency
+		if self.is_realtime:
+			sleep(latency)
+
+	def read_byte_data(self, i2c_addr: int, register: int) -> int:
+		with self._lock:
+			self._account(3 + 4 * CLOCKS_PER_BYTE, 1)
+			return self._responders(i2c_addr)[0].read(register)
+
+	def write_byte_data(self, i2c_addr: int, register: int, value: int) -> None:
+		with self._lock:
+			self._account(2 + 3 * CLOCKS_PER_BYTE, 1)
+			for device in self._responders(i2c_addr):
+				device.write(register, value)
+
+	def read_i2c_block_data(self, i2c_addr: int, register: int, length: int) -> list[int]:
+		with self._lock:
+			self._account(3 + (3 + length) * CLOCKS_PER_BYTE, length)
+			return self._responders(i2c_addr)[0].read_block(register, length)
+
+	def write_i2c_block_data(self, i2c_addr: int, register: int, data: list[int]) -> None:
+		with self._lock:
+			self._account(2 + (2 + len(data)) * CLOCKS_PER_BYTE, len(data))
+			for device in self._responders(i2c_addr):
+				device.write_block(register, data)
+
+	def write_byte(self, i2c_addr: int, value: int) -> None:
+		with self._lock:
+			self._account(2 + 2 * CLOCKS_PER_BYTE, 1)
+			if i2c_addr == GENERAL_CALL_ADDRESS:
+				for device in self.devices:
+					device.general_call(value)
+			else:
+				for device in self._responders(i2c_addr):
+					device.write_control(value)
+
+class Faulty_I2C_Bus(I2C_Bus):
+	'''
+		Fault-injecting wrapper around another backend (usually a `Simulated_I2C_Bus`).
+		Each transaction fails with `OSError` (EREMOTEIO, as on a NACK) if it is among the next
+		`fail_next_count` calls, if `is_dead`, or with probability `failure_rate` (seeded).
+	'''
+
+	def __init__(self, bus, failure_rate: float = 0.0, seed: int = None):
+		self.bus = bus
+		self.failure_rate = failure_rate
+		self.is_dead = False
+		self.fail_next_count = 0
+		self.injected_fault_count = 0
+		self._random = random.Random(seed)
+
+	def fail_next(self, count: int = 1) -> None:
+		self.fail_next_count += count
+
+	def _maybe_fail(self, i2c_addr: int) -> None:
+		if self.fail_next_count > 0:
+			self.fail_next_count -= 1
+		elif not (self.is_dead or (self.failure_rate and (self._random.random() < self.failure_rate))):
+			return
+		self.injected_fault_count += 1
+		raise OSError(errno.EREMOTEIO, f'Faulty_I2C_Bus::injected fault on 0x{i2c_addr:02X}')
+
+	def read_byte_data(self, i2c_addr: int, register: int) -> int:
+		self._maybe_fail(i2c_addr)
+		return self.bus.read_byte_data(i2c_addr, register)
+
+	def write_byte_data(self, i2c_addr: int, register: int, value: int) -> None:
+		self._maybe_fail(i2c_addr)
+		self.bus.write_byte_data(i2c_addr, register, value)
+
+	def read_i2c_block_data(self, i2c_addr: int, register: int, length: int) -> list[int]:
+		self._maybe_fail(i2c_addr)
+		return self.bus.read_i2c_block_data(i2c_addr, register, length)
+
+	def write_i2c_block_data(self, i2c_addr: int, register: int, data: list[int]) -> None:
+		self._maybe_fail(i2c_addr)
+		self.bus.write_i2c_block_data(i2c_addr, register, data)
+
+	def write_byte(self, i2c_addr: int, value: int) -> None:
+		self._maybe_fail(i2c_addr)
+		self.bus.write_byte(i2c_addr, value)
+
+	def close(self) -> None:
+		self.bus.close()
+
+class Simulated_I2C_Dev:
+	'''
+		In-memory stand-in for `/dev/i2c-N` used by `i2c_rdwr.I2C_RDWR_Bus(i2c_dev = ...)`.
+		Decodes `I2C_RDWR` message tables and applies them to the devices on `bus`;
+		each ioctl is charged as one combined transaction (one STOP, RESTART between messages).
+	'''
+
+	def __init__(self, bus: Simulated_I2C_Bus):
+		self.bus = bus
+		self.ioctl_count = 0
+
+	def ioctl(self, request: int, arg: int) -> int:
+		if request != I2C_RDWR:
+			raise OSError(errno.ENOTTY, f'Simulated_I2C_Dev::unsupported ioctl 0x{request:04X}')
+
+		ioctl_data = ctypes.cast(arg, ctypes.POINTER(I2C_RDWR_Ioctl_Data)).contents
+		messages = [ioctl_data.msgs[message_index] for message_index in range(ioctl_data.nmsgs)]
+
+		with self.bus._lock:
+			self.ioctl_count += 1
+			self.bus._account(
+				1 + sum(1 + (1 + message.len) * CLOCKS_PER_BYTE for message in messages),
+				sum(message.len for message in messages)
+			)
+
+			register_pointers = {}
+			for message in messages:
+				if message.flags & I2C_M_RD:
+					device = self.bus._responders(message.addr)[0]
+					data = device.read_block(register_pointers.get(message.addr, device._control_register), message.len)
+					for offset, value in enumerate(data):
+						message.buf[offset] = value
+					continue
+
+				payload = message.buf[:message.len]
+				if message.addr == GENERAL_CALL_ADDRESS:
+					for device in self.bus.devices:
+						device.general_call(payload[0])
+					continue
+
+				register_pointers[message.addr] = payload[0]
+				for device in self.bus._responders(message.addr):
+					device.write_control(payload[0])
+					if len(payload) > 1:
+						device.write_block(payload[0], payload[1:])
+		return 0
+
+	def close(self) -> None:
+		pass
+
+class Simulated_I2C_Device:
+	'''
+		Register file with a control (pointer) register. Subclasses model device-specific side effects.
+	'''
+	_REGISTER_COUNT = 256
+
+	def __init__(self, address: int):
+		self.address = address
+		self.registers = bytearray(self._REGISTER_COUNT)
+		self._control_register = 0
+		self.power_on_reset()
+
+	def power_on_reset(self) -> None:
+		self.registers[:] = bytes(self._REGISTER_COUNT)
+		self._control_register = 0
+
+	def responds_to(self, i2c_addr: int) -> bool:
+		return i2c_addr == self.address
+
+	def is_auto_increment(self) -> bool:
+		return False
+
+	def _next_register(self, register: int) -> int:
+		return (register + 1) % self._REGISTER_COUNT
+
+	def read(self, register: int) -> int:
+		return self.registers[register]
+
+	def write(self, register: int, value: int) -> None:
+		self.registers[register] = value & 0xFF
+
+	def read_block(self, register: int, length: int) -> list[int]:
+		data = []
+		for _ in range(length):
+			data.append(self.read(register))
+			if self.is_auto_increment():
+				register = self._next_register(register)
+		return data
+
+	def write_block(self, register: int, data: list[int]) -> None:
+		for value in data:
+			self.write(register, value)
+			if self.is_auto_increment():
+				register = self._next_register(register)
+
+	def write_control(self, value: int) -> None:
+		self._control_register = value
+
+	def general_call(self, value: int) -> None:
+		pass
+
+class Simulated_PCA9685(Simulated_I2C_Device):
+
+	_MODE1				= 0x00
+	_MODE2				= 0x01
+	_SUBADR1			= 0x02
+	_SUBADR2			= 0x03
+	_SUBADR3			= 0x04
+	_ALLCALLADR			= 0x05
+	_CHANNEL_0_ON_LSB	= 0x06
+	_LAST_LED_REGISTER	= 0x45		# LED15_OFF_H
+	_ALLLED_ON_LSB		= 0xFA
+	_ALLLED_OFF_MSB		= 0xFD
+	_PRESCALE			= 0xFE
+
+	_MODE1_RESTART		= 0x80
+	_MODE1_AI			= 0x20
+	_MODE1_SLEEP		= 0x10
+	_MODE1_SUB1			= 0x08
+	_MODE1_SUB2			= 0x04
+	_MODE1_SUB3			= 0x02
+	_MODE1_ALLCALL		= 0x01
+
+	_FULL_ON_OFF_BIT	= 0x10		# bit 4 of LEDn_ON_H / LEDn_OFF_H
+	_SWRST				= 0x06
+	OSCILLATOR_CLOCK_FREQUENCY = 25000000.0
+
+	def power_on_reset(self) -> None:
+		'''
+			Register defaults: 7.3 Table 4
+		'''
+		super().power_on_reset()
+		self.registers[self._MODE1] = self._MODE1_SLEEP | self._MODE1_ALLCALL
+		self.registers[self._MODE2] = 0x04
+		self.registers[self._SUBADR1] = 0xE2
+		self.registers[self._SUBADR2] = 0xE4
+		self.registers[self._SUBADR3] = 0xE8
+		self.registers[self._ALLCALLADR] = 0xE0
+		for channel in range(16):
+			self.registers[self._CHANNEL_0_ON_LSB + 4 * channel + 3] = self._FULL_ON_OFF_BIT
+		self.registers[self._PRESCALE] = 0x1E
+
+	def responds_to(self, i2c_addr: int) -> bool:
+		mode1 = self.registers[self._MODE1]
+		return (
+			(i2c_addr == self.address)
+			or ((mode1 & self._MODE1_ALLCALL) and (i2c_addr == self.registers[self._ALLCALLADR] >> 1))
+			or ((mode1 & self._MODE1_SUB1) and (i2c_addr == self.registers[self._SUBADR1] >> 1))
+			or ((mode1 & self._MODE1_SUB2) and (i2c_addr == self.registers[self._SUBADR2] >> 1))
+			or ((mode1 & self._MODE1_SUB3) and (i2c_addr == self.registers[self._SUBADR3] >> 1))
+		)
+
+	def is_auto_increment(self) -> bool:
+		return bool(self.registers[self._MODE1] & self._MODE1_AI)
+
+	def is_sleeping(self) -> bool:
+		return bool(self.registers[self._MODE1] & self._MODE1_SLEEP)
+
+	def _next_register(self, register: int) -> int:
+		'''
+			7.3: LED15_OFF_H rolls over to MODE1; ALL_LED_ON_L..PRE_SCALE rolls over to MODE1
+		'''
+		if (register == self._LAST_LED_REGISTER) or (register >= self._PRESCALE):
+			return self._MODE1
+		return register + 1
+
+	def read(self, register: int) -> int:
+		if self._ALLLED_ON_LSB <= register <= self._ALLLED_OFF_MSB:
+			return 0
+			# ALL_LED registers are write-only, read back as 0
+		return self.registers[register]
+
+	def write(self, register: int, value: int) -> None:
+		value &= 0xFF
+
+		if register == self._MODE1:
+			old_mode = self.registers[self._MODE1]
+			if value & self._MODE1_RESTART:
+				value &= ~self._MODE1_RESTART
+				# writing 1 clears RESTART and resumes the PWM channels
+			elif (value & self._MODE1_SLEEP) and not (old_mode & self._MODE1_SLEEP):
+				value |= self._MODE1_RESTART
+				# entering SLEEP with PWM active flags RESTART
+			else:
+				value = (value & ~self._MODE1_RESTART) | (old_mode & self._MODE1_RESTART)
+			self.registers[self._MODE1] = value
+		elif register == self._PRESCALE:
+			if self.is_sleeping():
+				self.registers[self._PRESCALE] = max(value, 0x03)
+				# PRE_SCALE is write-blocked unless SLEEP; hardware min is 3
+		elif self._ALLLED_ON_LSB <= register <= self._ALLLED_OFF_MSB:
+			offset = register - self._ALLLED_ON_LSB
+			for channel in range(16):
+				self.registers[self._CHANNEL_0_ON_LSB + 4 * channel + offset] = value
+		elif register <= self._LAST_LED_REGISTER:
+			self.registers[register] = value
+		# reserved registers and TestMode (0xFF) ignore writes
+
+	def general_call(self, value: int) -> None:
+		if value == self._SWRST:
+			self.power_on_reset()
+
+	def get_channel_steps(self, channel: int) -> tuple[int, int, bool, bool]:
+		'''
+			Returns `(on_step, off_step, is_full_on, is_full_off)` for LEDn.
+		'''
+		base_register = self._CHANNEL_0_ON_LSB + 4 * channel
+		on_LSB, on_MSB, off_LSB, off_MSB = self.registers[base_register:base_register + 4]
+		return (
+			on_LSB | ((on_MSB & 0x0F) << 8),
+			off_LSB | ((off_MSB & 0x0F) << 8),
+			bool(on_MSB & self._FULL_ON_OFF_BIT),
+			bool(off_MSB & self._FULL_ON_OFF_BIT)
+		)
+
+	def get_duty_cycle(self, channel: int) -> int:
+		'''
+			Effective high time in steps (0..4096), 0 while sleeping. Full OFF wins over full ON (7.3.3).
+		'''
+		on_step, off_step, is_full_on, is_full_off = self.get_channel_steps(channel)
+		if self.is_sleeping() or is_full_off:
+			return 0
+		if is_full_on:
+			return 4096
+		return (off_step - on_step) % 4096
+
+	def get_frequency(self) -> float:
+		return self.OSCILLATOR_CLOCK_FREQUENCY / (4096 * (self.registers[self._PRESCALE] + 1))
+
+class Simulated_TLC59108F(Simulated_I2C_Device):
+	'''
+		Register file MODE1..ALLCALLADR; auto-increment is selected per transaction by the
+		control byte's AI2:AI0 bits (8.6.1 Table 1) rather than by a MODE1 bit.
+		[TLC59108F Datasheet](https://www.ti.com/lit/ds/symlink/tlc59108f.pdf)
+	'''
+	_REGISTER_COUNT		= 0x12
+
+	_MODE1				= 0x00
+	_CHANNEL_0			= 0x02
+	_LAST_CHANNEL		= 0x09
+	_GRPPWM				= 0x0A
+	_GRPFREQ			= 0x0B
+	_LEDOUT0			= 0x0C
+	_SUBADR1			= 0x0E
+	_ALLCALLADR			= 0x11
+
+	_MODE1_OSC			= 0x10
+	_MODE1_SUB_BITS		= (0x08, 0x04, 0x02)
+	_MODE1_ALLCALL		= 0x01
+	_AUTO_INCREMENT_MASK	= 0xE0
+	_REGISTER_MASK			= 0x1F
+
+	# AI2:AI0 -> (first register, last register) of the rollover window
+	_AUTO_INCREMENT_WINDOWS = {
+		0x80: (0x00, 0x11),
+		0xA0: (0x02, 0x09),
+		0xC0: (0x0A, 0x0B),
+		0xE0: (0x02, 0x0B)
+	}
+
+	def power_on_reset(self) -> None:
+		'''
+			Register defaults: 8.6 Tables 3, 9, 10
+		'''
+		super().power_on_reset()
+		self.registers[self._MODE1] = self._MODE1_OSC | self._MODE1_ALLCALL
+		self.registers[self._GRPPWM] = 0xFF
+		self.registers[self._SUBADR1:self._SUBADR1 + 3] = bytes((0x92, 0x94, 0x98))
+		self.registers[self._ALLCALLADR] = 0x90
+
+	def responds_to(self, i2c_addr: int) -> bool:
+		mode1 = self.registers[self._MODE1]
+		if i2c_addr == self.address:
+			return True
+		if (mode1 & self._MODE1_ALLCALL) and (i2c_addr == self.registers[self._ALLCALLADR] >> 1):
+			return True
+		return any((mode1 & sub_bit) and (i2c_addr == self.registers[self._SUBADR1 + index] >> 1)
+			 for index, sub_bit in enumerate(self._MODE1_SUB_BITS))
+
+	def read(self, register: int) -> int:
+		return self.registers[register & self._REGISTER_MASK]
+
+	def write(self, register: int, value: int) -> None:
+		register &= self._REGISTER_MASK
+		if register < self._REGISTER_COUNT:
+			self.registers[register] = value & 0xFF
+
+	def _register_sequence(self, command: int, length: int) -> list[int]:
+		register = command & self._REGISTER_MASK
+		window = self._AUTO_INCREMENT_WINDOWS.get(command & self._AUTO_INCREMENT_MASK)
+		sequence = []
+		for _ in range(length):
+			sequence.append(register)
+			if window is not None:
+				register = window[0] if register >= window[1] else register + 1
+		return sequence
+
+	def read_block(self, register: int, length: int) -> list[int]:
+		return [self.read(sequence_register) for sequence_register in self._register_sequence(register, length)]
+
+	def write_block(self, register: int, data: list[int]) -> None:
+		for sequence_register, value in zip(self._register_sequence(register, len(data)), data):
+			self.write(sequence_register, value)
+
+	def get_duty_cycle(self, channel: int) -> int:
+		'''
+			Effective 8-bit duty from LEDOUTx/PWMx (0 while the oscillator is off).
+		'''
+		if self.registers[self._MODE1] & self._MODE1_OSC:
+			return 0
+		led_state = (self.registers[self._LEDOUT0 + channel // 4] >> (2 * (channel % 4))) & 0b11
+		if led_state == 0b00:
+			return 0
+		if led_state == 0b01:
+			return 255
+		duty_cycle = self.registers[self._CHANNEL_0 + channel]
+		return duty_cycle if led_state == 0b10 else duty_cycle * self.registers[self._GRPPWM] // 255
+
+def main():
+	'''
+		Bus cost of one `TravelMotor.drive()` worth of channel updates.
+	'''
+	from i2c_device import PCA9685_PWM_Driver, PCA9685_Group, TLC59108F_PWM_Driver
+
+	CURRENT_SCOPE = 'i2c_simulated.py::main()::'
+	motor_duties = {4: 1000, 5: 1000, 6: 1000, 7: 1000}
+
+	for bus_frequency in (100000, 400000):
+		bus = Simulated_I2C_Bus([Simulated_PCA9685(0x40)], bus_frequency = bus_frequency)
+		pwm_driver = PCA9685_PWM_Driver(address = 0x40, bus = bus)
+
+		for label, update in (
+			('byte writes', lambda: [pwm_driver.write(pwm_driver._CHANNEL_0_ON_LSB + 4 * channel + offset, value)
+						for channel, duty in motor_duties.items()
+						for offset, value in enumerate((0, 0) + pwm_driver.two_byte_parser(duty))]),
+			('write_pwm', lambda: [pwm_driver.set_motor_pwm(channel, duty) for channel, duty in motor_duties.items()]),
+			('set_channels', lambda: pwm_driver.set_channels(motor_duties))
+		):
+			bus.reset_stats()
+			update()
+			stats = bus.get_stats()
+			print(f'{CURRENT_SCOPE}{bus_frequency // 1000} kHz {label}: {stats["transactions"]} transactions, {stats["bus_time"] * 1e6:.0f} us')
+
+		# TLC59108F: one byte per channel
+		tlc_bus = Simulated_I2C_Bus([Simulated_TLC59108F(0x40)], bus_frequency = bus_frequency)
+		tlc_pwm_driver = TLC59108F_PWM_Driver(address = 0x40, bus = tlc_bus)
+		all_channel_duties = dict.fromkeys(range(8), 1000)
+		for label, board_bus, board in (('PCA9685 set_channels x8', bus, pwm_driver), ('TLC59108F set_channels x8', tlc_bus, tlc_pwm_driver)):
+			board_bus.reset_stats()
+			board.set_channels(all_channel_duties)
+			stats = board_bus.get_stats()
+			print(f'{CURRENT_SCOPE}{bus_frequency // 1000} kHz {label}: {stats["transactions"]} transactions, {stats["bytes"]} B, {stats["bus_time"] * 1e6:.0f} us')
+
+		# stop latency: per-board stop vs ALL_LED vs one ALLCALL broadcast to two boards
+		bus.attach(Simulated_PCA9685(0x41))
+		second_pwm_driver = PCA9685_PWM_Driver(address = 0x41, bus = bus)
+		for board in (pwm_driver, second_pwm_driver):
+			board.enable_allcall()
+		group = PCA9685_Group(members = [pwm_driver, second_pwm_driver], bus = bus)
+
+		for label, stop in (
+			('stop (set_channels x2 boards)', lambda: [board.set_channels(dict.fromkeys(range(16), 0)) for board in (pwm_driver, second_pwm_driver)]),
+			('stop (all_channels_off x2 boards)', lambda: [board.all_channels_off() for board in (pwm_driver, second_pwm_driver)]),
+			('stop (ALLCALL broadcast)', group.all_channels_off)
+		):
+			bus.reset_stats()
+			stop()
+			stats = bus.get_stats()
+			print(f'{CURRENT_SCOPE}{bus_frequency // 1000} kHz {label}: {stats["transactions"]} transactions, {stats["bus_time"] * 1e6:.0f} us')
+
+if __name__ == '__main__':
+	main()
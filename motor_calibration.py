@@ -0,0 +1,278 @@
+'''
+Per-wheel duty <-> velocity calibration for `TravelMotor`.
+
+Each wheel has one `DutyCurve` per direction (forward / reverse), since a wheel rarely runs at the
+same speed both ways. A curve is a handful of measured (duty, speed) points:
+- `deadband_duty`: the highest duty that still leaves the wheel stalled
+- between points the speed is interpolated linearly; the curve is forced monotonic
+
+The points are resampled once into two uniform `array('d')` grids (duty -> speed, speed -> duty),
+so a lookup is an index computation plus one lerp: no search per control tick.
+Lookups are scalar Python, not vectorized: a tick converts four wheels, for which a numpy call
+(numpy is only a dependency of the camera code) costs more than the four lerps.
+
+`calibrate_from_runs()` builds a `MotorCalibration` from logged steady-state runs
+(`read_run_log()`: `wheel_index,signed_duty,speed` CSV rows); `save()` / `load_calibration()`
+keep it in `MOTOR_CALIBRATION_SETTINGS['CALIBRATION_PATH']`.
+
+'''
+import json
+from array import array
+from bisect import bisect_left
+
+from config import GENERAL_I2C_PWM_DRIVER_SETTINGS, MOTION_PLAN_SETTINGS, MOTOR_CALIBRATION_SETTINGS
+
+I2C_MAX_BITS = GENERAL_I2C_PWM_DRIVER_SETTINGS['I2C_MAX_BITS']
+FULL_DUTY_SPEED = MOTION_PLAN_SETTINGS['FULL_DUTY_SPEED']
+
+CALIBRATION_PATH = MOTOR_CALIBRATION_SETTINGS['CALIBRATION_PATH']
+LOOKUP_TABLE_SIZE = MOTOR_CALIBRATION_SETTINGS['LOOKUP_TABLE_SIZE']
+DUTY_BIN_WIDTH = MOTOR_CALIBRATION_SETTINGS['DUTY_BIN_WIDTH']
+MIN_MOVING_SPEED = MOTOR_CALIBRATION_SETTINGS['MIN_MOVING_SPEED']
+
+WHEEL_COUNT = 4
+	# (front left, front right, rear left, rear right), as in `TravelMotor.drive()`
+
+def _interpolate(x_points, y_points, x: float) -> float:
+	'''
+		Piecewise-linear `y(x)` over ascending `x_points`, clamped to the end points. Table building only.
+	'''
+	index = bisect_left(x_points, x)
+	if index == 0:
+		return y_points[0]
+	if index == len(x_points):
+		return y_points[-1]
+	x_0, x_1 = x_points[index - 1], x_points[index]
+	y_0, y_1 = y_points[index - 1], y_points[index]
+	return y_0 + (y_1 - y_0) * (x - x_0) / (x_1 - x_0)
+
+class DutyCurve:
+	'''
+		Duty -> speed of one wheel in one direction. Duties and speeds are magnitudes.
+	'''
+
+	def __init__(self, duty_points: list[float], speed_points: list[float], table_size: int = LOOKUP_TABLE_SIZE):
+		'''
+			`duty_points`: ascending, in the driver's 12-bit scale; `speed_points`: [m/s], same length
+		'''
+		if (len(duty_points) != len(speed_points)) or (len(duty_points) < 2):
+			raise ValueError('DutyCurve::__init__()::needs at least 2 (duty, speed) points of equal length')
+		if any(duty_1 <= duty_0 for duty_0, duty_1 in zip(duty_points, duty_points[1:])):
+			raise ValueError('DutyCurve::__init__()::duty points must be strictly ascending')
+
+		self.duty_points = array('d', duty_points)
+		self.speed_points = array('d')
+		max_speed = 0.0
+		for speed in speed_points:
+			max_speed = max(max_speed, speed)
+			self.speed_points.append(max_speed)
+				# a faster wheel at a lower duty is measurement noise; keep the curve monotonic
+
+		self.max_speed = max_speed
+		self.max_duty = self.duty_points[-1]
+		stalled_duties = [duty for duty, speed in zip(self.duty_points, self.speed_points) if speed <= 0.0]
+		self.deadband_duty = stalled_duties[-1] if stalled_duties else 0.0
+
+		self._duty_scale = (table_size - 1) / self.max_duty
+		self._speed_by_duty = array('d', (
+			_interpolate(self.duty_points, self.speed_points, index / self._duty_scale) for index in range(table_size)))
+
+		self._speed_scale = ((table_size - 1) / max_speed) if max_speed > 0 else 0.0
+		self._duty_by_speed = array('d', [self.deadband_duty])
+			# speed just above 0 needs the duty at the edge of the deadband
+		if self._speed_scale == 0:
+			return
+				# never leaves the deadband (stalled / disconnected wheel): every speed maps to `deadband_duty`
+		for index in range(1, table_size):
+			self._duty_by_speed.append(_interpolate(self.speed_points, self.duty_points, index / self._speed_scale))
+
+	def get_speed(self, duty: float) -> float:
+		'''
+			[m/s] for a duty magnitude.
+		'''
+		position = min(duty, self.max_duty) * self._duty_scale
+		if position <= 0:
+			return 0.0
+		index = int(position)
+		table = self._speed_by_duty
+		if index >= len(table) - 1:
+			return table[-1]
+		return table[index] + (table[index + 1] - table[index]) * (position - index)
+
+	def get_duty(self, speed: float) -> float:
+		'''
+			Duty magnitude for a speed [m/s]; 0 for no motion, the highest calibrated duty past `max_speed`.
+			A curve that never moves returns `deadband_duty` for any speed.
+		'''
+		if speed <= 0:
+			return 0.0
+		if self._speed_scale == 0:
+			return self.deadband_duty
+		position = speed * self._speed_scale
+		index = int(position)
+		table = self._duty_by_speed
+		if index >= len(table) - 1:
+			return table[-1]
+		return table[index] + (table[index + 1] - table[index]) * (position - index)
+
+	def to_dict(self) -> dict:
+		return {'duty_points': list(self.duty_points), 'speed_points': list(self.speed_points)}
+
+class MotorCalibration:
+	'''
+		`DutyCurve`s for every wheel, forward and reverse.
+		Signed values follow `TravelMotor.get_wheel_targets()`: negative = reverse.
+	'''
+
+	def __init__(self, forward_curves: list[DutyCurve], reverse_curves: list[DutyCurve]):
+		if (len(forward_curves) != WHEEL_COUNT) or (len(reverse_curves) != WHEEL_COUNT):
+			raise ValueError(f'MotorCalibration::__init__()::needs {WHEEL_COUNT} forward and {WHEEL_COUNT} reverse curves')
+		self.forward_curves = list(forward_curves)
+		self.reverse_curves = list(reverse_curves)
+
+	@classmethod
+	def from_linear(cls, full_duty_speed: float = FULL_DUTY_SPEED):
+		'''
+			Uncalibrated default: speed proportional to duty, no deadband, same both ways.
+		'''
+		curve = DutyCurve([0, I2C_MAX_BITS], [0.0, full_duty_speed])
+		return cls([curve] * WHEEL_COUNT, [curve] * WHEEL_COUNT)
+
+	def get_wheel_duties(self, signed_wheel_speeds: list[float]) -> list[float]:
+		'''
+			Signed per-wheel duties for signed per-wheel speeds [m/s], in wheel order.
+		'''
+		return [
+			forward_curve.get_duty(speed) if speed >= 0 else -reverse_curve.get_duty(-speed)
+			for forward_curve, reverse_curve, speed in zip(self.forward_curves, self.reverse_curves, signed_wheel_speeds)
+		]
+
+	def get_wheel_speeds(self, signed_wheel_duties: list[float]) -> list[float]:
+		return [
+			forward_curve.get_speed(duty) if duty >= 0 else -reverse_curve.get_speed(-duty)
+			for forward_curve, reverse_curve, duty in zip(self.forward_curves, self.reverse_curves, signed_wheel_duties)
+		]
+
+	def get_max_speed(self, is_reversing: bool = False) -> float:
+		'''
+			Highest speed [m/s] every wheel can reach in that direction.
+		'''
+		return min(curve.max_speed for curve in (self.reverse_curves if is_reversing else self.forward_curves))
+
+	def estimate_speed(self, speed_in_duty: int) -> float:
+		'''
+			Mean wheel speed [m/s] when every wheel runs at `speed_in_duty`; negative duty = reverse.
+			Drop-in `speed_function` for `MotionPlanExecutor`.
+		'''
+		curves = self.reverse_curves if speed_in_duty < 0 else self.forward_curves
+		return sum(curve.get_speed(abs(speed_in_duty)) for curve in curves) / WHEEL_COUNT
+
+	def to_dict(self) -> dict:
+		return {
+			'forward': [curve.to_dict() for curve in self.forward_curves],
+			'reverse': [curve.to_dict() for curve in self.reverse_curves]
+		}
+
+	@classmethod
+	def from_dict(cls, calibration_dict: dict):
+		return cls(
+			[DutyCurve(**curve_dict) for curve_dict in calibration_dict['forward']],
+			[DutyCurve(**curve_dict) for curve_dict in calibration_dict['reverse']]
+		)
+
+	def save(self, path: str = CALIBRATION_PATH) -> None:
+		with open(path, 'w') as calibration_file:
+			json.dump(self.to_dict(), calibration_file, indent = '\t')
+
+def load_calibration(path: str = CALIBRATION_PATH) -> MotorCalibration:
+	'''
+		Falls back to `MotorCalibration.from_linear()` when the car has not been calibrated yet.
+	'''
+	try:
+		with open(path) as calibration_file:
+			return MotorCalibration.from_dict(json.load(calibration_file))
+	except FileNotFoundError:
+		return MotorCalibration.from_linear()
+
+def read_run_log(path: str):
+	'''
+		Yields `(wheel_index, signed_duty, speed)` from a `wheel_index,signed_duty,speed` CSV log;
+		blank lines, `#` comments and a header row are skipped.
+	'''
+	with open(path) as log_file:
+		for line in log_file:
+			line = line.strip()
+			if not line or line.startswith('#') or line.startswith('wheel'):
+				continue
+			wheel_index, signed_duty, speed = line.split(',')
+			yield int(wheel_index), float(signed_duty), float(speed)
+
+def _build_curve(duty_speeds: dict[int, list[float]], duty_bin_width: int, min_moving_speed: float) -> DutyCurve:
+	'''
+		`{duty bin: [speed, ...]}` -> `DutyCurve`; each bin is averaged, slower than `min_moving_speed` counts as stalled.
+	'''
+	duty_points, speed_points = [0.0], [0.0]
+	for duty_bin in sorted(duty_speeds):
+		duty = min((duty_bin + 0.5) * duty_bin_width, I2C_MAX_BITS)
+		if duty <= duty_points[-1]:
+			continue
+		speeds = duty_speeds[duty_bin]
+		speed = sum(speeds) / len(speeds)
+		duty_points.append(duty)
+		speed_points.append(speed if speed >= min_moving_speed else 0.0)
+
+	if duty_points[-1] < I2C_MAX_BITS:
+		duty_points.append(I2C_MAX_BITS)
+		speed_points.append(speed_points[-1])
+			# no data past the last bin: hold its speed instead of extrapolating
+	return DutyCurve(duty_points, speed_points)
+
+def calibrate_from_runs(samples, duty_bin_width: int = DUTY_BIN_WIDTH, min_moving_speed: float = MIN_MOVING_SPEED) -> MotorCalibration:
+	'''
+		`samples`: iterable of `(wheel_index, signed_duty, speed)`, measured at steady state
+		(e.g. `read_run_log()`); speed [m/s] may be signed or a magnitude, the duty's sign picks the direction.
+		Wheels / directions without samples fall back to the linear default.
+		Raises `ValueError` for a wheel / direction whose samples are all slower than `min_moving_speed`
+		(stalled or disconnected motor): it cannot be calibrated.
+	'''
+	binned_speeds = [({}, {}) for _ in range(WHEEL_COUNT)]
+		# per wheel: ({forward duty bin: [speed, ...]}, {reverse duty bin: [...]})
+	for wheel_index, signed_duty, speed in samples:
+		if signed_duty == 0:
+			continue
+				# no direction; every curve starts at (0, 0) anyway
+		duty_speeds = binned_speeds[wheel_index][1 if signed_duty < 0 else 0]
+		duty_speeds.setdefault(int(abs(signed_duty) // duty_bin_width), []).append(abs(speed))
+
+	default_curve = MotorCalibration.from_linear().forward_curves[0]
+	forward_curves, reverse_curves = [], []
+	for wheel_index, direction_duty_speeds in enumerate(binned_speeds):
+		for direction_name, duty_speeds, curves in zip(('forward', 'reverse'), direction_duty_speeds, (forward_curves, reverse_curves)):
+			curve = _build_curve(duty_speeds, duty_bin_width, min_moving_speed) if duty_speeds else default_curve
+			if curve.max_speed == 0:
+				raise ValueError(f'motor_calibration::calibrate_from_runs()::wheel {wheel_index} did not move {direction_name}: every logged speed is below {min_moving_speed} m/s')
+			curves.append(curve)
+	return MotorCalibration(forward_curves, reverse_curves)
+
+def main():
+	'''
+		Calibrates from a synthetic log (deadband 600, reverse 10% slower, front right 5% slow) and queries it.
+	'''
+	CURRENT_SCOPE = 'motor_calibration.py::main()::'
+
+	samples = []
+	for wheel_index, wheel_gain in enumerate((1.0, 0.95, 1.0, 1.0)):
+		for duty in range(0, I2C_MAX_BITS + 1, 32):
+			speed = max(0.0, (duty - 600) / (I2C_MAX_BITS - 600)) * FULL_DUTY_SPEED * wheel_gain
+			samples.append((wheel_index, duty, speed))
+			samples.append((wheel_index, -duty, -0.9 * speed))
+	calibration = calibrate_from_runs(samples)
+
+	for curve_name, curves in (('forward', calibration.forward_curves), ('reverse', calibration.reverse_curves)):
+		for wheel_index, curve in enumerate(curves):
+			print(f'{CURRENT_SCOPE}wheel {wheel_index} {curve_name}: deadband {curve.deadband_duty:.0f}, max {curve.max_speed:.3f} m/s')
+	print(f'{CURRENT_SCOPE}0.2 m/s straight -> {[round(duty) for duty in calibration.get_wheel_duties([0.2, 0.2, 0.2, 0.2])]}')
+	print(f'{CURRENT_SCOPE}0.2 m/s reverse -> {[round(duty) for duty in calibration.get_wheel_duties([-0.2, -0.2, -0.2, -0.2])]}')
+
+if __name__ == '__main__':
+	main()
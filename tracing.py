@@ -0,0 +1,117 @@
+'''
+Low-overhead structured tracing shared by the drivers (`i2c_device.py`, `travel_motor.py`,
+`ultrasonic_sensor.py`, `vlib.py`).
+
+Trace points are written as
+	if TRACER.is_enabled:
+		TRACER.emit(EVENT_I2C_WRITE, address, register, value)
+so a disabled trace point costs one attribute check (no formatting, no call).
+Enabled events are packed into a preallocated binary ring buffer as fixed-size
+`(monotonic ns timestamp, event id, 4 x int32)` records and decoded after the fact
+with `decode()` / `load_trace()`.
+
+'''
+import itertools
+import struct
+from time import perf_counter_ns
+
+from config import TRACING_SETTINGS
+
+IS_TRACING_ENABLED = TRACING_SETTINGS['IS_TRACING_ENABLED']
+TRACE_BUFFER_CAPACITY = TRACING_SETTINGS['TRACE_BUFFER_CAPACITY']
+
+TRACE_RECORD = struct.Struct('<QH2xiiii')		# 28 bytes
+TRACE_FILE_MAGIC = b'CS437TRC'
+
+# event id -> (name, field names); ids are stable so saved traces can be decoded later
+EVENTS = {}
+
+def register_event(event_id: int, name: str, field_names: tuple[str, ...] = ()) -> int:
+	if event_id in EVENTS:
+		raise ValueError(f'tracing::register_event()::event id {event_id} already used by {EVENTS[event_id][0]}')
+	EVENTS[event_id] = (name, field_names)
+	return event_id
+
+EVENT_I2C_READ = register_event(1, 'i2c_read', ('address', 'register', 'value'))
+EVENT_I2C_WRITE = register_event(2, 'i2c_write', ('address', 'register', 'value'))
+EVENT_I2C_WRITE_BLOCK = register_event(3, 'i2c_write_block', ('address', 'register', 'length'))
+EVENT_I2C_BUS_ERROR = register_event(4, 'i2c_bus_error', ('address', 'register', 'attempt'))
+EVENT_MOTOR_MOVE = register_event(10, 'motor_move', ('duty', 'manuever', 'is_reversing'))
+EVENT_MOTOR_DRIVE = register_event(11, 'motor_drive', ('front_left', 'front_right', 'rear_left', 'rear_right'))
+EVENT_MOTOR_STOP = register_event(12, 'motor_stop', ('is_emergency',))
+EVENT_ULTRASONIC_PING = register_event(20, 'ultrasonic_ping', ('trigger_pin', 'echo_pin'))
+EVENT_ULTRASONIC_ECHO = register_event(21, 'ultrasonic_echo', ('trigger_pin', 'pulse_duration_ns', 'distance_um'))
+EVENT_CAMERA_FRAME = register_event(30, 'camera_frame', ('frame_count', 'capture_us', 'process_us'))
+
+class Trace_Buffer:
+
+	def __init__(self, capacity: int = TRACE_BUFFER_CAPACITY, is_enabled: bool = IS_TRACING_ENABLED):
+		self.capacity = capacity
+		self.is_enabled = is_enabled
+		self._buffer = bytearray(capacity * TRACE_RECORD.size)
+		self._record_counter = itertools.count()
+			# the only shared state `emit()` touches besides its own slot: no lock on the hot path
+
+	def enable(self) -> None:
+		self.is_enabled = True
+
+	def disable(self) -> None:
+		self.is_enabled = False
+
+	def clear(self) -> None:
+		self._record_counter = itertools.count()
+
+	def get_record_count(self) -> int:
+		'''
+			Records emitted since the last `clear()` (not all still in the buffer once it wrapped).
+			Read from the counter without advancing it: `itertools.count` only exposes its next value through `repr()`.
+			A record whose `emit()` is still running is counted; its slot may hold the record it is replacing.
+		'''
+		return int(repr(self._record_counter)[len('count('):-1])
+
+	def emit(self, event_id: int, a: int = 0, b: int = 0, c: int = 0, d: int = 0) -> None:
+		'''
+			Appends one record; oldest records are overwritten once the buffer is full.
+			`next()` on `itertools.count` is atomic under the GIL, so concurrent emitters get distinct slots,
+			and the readers take the record count from the same counter.
+		'''
+		record_index = next(self._record_counter)
+		TRACE_RECORD.pack_into(self._buffer, (record_index % self.capacity) * TRACE_RECORD.size,
+						 perf_counter_ns(), event_id, a, b, c, d)
+
+	def raw_records(self) -> bytes:
+		'''
+			Valid records, oldest first.
+		'''
+		record_count = self.get_record_count()
+		if record_count <= self.capacity:
+			return bytes(self._buffer[:record_count * TRACE_RECORD.size])
+
+		split_offset = (record_count % self.capacity) * TRACE_RECORD.size
+		return bytes(self._buffer[split_offset:] + self._buffer[:split_offset])
+
+	def decode(self) -> list[tuple[int, str, dict]]:
+		return decode_records(self.raw_records())
+
+	def save(self, path: str) -> None:
+		with open(path, 'wb') as trace_file:
+			trace_file.write(TRACE_FILE_MAGIC)
+			trace_file.write(self.raw_records())
+
+def decode_records(raw_records: bytes) -> list[tuple[int, str, dict]]:
+	'''
+		Returns `[(timestamp_ns, event_name, {field: value}), ...]`.
+	'''
+	events = []
+	for timestamp_ns, event_id, *values in TRACE_RECORD.iter_unpack(raw_records):
+		name, field_names = EVENTS.get(event_id, (f'event_{event_id}', ()))
+		events.append((timestamp_ns, name, dict(zip(field_names, values))))
+	return events
+
+def load_trace(path: str) -> list[tuple[int, str, dict]]:
+	with open(path, 'rb') as trace_file:
+		if trace_file.read(len(TRACE_FILE_MAGIC)) != TRACE_FILE_MAGIC:
+			raise ValueError(f'tracing::load_trace()::{path} is not a trace file')
+		return decode_records(trace_file.read())
+
+TRACER = Trace_Buffer()
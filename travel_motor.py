@@ -2,19 +2,26 @@
 Designed for use with the DRV8835 Motor Driver IC in `PH/EN` mode.
 
 Note: alter LEDs should be controlled by Car obj when turning/stopping/reversing etc.
-- [] a neat feature would be to allow a config variable (and config file) to translate duty (bits) from real-world movement
+- [x] a neat feature would be to allow a config variable (and config file) to translate duty (bits) from real-world movement
+	-> `motor_calibration.py`; `MotorControlLoop.set_velocity_command()` takes [m/s]
 
 
 '''
-from time import sleep
-import RPi.GPIO as GPIO
-from actuation_models import SteeringModels, ManueverType
-from i2c_device import PCA9685_PWM_Driver, CH592F_Device
+import threading
+from collections import deque, namedtuple
+from math import copysign, sqrt
+from time import sleep, monotonic
+from actuation_models import SteeringModels, ManueverType, build_manuever_table
+from control_loop import FixedRateLoop
+from gpio_backend import GPIO_Backend, acquire_gpio
+from i2c_device import create_pwm_driver, CH592F_Device
+from motor_calibration import MotorCalibration, load_calibration
+from tracing import TRACER, EVENT_MOTOR_MOVE, EVENT_MOTOR_DRIVE, EVENT_MOTOR_STOP
 # from pca9685 import QwiicPCA9685
-from config import GENERAL_SETTINGS, GENERAL_I2C_PWM_DRIVER_SETTINGS, DRV8835_SETTINGS
+from config import GENERAL_SETTINGS, GENERAL_I2C_PWM_DRIVER_SETTINGS, DRV8835_SETTINGS, CHASSIS_SETTINGS, SERVOMOTOR_SETTINGS, MOTOR_CONTROL_LOOP_SETTINGS, MOTION_PLAN_SETTINGS
 
 # expose to potential `config` file
-_IS_DEBUG_MODE = GENERAL_SETTINGS['IS_DEBUG_MODE']
+_IS_DEBUG_MODE = GENERAL_SETTINGS['_IS_DEBUG_MODE']
 
 I2C_BIT_RESOLUTION = GENERAL_I2C_PWM_DRIVER_SETTINGS['I2C_BIT_RESOLUTION'] or 12
 	# note: change when I switch over to tlc59108f
@@ -31,6 +38,19 @@ I2C_DRIVER_FRONT_RIGHT_MOTOR_CHANNEL = DRV8835_SETTINGS['I2C_DRIVER_FRONT_RIGHT_
 I2C_DRIVER_REAR_LEFT_MOTOR_CHANNEL = DRV8835_SETTINGS['I2C_DRIVER_REAR_LEFT_MOTOR_CHANNEL']
 I2C_DRIVER_REAR_RIGHT_MOTOR_CHANNEL = DRV8835_SETTINGS['I2C_DRIVER_REAR_RIGHT_MOTOR_CHANNEL']
 
+FRONT_STEERING_SERVOMOTOR_CHANNEL = SERVOMOTOR_SETTINGS['FRONT_STEERING_SERVOMOTOR_CHANNEL']
+REAR_STEERING_SERVOMOTOR_CHANNEL = SERVOMOTOR_SETTINGS['REAR_STEERING_SERVOMOTOR_CHANNEL']
+SERVOMOTOR_CENTER_PULSE = SERVOMOTOR_SETTINGS['CENTER_PULSE']
+SERVOMOTOR_PULSE_PER_DEGREE = SERVOMOTOR_SETTINGS['PULSE_PER_DEGREE']
+
+CONTROL_RATE = MOTOR_CONTROL_LOOP_SETTINGS['CONTROL_RATE']
+MAX_ACCELERATION = MOTOR_CONTROL_LOOP_SETTINGS['MAX_ACCELERATION']
+MAX_JERK = MOTOR_CONTROL_LOOP_SETTINGS['MAX_JERK']
+
+FULL_DUTY_SPEED = MOTION_PLAN_SETTINGS['FULL_DUTY_SPEED']
+
+MANUEVER_TABLE = build_manuever_table(CHASSIS_SETTINGS['WHEELBASE'], CHASSIS_SETTINGS['TRACK_WIDTH'], CHASSIS_SETTINGS['MAX_STEERING_ANGLE'])
+
 class TravelMotor:
 	def __init__(self, 
 			  front_left_motor_pin: int = DEFAULT_FRONT_LEFT_MOTOR_PIN,
@@ -39,15 +59,23 @@ class TravelMotor:
 			  rear_right_motor_pin: int  = DEFAULT_REAR_RIGHT_MOTOR_PIN,
 			  are_motors_reverse_mounted: bool = ARE_MOTORS_REVERSE_MOUNTED,
 			  steering_model: SteeringModels = SteeringModels.CRAB_WALKING,
+			  gpio: GPIO_Backend = None,
 			  _is_debug_mode: bool = _IS_DEBUG_MODE
 			  ):
 		'''
-
+			`gpio`: direction pin backend, defaults to `acquire_gpio()` (`GPIO_SETTINGS['GPIO_BACKEND']`)
 		'''
 		assert isinstance(steering_model, SteeringModels)
 
 		self._is_debug_mode = _is_debug_mode
-		self.i2c_driver = PCA9685_PWM_Driver(address = 0x40, global_frequency = 50)
+		self.are_motors_reverse_mounted = True if are_motors_reverse_mounted else False
+			# used to toggle phase
+		self.steering_model = steering_model
+		self._manuever_commands = self._build_manuever_commands()
+
+		self.i2c_driver = create_pwm_driver(address = 0x40, global_frequency = 50,
+			is_servo_required = any(servomotor_pulses for *_, servomotor_pulses in self._manuever_commands.values()))
+			# model from `GENERAL_I2C_DEVICE_SETTINGS['I2C_DEVICE']`; refused here if it cannot steer this model
 
 		# sets direction of motors
 		self.motor_fl_pin = front_left_motor_pin
@@ -61,9 +89,14 @@ class TravelMotor:
 			self.motor_rr_pin
 		]
 
-		self.are_motors_reverse_mounted = True if are_motors_reverse_mounted else False
-			# used to toggle phase
-		self.steering_model = steering_model
+		# last phase written to each direction pin (`None`: unknown), so unchanged pins are not rewritten
+		self._direction_pin_states = dict.fromkeys(pin_id for pin_id in self.travelling_motors_pins_list if pin_id is not None)
+		self.gpio_write_count = 0
+		self.gpio_batch_write_count = 0
+		self.gpio_skipped_write_count = 0
+
+		self.gpio = gpio if gpio is not None else acquire_gpio()
+		self._setup_GPIO_pin()
 
 	def __enter__(self):
 		return self
@@ -73,19 +106,73 @@ class TravelMotor:
 
 	def _setup_GPIO_pin(self) -> None:
 		'''
+			All direction pins in one call, so a multi-line backend puts them in one line request.
 		'''
-		GPIO.setup(channel = self.motor_fl_pin, dir = GPIO.OUT)
-		GPIO.setup(channel = self.motor_fr_pin, dir = GPIO.OUT)
-		GPIO.setup(channel = self.motor_rl_pin, dir = GPIO.OUT)
-		GPIO.setup(channel = self.motor_rr_pin, dir = GPIO.OUT)
+		self.gpio.setup_outputs(list(self._direction_pin_states))
+		self._invalidate_direction_pin_states()
 
 	def _teardown(self) -> None:
 		self.stop()
 
-		for pin_id in self.travelling_motors_pins_list:
-			if pin_id is not None:
-				GPIO.cleanup(pin_id)
+		self.gpio.release(list(self._direction_pin_states))
+		self._invalidate_direction_pin_states()
 	
+	def _build_manuever_commands(self) -> dict[tuple, tuple]:
+		'''
+			Resolves `MANUEVER_TABLE` for this car's steering model and motor mounting:
+			`{(manuever, is_reversing): (direction pin phases, duty ratios, signed duty ratios, ((servo channel, pulse), ...))}`
+			Table 4 (Section 7.4.1): https://www.ti.com/lit/ds/symlink/drv8835.pdf
+				1/True => Reverse
+				0/False => Forward
+		'''
+		manuever_commands = {}
+		for (steering_model, manuever, is_reversing), plan in MANUEVER_TABLE.items():
+			if steering_model != self.steering_model:
+				continue
+
+			direction_pin_phases = tuple((wheel_direction < 0) != self.are_motors_reverse_mounted for wheel_direction in plan.wheel_directions)
+			servomotor_pulses = tuple(
+				(servomotor_channel, round(SERVOMOTOR_CENTER_PULSE + steering_angle * SERVOMOTOR_PULSE_PER_DEGREE))
+				for servomotor_channel, steering_angle in zip((FRONT_STEERING_SERVOMOTOR_CHANNEL, REAR_STEERING_SERVOMOTOR_CHANNEL), plan.steering_angles)
+				if steering_angle is not None
+			)
+			signed_duty_ratios = tuple(wheel_direction * duty_ratio for wheel_direction, duty_ratio in zip(plan.wheel_directions, plan.duty_ratios))
+			manuever_commands[(manuever, is_reversing)] = (direction_pin_phases, plan.duty_ratios, signed_duty_ratios, servomotor_pulses)
+		return manuever_commands
+
+	def _invalidate_direction_pin_states(self) -> None:
+		for pin_id in self._direction_pin_states:
+			self._direction_pin_states[pin_id] = None
+
+	def _set_direction_pins(self, front_left_phase: bool, front_right_phase: bool, rear_left_phase: bool, rear_right_phase: bool) -> None:
+		'''
+			Writes only the direction pins whose phase changed, all in one `gpio.write_many()` call.
+		'''
+		pin_phases = {}
+		for pin_id, phase in zip(self.travelling_motors_pins_list, (front_left_phase, front_right_phase, rear_left_phase, rear_right_phase)):
+			if pin_id is not None:
+				pin_phases[pin_id] = bool(phase)
+					# pins shared by two motors: the last assignment wins, as with sequential writes
+
+		changed_pins = [pin_id for pin_id, phase in pin_phases.items() if self._direction_pin_states[pin_id] is not phase]
+		self.gpio_skipped_write_count += len(pin_phases) - len(changed_pins)
+		if not changed_pins:
+			return
+
+		changed_phases = [pin_phases[pin_id] for pin_id in changed_pins]
+		self.gpio.write_many(changed_pins, changed_phases)
+		for pin_id, phase in zip(changed_pins, changed_phases):
+			self._direction_pin_states[pin_id] = phase
+		self.gpio_write_count += len(changed_pins)
+		self.gpio_batch_write_count += 1
+
+	def get_gpio_stats(self) -> dict:
+		return {
+			'pin_writes': self.gpio_write_count,
+			'batch_writes': self.gpio_batch_write_count,
+			'skipped_pin_writes': self.gpio_skipped_write_count
+		}
+
 	def _send_debug_message(self, method_name, speed_in_duty, manuever, is_reversing) -> None:
 		# later generalize this
 		if self._is_debug_mode:
@@ -110,24 +197,40 @@ class TravelMotor:
 		# requires i2c connection 
 		'''
 		'''
+		if TRACER.is_enabled:
+			TRACER.emit(EVENT_MOTOR_DRIVE, front_left_motor_duty, front_right_motor_duty, rear_left_motor_duty, rear_right_motor_duty)
 
-		self.i2c_driver.set_motor_pwm(I2C_DRIVER_FRONT_LEFT_MOTOR_CHANNEL, front_left_motor_duty)
-		self.i2c_driver.set_motor_pwm(I2C_DRIVER_FRONT_RIGHT_MOTOR_CHANNEL, front_right_motor_duty)
-		self.i2c_driver.set_motor_pwm(I2C_DRIVER_REAR_LEFT_MOTOR_CHANNEL, rear_left_motor_duty)
-		self.i2c_driver.set_motor_pwm(I2C_DRIVER_REAR_RIGHT_MOTOR_CHANNEL, rear_right_motor_duty)
-		raise NotImplementedError
+		self.i2c_driver.set_channels({
+			I2C_DRIVER_FRONT_LEFT_MOTOR_CHANNEL: front_left_motor_duty,
+			I2C_DRIVER_FRONT_RIGHT_MOTOR_CHANNEL: front_right_motor_duty,
+			I2C_DRIVER_REAR_LEFT_MOTOR_CHANNEL: rear_left_motor_duty,
+			I2C_DRIVER_REAR_RIGHT_MOTOR_CHANNEL: rear_right_motor_duty
+		})
+			# adjacent channels -> one block write
 
 	def stop(self) -> None:
 		'''
 		'''
+		if TRACER.is_enabled:
+			TRACER.emit(EVENT_MOTOR_STOP, False)
 		self.drive(0, 0, 0, 0)
 
+	def emergency_stop(self) -> None:
+		'''
+			One-transaction stop via the driver's ALL_LED registers.
+			Note: also cuts every other channel on the same I2C driver (servos, speaker, ...).
+		'''
+		if TRACER.is_enabled:
+			TRACER.emit(EVENT_MOTOR_STOP, True)
+		self.i2c_driver.all_channels_off()
+
 	def move(self, 
 		  speed_in_duty: int = 0,
 		  manuever: ManueverType = ManueverType.STRAIGHT,
 		  is_reversing: bool = False) -> None:
 		'''
-			Hard-coded crab walk manuevering
+			Looks up the precomputed command for (`steering_model`, `manuever`, `is_reversing`)
+			and applies it as one batched GPIO write + one I2C update.
 		'''
 
 		# an alternative quick and dirty way to reverse without the verbosity
@@ -135,94 +238,393 @@ class TravelMotor:
 			is_reversing = True
 
 		speed_in_duty = self.bound_motor_duty(speed_in_duty)
+		if TRACER.is_enabled:
+			TRACER.emit(EVENT_MOTOR_MOVE, speed_in_duty, manuever.value, is_reversing)
 		if self._is_debug_mode:
 			self._send_debug_message('move', speed_in_duty, manuever, is_reversing)
 
-		if (speed_in_duty == 0) or (manuever == ManueverType.EMERGENCY_BRAKE):
+		if manuever == ManueverType.EMERGENCY_BRAKE:
+			self.emergency_stop()
+		elif speed_in_duty == 0:
 			self.stop()
-		else:			
-			'''
-				Table 4 (Section 7.4.1): https://www.ti.com/lit/ds/symlink/drv8835.pdf
-				1/True => Reverse
-				0/False => Forward
-			'''
-			
-			if manuever == ManueverType.STRAIGHT:
-				if is_reversing:
-					GPIO.output(self.motor_fl_pin, not self.are_motors_reverse_mounted)
-					GPIO.output(self.motor_fr_pin, not self.are_motors_reverse_mounted)
-					GPIO.output(self.motor_rl_pin, not self.are_motors_reverse_mounted)
-					GPIO.output(self.motor_rr_pin, not self.are_motors_reverse_mounted)
-				else:
-					# go forwards
-					GPIO.output(self.motor_fl_pin, self.are_motors_reverse_mounted)
-					GPIO.output(self.motor_fr_pin, self.are_motors_reverse_mounted)
-					GPIO.output(self.motor_rl_pin, self.are_motors_reverse_mounted)
-					GPIO.output(self.motor_rr_pin, self.are_motors_reverse_mounted)
-			elif manuever == ManueverType.TURN_LEFT:
-				if is_reversing:
-					GPIO.output(self.motor_fl_pin, self.are_motors_reverse_mounted)
-					GPIO.output(self.motor_fr_pin, not self.are_motors_reverse_mounted)
-					GPIO.output(self.motor_rl_pin, self.are_motors_reverse_mounted)
-					GPIO.output(self.motor_rr_pin, not self.are_motors_reverse_mounted)
-				else:
-					# turn left forwards
-					GPIO.output(self.motor_fl_pin, not self.are_motors_reverse_mounted)
-					GPIO.output(self.motor_fr_pin, self.are_motors_reverse_mounted)
-					GPIO.output(self.motor_rl_pin, not self.are_motors_reverse_mounted)
-					GPIO.output(self.motor_rr_pin, self.are_motors_reverse_mounted)
-			elif manuever == ManueverType.TURN_RIGHT:
-				if is_reversing:
-					GPIO.output(self.motor_fl_pin, not self.are_motors_reverse_mounted)
-					GPIO.output(self.motor_fr_pin, self.are_motors_reverse_mounted)
-					GPIO.output(self.motor_rl_pin, not self.are_motors_reverse_mounted)
-					GPIO.output(self.motor_rr_pin, self.are_motors_reverse_mounted)
+		else:
+			direction_pin_phases, duty_ratios, _, servomotor_pulses = self._manuever_commands[(manuever, bool(is_reversing))]
+
+			with self.i2c_driver.transaction():
+				# direction pins + wheel duties + steering servos go out as one I2C update
+				self._set_direction_pins(*direction_pin_phases)
+				for servomotor_channel, pulse in servomotor_pulses:
+					self.i2c_driver.set_servomotor_pwm(servomotor_channel, pulse)
+				self.drive(*[int(speed_in_duty * duty_ratio) for duty_ratio in duty_ratios])
+
+	def get_wheel_targets(self, speed_in_duty: int, manuever: ManueverType, is_reversing: bool = False) -> tuple[list[float], tuple]:
+		'''
+			Signed per-wheel duties (negative = reverse) and steering servo pulses for a command, without applying them.
+		'''
+		if speed_in_duty < 0:
+			is_reversing = True
+		speed_in_duty = self.bound_motor_duty(speed_in_duty)
+
+		_, _, signed_duty_ratios, servomotor_pulses = self._manuever_commands[(manuever, bool(is_reversing))]
+		return [speed_in_duty * signed_duty_ratio for signed_duty_ratio in signed_duty_ratios], servomotor_pulses
+
+	def get_wheel_speed_targets(self, speed: float, manuever: ManueverType, is_reversing: bool = False) -> tuple[list[float], tuple]:
+		'''
+			Signed per-wheel speeds [m/s] for a command at `speed` (fastest wheel) and the steering servo pulses.
+			The duty ratios are wheel speed ratios, so the maneuver table applies unchanged.
+		'''
+		if speed < 0:
+			is_reversing = True
+		speed = abs(speed)
+
+		_, _, signed_duty_ratios, servomotor_pulses = self._manuever_commands[(manuever, bool(is_reversing))]
+		return [speed * signed_duty_ratio for signed_duty_ratio in signed_duty_ratios], servomotor_pulses
+
+	def apply_wheel_duties(self, signed_wheel_duties: list[float], servomotor_pulses: tuple = ()) -> None:
+		'''
+			Sets each wheel from a signed duty (direction from the sign) plus the steering servos, as one update.
+		'''
+		with self.i2c_driver.transaction():
+			self._set_direction_pins(*[(wheel_duty < 0) != self.are_motors_reverse_mounted for wheel_duty in signed_wheel_duties])
+			for servomotor_channel, pulse in servomotor_pulses:
+				self.i2c_driver.set_servomotor_pwm(servomotor_channel, pulse)
+			self.drive(*[self.bound_motor_duty(int(wheel_duty)) for wheel_duty in signed_wheel_duties])
+
+class MotorControlLoop(FixedRateLoop):
+	'''
+		Runs `TravelMotor` updates from a dedicated thread at a fixed rate (`control_loop.FixedRateLoop`).
+		Callers post commands with `set_command()` (latest one wins); each tick the per-wheel duties
+		move toward the command under acceleration and jerk limits, then go out as one batched update.
+		EMERGENCY_BRAKE bypasses the ramp.
+		`set_velocity_command()` takes [m/s] instead of duty; `calibration` maps each wheel's speed to its duty.
+
+		The command slot is a single attribute holding an immutable tuple: CPython attribute
+		assignment is atomic, so posting and reading need no lock.
+	'''
+
+	def __init__(self, travel_motor: TravelMotor, control_rate: float = CONTROL_RATE,
+			  max_acceleration: float = MAX_ACCELERATION, max_jerk: float = MAX_JERK,
+			  calibration: MotorCalibration = None):
+		'''
+			`control_rate` [Hz]
+			`max_acceleration` [duty/s], `max_jerk` [duty/s^2]: duty in the driver's 12-bit scale
+			`calibration`: defaults to `load_calibration()`
+		'''
+		super().__init__(control_rate, 'motor_control_loop')
+		self.travel_motor = travel_motor
+		self.calibration = calibration if calibration is not None else load_calibration()
+		self.max_acceleration = max_acceleration
+		self.max_jerk = max_jerk
+
+		self._latest_command = (0, ManueverType.STRAIGHT, False, False)
+			# (speed, manuever, is_reversing, is_velocity)
+		self._wheel_duties = [0.0, 0.0, 0.0, 0.0]
+		self._wheel_accelerations = [0.0, 0.0, 0.0, 0.0]
+		self._applied_wheel_duties = None
+		self._applied_servomotor_pulses = None
+		self._is_emergency_stopped = False
+
+	def set_command(self, speed_in_duty: int = 0, manuever: ManueverType = ManueverType.STRAIGHT, is_reversing: bool = False) -> None:
+		self._latest_command = (speed_in_duty, manuever, is_reversing, False)
+
+	def set_velocity_command(self, speed: float = 0.0, manuever: ManueverType = ManueverType.STRAIGHT, is_reversing: bool = False) -> None:
+		'''
+			`speed` [m/s] of the fastest wheel; negative = reverse.
+		'''
+		self._latest_command = (speed, manuever, is_reversing, True)
+
+	def _on_stop(self) -> None:
+		self._wheel_duties = [0.0, 0.0, 0.0, 0.0]
+		self._wheel_accelerations = [0.0, 0.0, 0.0, 0.0]
+		self._applied_wheel_duties = None
+		self.travel_motor.stop()
+
+	def _limit_wheel_duty(self, wheel_index: int, target_duty: float) -> float:
+		'''
+			Jerk-limited approach to `target_duty`: acceleration is capped by `max_acceleration` and by the
+			largest value that can still be ramped down to 0 (under `max_jerk`) by the time the target is reached.
+		'''
+		duty = self._wheel_duties[wheel_index]
+		acceleration = self._wheel_accelerations[wheel_index]
+		duty_error = target_duty - duty
+		if duty_error == 0 and acceleration == 0:
+			return duty
+
+		desired_acceleration = copysign(min(self.max_acceleration, sqrt(2.0 * self.max_jerk * abs(duty_error))), duty_error)
+		max_acceleration_step = self.max_jerk * self.control_period
+		acceleration += max(-max_acceleration_step, min(max_acceleration_step, desired_acceleration - acceleration))
+		duty += acceleration * self.control_period
+
+		if (target_duty - duty) * duty_error <= 0:
+			duty, acceleration = target_duty, 0.0
+				# reached (or would overshoot) the target
+
+		self._wheel_duties[wheel_index] = duty
+		self._wheel_accelerations[wheel_index] = acceleration
+		return duty
+
+	def _tick(self) -> None:
+		speed, manuever, is_reversing, is_velocity = self._latest_command
+
+		if manuever == ManueverType.EMERGENCY_BRAKE:
+			if not self._is_emergency_stopped:
+				self.travel_motor.emergency_stop()
+				self._is_emergency_stopped = True
+				self._applied_wheel_duties = None
+			self._wheel_duties = [0.0, 0.0, 0.0, 0.0]
+			self._wheel_accelerations = [0.0, 0.0, 0.0, 0.0]
+			return
+
+		self._is_emergency_stopped = False
+		if is_velocity:
+			target_wheel_speeds, servomotor_pulses = self.travel_motor.get_wheel_speed_targets(speed, manuever, is_reversing)
+			target_wheel_duties = self.calibration.get_wheel_duties(target_wheel_speeds)
+		else:
+			target_wheel_duties, servomotor_pulses = self.travel_motor.get_wheel_targets(speed, manuever, is_reversing)
+		wheel_duties = [int(self._limit_wheel_duty(wheel_index, target_duty)) for wheel_index, target_duty in enumerate(target_wheel_duties)]
+
+		if (wheel_duties != self._applied_wheel_duties) or (servomotor_pulses != self._applied_servomotor_pulses):
+			self.travel_motor.apply_wheel_duties(wheel_duties, servomotor_pulses)
+			self._applied_wheel_duties = wheel_duties
+			self._applied_servomotor_pulses = servomotor_pulses
+
+MotionSegment = namedtuple('MotionSegment', ('speed_in_duty', 'manuever', 'is_reversing', 'duration', 'distance'),
+	defaults = (ManueverType.STRAIGHT, False, None, None))
+	# exactly one of `duration` [s] / `distance` [m]
+
+def estimate_speed(speed_in_duty: int) -> float:
+	'''
+		[m/s] for a duty; linear, see `MotorCalibration.estimate_speed()` for calibrated wheels.
+	'''
+	return FULL_DUTY_SPEED * abs(speed_in_duty) / I2C_MAX_BITS
+
+class MotionPlan:
+	'''
+		Handle returned by `MotionPlanExecutor.submit()`.
+	'''
+	PENDING = 'pending'
+	RUNNING = 'running'
+	COMPLETED = 'completed'
+	CANCELLED = 'cancelled'
+	PREEMPTED = 'preempted'
+
+	def __init__(self, executor, segments: list[MotionSegment]):
+		self._executor = executor
+		self.segments = deque(segments)
+		self.status = self.PENDING
+		self.completed_segment_count = 0
+		self._done_event = threading.Event()
+
+	def is_done(self) -> bool:
+		return self._done_event.is_set()
+
+	def wait(self, timeout: float = None) -> bool:
+		'''
+			Blocks until the plan finishes (any way); returns `False` on timeout.
+		'''
+		return self._done_event.wait(timeout)
+
+	def cancel(self) -> None:
+		'''
+			Stops the car if this plan is running (a queued plan then starts from standstill);
+			drops it if it is still queued.
+		'''
+		self._executor._finish_plan(self, self.CANCELLED)
+
+	def append(self, segments: list[MotionSegment]) -> bool:
+		'''
+			Extends the plan; returns `False` if it already finished.
+		'''
+		return self._executor._append_segments(self, segments)
+
+class MotionPlanExecutor:
+	'''
+		Runs motion plans on its own thread so `submit()` returns immediately.
+		Segment deadlines are chained on the monotonic clock (each segment ends exactly `duration`
+		after the previous one ended), so timing does not drift with scheduling latency.
+		Commands go through a running `MotorControlLoop` when given (ramped), otherwise straight to `TravelMotor.move()`.
+	'''
+
+	def __init__(self, travel_motor: TravelMotor, control_loop: MotorControlLoop = None, speed_function = estimate_speed):
+		'''
+			`speed_function(speed_in_duty) -> [m/s]`: converts `distance` segments to durations (negative duty = reversing)
+		'''
+		self.travel_motor = travel_motor
+		self.control_loop = control_loop
+		self.speed_function = speed_function
+
+		self._plans = deque()
+		self._condition = threading.Condition()
+		self._is_interrupted = False
+		self._is_stop_requested = False
+			# interrupted by a cancellation (stop the car) rather than a preemption (keep moving)
+		self._is_running = False
+		self._thread = None
+
+	def start(self) -> None:
+		if self._thread is not None:
+			return
+		self._is_running = True
+		self._thread = threading.Thread(target = self._run, name = 'motion_plan_executor')
+		self._thread.daemon = True
+		self._thread.start()
+
+	def stop(self, timeout: float = 1.0) -> None:
+		'''
+			Cancels every plan and stops the thread.
+		'''
+		self.cancel_all()
+		with self._condition:
+			self._is_running = False
+			self._condition.notify_all()
+		if self._thread is not None:
+			self._thread.join(timeout)
+			self._thread = None
+
+	def submit(self, segments: list[MotionSegment], is_preempting: bool = False) -> MotionPlan:
+		'''
+			Queues a plan behind the current ones, or with `is_preempting` replaces them all
+			(the running plan is marked preempted and the new one starts without stopping the car).
+		'''
+		plan = MotionPlan(self, segments)
+		with self._condition:
+			if is_preempting:
+				for queued_plan in self._plans:
+					self._mark_done(queued_plan, MotionPlan.PREEMPTED)
+				self._plans.clear()
+				self._is_interrupted = True
+			self._plans.append(plan)
+			self._condition.notify_all()
+		return plan
+
+	def cancel_all(self) -> None:
+		with self._condition:
+			for plan in self._plans:
+				self._mark_done(plan, MotionPlan.CANCELLED)
+			self._plans.clear()
+			self._is_interrupted = True
+			self._is_stop_requested = True
+			self._condition.notify_all()
+
+	def _mark_done(self, plan: MotionPlan, status: str) -> None:
+		if not plan.is_done():
+			plan.status = status
+			plan._done_event.set()
+
+	def _finish_plan(self, plan: MotionPlan, status: str) -> None:
+		with self._condition:
+			if plan.is_done():
+				return
+			is_running_plan = bool(self._plans) and (self._plans[0] is plan)
+			self._plans.remove(plan)
+			self._mark_done(plan, status)
+			if is_running_plan:
+				self._is_interrupted = True
+				self._is_stop_requested = self._is_stop_requested or (status == MotionPlan.CANCELLED)
+				self._condition.notify_all()
+
+	def _append_segments(self, plan: MotionPlan, segments: list[MotionSegment]) -> bool:
+		with self._condition:
+			if plan.is_done():
+				return False
+			plan.segments.extend(segments)
+			self._condition.notify_all()
+			return True
+
+	def _get_segment_duration(self, segment: MotionSegment) -> float:
+		if segment.duration is not None:
+			return segment.duration
+		speed = self.speed_function(-segment.speed_in_duty if segment.is_reversing else segment.speed_in_duty)
+		return (segment.distance / speed) if speed > 0 else 0.0
+
+	def _command(self, speed_in_duty: int, manuever: ManueverType = ManueverType.STRAIGHT, is_reversing: bool = False) -> None:
+		if self.control_loop is not None:
+			self.control_loop.set_command(speed_in_duty, manuever, is_reversing)
+		else:
+			self.travel_motor.move(speed_in_duty, manuever, is_reversing)
+
+	def _run(self) -> None:
+		segment_end_time = None
+			# deadline of the previous segment; `None` when the car is idle
+
+		while True:
+			with self._condition:
+				while self._is_running and not self._plans:
+					if segment_end_time is not None:
+						break
+					self._condition.wait()
+				if not self._is_running:
+					break
+
+				self._is_interrupted = False
+				self._is_stop_requested = False
+				if not self._plans:
+					# queue drained: stop and go idle
+					segment = None
 				else:
-					# turn right forwards ()
-					GPIO.output(self.motor_fl_pin, self.are_motors_reverse_mounted)
-					GPIO.output(self.motor_fr_pin, not self.are_motors_reverse_mounted)
-					GPIO.output(self.motor_rl_pin, self.are_motors_reverse_mounted)
-					GPIO.output(self.motor_rr_pin, not self.are_motors_reverse_mounted)
-			
-			self.drive(speed_in_duty, speed_in_duty, speed_in_duty, speed_in_duty)
-				# drive with pin setup
+					plan = self._plans[0]
+					if not plan.segments:
+						self._plans.popleft()
+						self._mark_done(plan, MotionPlan.COMPLETED)
+						continue
+					plan.status = MotionPlan.RUNNING
+					segment = plan.segments.popleft()
+
+			if segment is None:
+				self._command(0)
+				segment_end_time = None
+				continue
+
+			self._command(segment.speed_in_duty, segment.manuever, segment.is_reversing)
+			segment_start_time = segment_end_time if segment_end_time is not None else monotonic()
+			segment_end_time = segment_start_time + self._get_segment_duration(segment)
+
+			with self._condition:
+				while self._is_running and not self._is_interrupted:
+					remaining_time = segment_end_time - monotonic()
+					if remaining_time <= 0:
+						break
+					self._condition.wait(remaining_time)
+
+				is_stopping = self._is_stop_requested
+				self._is_stop_requested = False
+				if self._is_interrupted:
+					segment_end_time = None if is_stopping else monotonic()
+						# next plan (if any) starts now; an empty queue stops the car
+				elif plan is (self._plans[0] if self._plans else None):
+					plan.completed_segment_count += 1
+
+			if is_stopping:
+				self._command(0)
+					# cancelled: stop even if another plan is queued
+
+		if segment_end_time is not None:
+			self._command(0)
 
 def main():
 	travel_motor_obj = TravelMotor()
+	motion_plan_executor = MotionPlanExecutor(travel_motor_obj, speed_function = load_calibration().estimate_speed)
+	motion_plan_executor.start()
 
 	try:
-
-		# go forwards
-		travel_motor_obj.move(100)
-		sleep(0.5)
-		# TODO: distance interface sets the sleep time as well... time_sleep * pwm_duty_to_speed = distance?
-
-		# "", faster
-		travel_motor_obj.move(1000)
-		sleep(0.5)
-		
-		## reverse
-		travel_motor_obj.move(100, is_reversing = True)
-		sleep(0.5)
-		
-		# left
-		travel_motor_obj.move(100, manuever = ManueverType.TURN_LEFT)
-		sleep(0.5)
-		travel_motor_obj.move(100, manuever = ManueverType.TURN_LEFT, is_reversing = True)
-		sleep(0.5)
-
-		# right
-		travel_motor_obj.move(100, manuever = ManueverType.TURN_RIGHT)
-		sleep(0.5)
-		travel_motor_obj.move(100, manuever = ManueverType.TURN_RIGHT, is_reversing = True)
-		sleep(0.5)
-
-		# stop
-		travel_motor_obj.stop()
+		motion_plan = motion_plan_executor.submit([
+			MotionSegment(100, duration = 0.5),							# go forwards
+			MotionSegment(1000, duration = 0.5),						# "", faster
+			MotionSegment(1000, distance = 0.1),						# distance -> duration via the wheel calibration
+			MotionSegment(100, is_reversing = True, duration = 0.5),	# reverse
+			MotionSegment(100, ManueverType.TURN_LEFT, duration = 0.5),
+			MotionSegment(100, ManueverType.TURN_LEFT, True, duration = 0.5),
+			MotionSegment(100, ManueverType.TURN_RIGHT, duration = 0.5),
+			MotionSegment(100, ManueverType.TURN_RIGHT, True, duration = 0.5)
+		])
+		# this thread is free here (sensors, camera, ...)
+		motion_plan.wait()
+		print(f'travel_motor.py::main()::plan {motion_plan.status}, {motion_plan.completed_segment_count} segments')
 
 	except KeyboardInterrupt:
 		print(f'\ntravel_motor.py::main()::program interrupted')
 	finally:
+		motion_plan_executor.stop()
 		travel_motor_obj._teardown()
 
 if __name__ == '__main__':
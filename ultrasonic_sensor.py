@@ -1,193 +1,387 @@
-'''
-To make the code as hardware agnostic as possible, we re-implemented 
-the `DistanceSensor` class using only the `GPIO` library.
-
-We added optional temperature compensation for calculating distance.
-For cost measure and pin economy, we have developed it to work with
-a common TRIG-ECHO pin topology. 
-
-Todo:
-- [] select between TMP102 / DS18B20T; expects `get_temperature()` method
-- [] decide: do I need to use `lock`? should I allow concurrent triggers OR 
-	should I just assume they do it sequentially; or add multi-threading?
-	- concurrent triggers: noisy
-	- a even greedier implementation: shared echo and trig pin for all, use MUX to determine which sensor it is connected to
-- [] add optional humidity compensation
-
-
-'''
-
-from random import randint
-from time import sleep, time
-from config import GENERAL_SETTINGS, ULTRASONIC_SENSOR_SETTINGS
-import RPi.GPIO as GPIO
-'''
-Note: need to write a low-level library compatible with OPi, e.g.:
-import OPi.GPIO as GPIO
-Also need mangopi's equivalent gpio library
-
-'''
-_IS_DEBUG_MODE = GENERAL_SETTINGS['IS_DEBUG_MODE']
-
-DEFAULT_SPEED_OF_SOUND = ULTRASONIC_SENSOR_SETTINGS['DEFAULT_SPEED_OF_SOUND']
-DEFAULT_AMBIENT_TEMPERATURE = ULTRASONIC_SENSOR_SETTINGS['DEFAULT_TEMPERATURE']
-DEFAULT_TRIGGER_PIN = ULTRASONIC_SENSOR_SETTINGS['DEFAULT_TRIG_PIN']
-MINIMUM_DISTANCE_MM = ULTRASONIC_SENSOR_SETTINGS['MINIMUM_DETECTION_DISTANCE']
-MAXIMUM_DISTANCE_MM = ULTRASONIC_SENSOR_SETTINGS['MAXIMUM_DETECTION_DISTANCE']
-TRIGGER_PULSE_TIME_LENGTH = ULTRASONIC_SENSOR_SETTINGS['TRIGGER_PULSE_TIME_LENGTH']
-SETUP_SETTLING_TIME = ULTRASONIC_SENSOR_SETTINGS['SETUP_SETTLING_TIME']
-
-class UltrasonicSensor:
-	def __init__(self, trigger_pin: int = DEFAULT_TRIGGER_PIN, 
-			  min_distance_cm: float = MINIMUM_DISTANCE_MM, 
-			  max_distance_cm: float = MAXIMUM_DISTANCE_MM, 
-			  echo_pin: int = None, thermostat_object = None, 
-			  frequency_hop_range: tuple[int] = (),				# kHz
-			  _is_debug_mode: bool = _IS_DEBUG_MODE):
-		'''
-			Initialize `UltrasonicSensor` object
-		'''
-		if (min_distance_cm == 0):
-			raise Exception(f'UltrasonicSensor::__init__():: cannot set minimum distance to be {min_distance_cm} cm')
-		
-		if (max_distance_cm < min_distance_cm):
-			raise Exception(f'UltrasonicSensor::__init__():: cannot set max. distance ({max_distance_cm}) to be less than min. distance ({min_distance_cm})')
-
-		self.echo_pin = trigger_pin if echo_pin is None else echo_pin
-		self.trigger_pin = trigger_pin
-		self.min_distance_cm = min_distance_cm
-		self.max_distance_cm = max_distance_cm
-		self.thermostat = thermostat_object
-
-		# for a frequency hop enabled sensor
-		self.frequency_hop_range = frequency_hop_range
-		self.is_frequency_hop_mode = len(self.frequency_hop_range) > 1
-		
-		self._is_debug_mode = _is_debug_mode
-
-		# if (self.trigger_pin == self.echo_pin):
-		# todo: need to set a minimum distance for trig->echo handover; if t compesnated calculate minimum distance sensed using some kind of get speed fn
-
-		self._setup_GPIO_pin()
-		time.sleep(SETUP_SETTLING_TIME)
-
-	def __enter__(self):
-		return self
-
-	def __exit__(self) -> None:
-		self.teardown()
-
-	def _setup_GPIO_pin(self) -> None:
-		GPIO.setup(channel = self.trigger_pin, dir = GPIO.OUT, pull_up_down = GPIO.PUD_DOWN)
-		GPIO.output(self.trigger_pin, False)
-
-		if (self.trigger_pin != self.echo_pin):
-				GPIO.setup(channel = self.echo_pin, dir = GPIO.IN, pull_up_down = GPIO.PUD_OFF)
-	
-	def teardown(self) -> None:
-		# Lifecycle Method: Release GPIO resources
-		GPIO.cleanup(self.trigger_pin)
-		if (self.echo_pin != self.trigger_pin):
-			GPIO.cleanup(self.echo_pin)
-		
-	def return_random_frequency(self, start_frequency_kHz: int = 40, end_frequency_kHz: int = 40, frequency_step_kHz: int = 5):
-		'''
-			Return a random frequency within this interval, uniform.
-			For frequency hopping.	
-		'''
-		return_frequency = start_frequency_kHz
-
-		if start_frequency_kHz != end_frequency_kHz:
-			frequency_range = range(start_frequency_kHz, end_frequency_kHz, frequency_step_kHz)
-			return_frequency_index = randint(0, len(frequency_range))
-			return_frequency = frequency_range[return_frequency_index]
-		
-		return return_frequency
-
-	def get_speed_of_sound_in_dry_air(self, temperature: int = DEFAULT_AMBIENT_TEMPERATURE) -> float:
-		'''
-			Equation Source: https://www.engineeringtoolbox.com/air-speed-sound-d_603.html
-			v = 20.05 * \sqrt{T}
-			- v [=] [m/s]
-			- T [=] K
-
-			# doctests (0 C, 25 C, 40 C)
-			>>> get_speed_of_sound_in_dry_air(273.15)
-			331.371
-			>>> get_speed_of_sound_in_dry_air(298.15)
-			346.204
-			>>> get_speed_of_sound_in_dry_air(313.15)
-			354.806
-		'''
-		return round(20.05 * (temperature ** 0.5), 3)
-
-	def return_distance(self, significant_figures: int = 2) -> float:
-		'''
-			Returns the distance [cm] of an object to the ultrasonic sensor.
-			Optional temperature compensation built in.
-
-			Convention:
-			- `None`: no object detected (either too close or too far)
-			- `float` otherwise
-		'''
-		distance = None
-		ambient_temperature = DEFAULT_AMBIENT_TEMPERATURE if self.thermostat is None else self.thermostat.get_temperature()
-		# TODO: determine VCO to use
-		# TODO: setup ping frequency and translate it to an appropraite voltage
-
-		speed_of_sound = self.get_speed_of_sound_in_dry_air(ambient_temperature) if (self.thermostat is not None) else DEFAULT_SPEED_OF_SOUND
-			# [m/s]
-		
-		speed_of_sound_cm_s = speed_of_sound * 100
-			# [cm/s]
-		timeout_time_length = 2 * self.max_distance_cm / speed_of_sound_cm_s
-			# magic ## 2 to compensate for double distance travelled
-		
-		try:
-			pulse_start_time = pulse_end_time = None
-			# echo_timeout_time = time() + TRIGGER_PULSE_TIME_LENGTH + timeout_time_length
-			
-			GPIO.output(self.trigger_pin, True)
-			sleep(TRIGGER_PULSE_TIME_LENGTH)
-			GPIO.output(self.trigger_pin, False)
-
-			if (self.trigger_pin == self.echo_pin):
-				GPIO.setup(channel = self.echo_pin, dir = GPIO.IN, pull_up_down = GPIO.PUD_OFF)
-
-			# wait for echo
-			while ((GPIO.input(self.echo_pin) == 0)):
-				pulse_start_time = time()
-			
-			while ((GPIO.input(self.echo_pin) == 1)):
-				pulse_end_time = time()
-
-			# calculate distance
-			pulse_duration = pulse_end_time - pulse_start_time
-			distance = speed_of_sound_cm_s * pulse_duration / 2
-				# magic ## 2 to compensate for double distance travelled
-
-		except Exception as e:
-			print(f'UltrasonicSensor::get_distance()::{e}')
-
-		self._setup_GPIO_pin()
-		return round(distance, significant_figures)
-	
-def main():
-	CURRENT_SCOPE = 'ultrasonic_sensor.py::main()::'
-	ultrasonic_object_1 = UltrasonicSensor(18)
-	ultrasonic_object_2 = UltrasonicSensor(14)
-
-	try:
-		print(f'{CURRENT_SCOPE}{ultrasonic_object_1.return_distance()}')
-		print(f'{CURRENT_SCOPE}{ultrasonic_object_2.return_distance()}')
-
-	except KeyboardInterrupt:
-		print(f'{CURRENT_SCOPE}program interrupted')
-	
-	finally:
-		ultrasonic_object_1.teardown()
-		ultrasonic_object_2.teardown()
-
-
-if __name__ == '__main__':
+'''
+To make the code as hardware agnostic as possible, we re-implemented 
+the `DistanceSensor` class using only the `GPIO` library
+(through `gpio_backend.py`: RPi.GPIO / OPi.GPIO, libgpiod char device or simulated pins).
+
+We added optional temperature compensation for calculating distance.
+For cost measure and pin economy, we have developed it to work with
+a common TRIG-ECHO pin topology. 
+
+Echo timing:
+- edge mode: the calling thread sleeps on an event until the ECHO falling edge arrives. Default on the chardev backend
+	(edges timestamped by the kernel) and, with a separate ECHO pin, on RPi.GPIO (event-detect callbacks,
+	`monotonic_ns()` taken in its callback thread: callback latency jitter lands in the pulse length)
+- polling mode: spins on the ECHO pin, one `perf_counter()` per read; ties up a core for the whole echo.
+	Default only for a shared TRIG/ECHO pin on RPi.GPIO, where `add_event_detect()` cannot be re-armed after
+	every trigger pulse before ECHO rises; use `GPIO_SETTINGS['GPIO_BACKEND'] = GPIO_Backend_Model.CHARDEV` there
+Both stop at a deadline derived from `max_distance_cm`, so a ping never takes longer than
+`TRIGGER_PULSE_TIME_LENGTH + ECHO_START_TIMEOUT + 2 * max_distance / speed of sound`;
+`measure_distance()` then returns a `DistanceReading` with `EchoStatus.NO_TARGET`.
+A separate ECHO pin still high from the previous ping (~38 ms after a ping without a target) is waited out
+for up to the same deadline before triggering, else the ping is skipped with `EchoStatus.BUSY`:
+at most two deadlines per `measure_distance()`.
+
+Todo:
+- [] select between TMP102 / DS18B20T; expects `get_temperature()` method
+- [] decide: do I need to use `lock`? should I allow concurrent triggers OR 
+	should I just assume they do it sequentially; or add multi-threading?
+	- concurrent triggers: noisy
+	- a even greedier implementation: shared echo and trig pin for all, use MUX to determine which sensor it is connected to
+- [] add optional humidity compensation
+
+
+'''
+
+import threading
+from collections import namedtuple
+from enum import Enum
+from random import randint
+from time import sleep, perf_counter
+from gpio_backend import GPIO_Backend, PULL_NONE, EDGE_BOTH, acquire_gpio
+from tracing import TRACER, EVENT_ULTRASONIC_PING, EVENT_ULTRASONIC_ECHO
+from config import GENERAL_SETTINGS, ULTRASONIC_SENSOR_SETTINGS
+'''
+Note: OPi => `GPIO_SETTINGS['GPIO_MODULE'] = 'OPi.GPIO'`;
+MangoPi (no vendor library) => `GPIO_SETTINGS['GPIO_BACKEND'] = GPIO_Backend_Model.CHARDEV`
+
+'''
+_IS_DEBUG_MODE = GENERAL_SETTINGS['_IS_DEBUG_MODE']
+
+DEFAULT_SPEED_OF_SOUND = ULTRASONIC_SENSOR_SETTINGS['DEFAULT_SPEED_OF_SOUND']
+DEFAULT_AMBIENT_TEMPERATURE = ULTRASONIC_SENSOR_SETTINGS['DEFAULT_TEMPERATURE']
+DEFAULT_TRIGGER_PIN = ULTRASONIC_SENSOR_SETTINGS['DEFAULT_TRIG_PIN']
+MINIMUM_DISTANCE_MM = ULTRASONIC_SENSOR_SETTINGS['MINIMUM_DETECTION_DISTANCE']
+MAXIMUM_DISTANCE_MM = ULTRASONIC_SENSOR_SETTINGS['MAXIMUM_DETECTION_DISTANCE']
+TRIGGER_PULSE_TIME_LENGTH = ULTRASONIC_SENSOR_SETTINGS['TRIGGER_PULSE_TIME_LENGTH']
+SETUP_SETTLING_TIME = ULTRASONIC_SENSOR_SETTINGS['SETUP_SETTLING_TIME']
+IS_EDGE_TIMING_ENABLED = ULTRASONIC_SENSOR_SETTINGS['IS_EDGE_TIMING_ENABLED']
+ECHO_START_TIMEOUT = ULTRASONIC_SENSOR_SETTINGS['ECHO_START_TIMEOUT']
+
+class EchoStatus(Enum):
+	'''
+		ok: `distance_cm` is valid
+		no target: no echo before the deadline (timeout) or outside [min, max] distance (miss)
+		error: GPIO failure or missed ECHO rising edge, see the console
+		busy: ECHO still high from the previous ping at the deadline; no ping sent
+	'''
+	OK = 1
+	NO_TARGET = 2
+	ERROR = 3
+	BUSY = 4
+
+DistanceReading = namedtuple('DistanceReading', ('status', 'distance_cm', 'pulse_duration'))
+	# `distance_cm`, `pulse_duration` [s]: `None` unless `status` is `EchoStatus.OK`
+
+class UltrasonicSensor:
+	def __init__(self, trigger_pin: int = DEFAULT_TRIGGER_PIN, 
+			  min_distance_cm: float = MINIMUM_DISTANCE_MM / 10, 
+			  max_distance_cm: float = MAXIMUM_DISTANCE_MM / 10, 
+			  echo_pin: int = None, thermostat_object = None, 
+			  frequency_hop_range: tuple[int] = (),				# kHz
+			  gpio: GPIO_Backend = None,
+			  is_edge_timing: bool = IS_EDGE_TIMING_ENABLED,
+			  _is_debug_mode: bool = _IS_DEBUG_MODE):
+		'''
+			Initialize `UltrasonicSensor` object
+			`gpio`: defaults to `acquire_gpio()` (`GPIO_SETTINGS['GPIO_BACKEND']`)
+			`is_edge_timing`: time the echo from edge events instead of polling;
+				`None`: if the backend timestamps edges itself (`gpio.has_edge_timestamps`) or ECHO has its own pin
+		'''
+		if (min_distance_cm == 0):
+			raise Exception(f'UltrasonicSensor::__init__():: cannot set minimum distance to be {min_distance_cm} cm')
+		
+		if (max_distance_cm < min_distance_cm):
+			raise Exception(f'UltrasonicSensor::__init__():: cannot set max. distance ({max_distance_cm}) to be less than min. distance ({min_distance_cm})')
+
+		self.echo_pin = trigger_pin if echo_pin is None else echo_pin
+		self.trigger_pin = trigger_pin
+		self.min_distance_cm = min_distance_cm
+		self.max_distance_cm = max_distance_cm
+		self.thermostat = thermostat_object
+
+		# for a frequency hop enabled sensor
+		self.frequency_hop_range = frequency_hop_range
+		self.is_frequency_hop_mode = len(self.frequency_hop_range) > 1
+		
+		self._is_debug_mode = _is_debug_mode
+		self.gpio = gpio if gpio is not None else acquire_gpio()
+		if is_edge_timing is None:
+			is_edge_timing = self.gpio.has_edge_timestamps or (self.echo_pin != self.trigger_pin)
+				# separate ECHO pin: armed once, so callback-thread timestamps still beat spinning a core
+		self.is_edge_timing = is_edge_timing
+
+		# edge mode: filled in by `_on_echo_edge()` from the backend's callback thread
+		self._echo_event = threading.Event()
+		self._echo_start_time_ns = None
+		self._echo_end_time_ns = None
+		self._is_echo_start_missed = False
+		self.reset_stats()
+
+		# if (self.trigger_pin == self.echo_pin):
+		# todo: need to set a minimum distance for trig->echo handover; if t compesnated calculate minimum distance sensed using some kind of get speed fn
+
+		self._setup_GPIO_pin()
+		sleep(SETUP_SETTLING_TIME)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self) -> None:
+		self.teardown()
+
+	def reset_stats(self) -> None:
+		self.ping_count = 0
+		self.timeout_count = 0
+			# ECHO never rose
+		self.miss_count = 0
+			# ECHO too long / too short for [min, max] distance: no target in range
+		self.error_count = 0
+		self.busy_count = 0
+			# not counted in `ping_count`: no ping was sent
+
+	def get_stats(self) -> dict:
+		return {
+			'pings': self.ping_count,
+			'timeouts': self.timeout_count,
+			'misses': self.miss_count,
+			'errors': self.error_count,
+			'busy': self.busy_count
+		}
+
+	def _setup_GPIO_pin(self) -> None:
+		self.gpio.setup_outputs([self.trigger_pin], initial_value = 0)
+
+		if (self.trigger_pin != self.echo_pin):
+			if self.is_edge_timing:
+				self.gpio.add_edge_callback(self.echo_pin, EDGE_BOTH, self._on_echo_edge)
+			else:
+				self.gpio.setup_inputs([self.echo_pin], pull = PULL_NONE)
+	
+	def teardown(self) -> None:
+		# Lifecycle Method: Release GPIO resources
+		self.gpio.release([self.trigger_pin] if self.echo_pin == self.trigger_pin else [self.trigger_pin, self.echo_pin])
+		
+	def return_random_frequency(self, start_frequency_kHz: int = 40, end_frequency_kHz: int = 40, frequency_step_kHz: int = 5):
+		'''
+			Return a random frequency within this interval, uniform.
+			For frequency hopping.	
+		'''
+		return_frequency = start_frequency_kHz
+
+		if start_frequency_kHz != end_frequency_kHz:
+			frequency_range = range(start_frequency_kHz, end_frequency_kHz, frequency_step_kHz)
+			return_frequency_index = randint(0, len(frequency_range))
+			return_frequency = frequency_range[return_frequency_index]
+		
+		return return_frequency
+
+	def get_speed_of_sound_in_dry_air(self, temperature: int = DEFAULT_AMBIENT_TEMPERATURE) -> float:
+		'''
+			Equation Source: https://www.engineeringtoolbox.com/air-speed-sound-d_603.html
+			v = 20.05 * \sqrt{T}
+			- v [=] [m/s]
+			- T [=] K
+
+			# doctests (0 C, 25 C, 40 C)
+			>>> get_speed_of_sound_in_dry_air(273.15)
+			331.371
+			>>> get_speed_of_sound_in_dry_air(298.15)
+			346.204
+			>>> get_speed_of_sound_in_dry_air(313.15)
+			354.806
+		'''
+		return round(20.05 * (temperature ** 0.5), 3)
+
+	def _on_echo_edge(self, pin: int, level: int, timestamp_ns: int) -> None:
+		if level:
+			self._echo_start_time_ns = timestamp_ns
+			return
+		if self._echo_start_time_ns is None:
+			self._is_echo_start_missed = True
+				# ECHO rose before edge detection was armed: the pulse cannot be timed
+		else:
+			self._echo_end_time_ns = timestamp_ns
+		self._echo_event.set()
+
+	def _trigger(self) -> None:
+		self.gpio.write(self.trigger_pin, 1)
+		sleep(TRIGGER_PULSE_TIME_LENGTH)
+		self.gpio.write(self.trigger_pin, 0)
+
+	def _wait_for_echo_idle(self, timeout: float) -> bool:
+		'''
+			Waits up to `timeout` [s] for a separate ECHO pin still high from the previous ping to drop:
+			the sensor ignores triggers until then. Returns `False` if it is still high.
+		'''
+		if (self.trigger_pin == self.echo_pin) or (self.gpio.read(self.echo_pin) == 0):
+			return True
+
+		if self.is_edge_timing:
+			self._echo_event.clear()
+			self._echo_start_time_ns = None
+			if self.gpio.read(self.echo_pin) == 1:
+				self._echo_event.wait(timeout)
+					# set by `_on_echo_edge()` on the falling edge
+			return self.gpio.read(self.echo_pin) == 0
+
+		idle_deadline = perf_counter() + timeout
+		while (self.gpio.read(self.echo_pin) == 1):
+			if perf_counter() > idle_deadline:
+				return False
+		return True
+
+	def _measure_echo_with_edges(self, echo_time_length: float) -> float:
+		'''
+			ECHO pulse length [s] from the edge timestamps; `None` without a complete pulse within
+			`ECHO_START_TIMEOUT + echo_time_length` of the trigger.
+			Separate ECHO pin: edge detection stays armed between pings, so it is armed before the trigger.
+			Shared TRIG/ECHO pin: the pin is an output during the trigger pulse, so edge detection can only be
+			armed right after it; a chardev reconfigure takes well under the sensor's ~0.45 ms burst before ECHO rises.
+			A rising edge missed anyway raises instead of being reported as no target.
+		'''
+		self._echo_event.clear()
+		self._echo_start_time_ns = self._echo_end_time_ns = None
+		self._is_echo_start_missed = False
+
+		self._trigger()
+		if (self.trigger_pin == self.echo_pin):
+			self.gpio.add_edge_callback(self.echo_pin, EDGE_BOTH, self._on_echo_edge)
+		try:
+			is_echo_received = self._echo_event.wait(ECHO_START_TIMEOUT + echo_time_length)
+		finally:
+			if (self.trigger_pin == self.echo_pin):
+				self.gpio.remove_edge_callback(self.echo_pin)
+
+		if self._is_echo_start_missed:
+			raise RuntimeError(f'ECHO pin {self.echo_pin} rose before edge detection was armed')
+		if not is_echo_received:
+			if self._echo_start_time_ns is None:
+				self.timeout_count += 1
+			else:
+				self.miss_count += 1
+					# still high at the deadline: nothing within `max_distance_cm`
+			return None
+		return (self._echo_end_time_ns - self._echo_start_time_ns) / 1e9
+
+	def _measure_echo_with_polling(self, echo_time_length: float) -> float:
+		'''
+			ECHO pulse length [s] from busy-polling the pin; `None` if ECHO does not rise within
+			`ECHO_START_TIMEOUT` or stays high longer than `echo_time_length`.
+		'''
+		self._trigger()
+		if (self.trigger_pin == self.echo_pin):
+			self.gpio.setup_inputs([self.echo_pin], pull = PULL_NONE)
+
+		# wait for echo
+		pulse_start_time = perf_counter()
+		echo_start_deadline = pulse_start_time + ECHO_START_TIMEOUT
+		while ((self.gpio.read(self.echo_pin) == 0)):
+			pulse_start_time = perf_counter()
+			if pulse_start_time > echo_start_deadline:
+				self.timeout_count += 1
+				return None
+		
+		pulse_end_time = pulse_start_time
+		echo_end_deadline = pulse_start_time + echo_time_length
+		while ((self.gpio.read(self.echo_pin) == 1)):
+			pulse_end_time = perf_counter()
+			if pulse_end_time > echo_end_deadline:
+				self.miss_count += 1
+				return None
+
+		return pulse_end_time - pulse_start_time
+
+	def get_echo_deadline(self, speed_of_sound: float = DEFAULT_SPEED_OF_SOUND) -> float:
+		'''
+			Longest a ping can take [s] (trigger pulse + echo start + round trip to `max_distance_cm`): worst-case latency of an obstacle check.
+		'''
+		return TRIGGER_PULSE_TIME_LENGTH + ECHO_START_TIMEOUT + 2 * self.max_distance_cm / (speed_of_sound * 100)
+			# magic ## 2 to compensate for double distance travelled
+
+	def measure_distance(self) -> DistanceReading:
+		'''
+			One ping. Optional temperature compensation built in.
+			Returns within `get_echo_deadline()` (+ GPIO overhead) whether or not an echo comes back,
+			plus up to one more deadline waiting out a previous echo (`EchoStatus.BUSY` if it does not end).
+		'''
+		ambient_temperature = DEFAULT_AMBIENT_TEMPERATURE if self.thermostat is None else self.thermostat.get_temperature()
+		# TODO: determine VCO to use
+		# TODO: setup ping frequency and translate it to an appropraite voltage
+
+		speed_of_sound = self.get_speed_of_sound_in_dry_air(ambient_temperature) if (self.thermostat is not None) else DEFAULT_SPEED_OF_SOUND
+			# [m/s]
+		
+		speed_of_sound_cm_s = speed_of_sound * 100
+			# [cm/s]
+		echo_time_length = 2 * self.max_distance_cm / speed_of_sound_cm_s
+			# magic ## 2 to compensate for double distance travelled
+		
+		reading = DistanceReading(EchoStatus.NO_TARGET, None, None)
+		try:
+			if not self._wait_for_echo_idle(ECHO_START_TIMEOUT + echo_time_length):
+				self.busy_count += 1
+				return DistanceReading(EchoStatus.BUSY, None, None)
+
+			self.ping_count += 1
+			if TRACER.is_enabled:
+				TRACER.emit(EVENT_ULTRASONIC_PING, self.trigger_pin, self.echo_pin)
+			
+			pulse_duration = self._measure_echo_with_edges(echo_time_length) if self.is_edge_timing else self._measure_echo_with_polling(echo_time_length)
+
+			if pulse_duration is not None:
+				# calculate distance
+				distance = speed_of_sound_cm_s * pulse_duration / 2
+					# magic ## 2 to compensate for double distance travelled
+				if TRACER.is_enabled:
+					TRACER.emit(EVENT_ULTRASONIC_ECHO, self.trigger_pin, int(pulse_duration * 1e9), int(distance * 1e4))
+						# [ns], [um]
+
+				if self.min_distance_cm <= distance <= self.max_distance_cm:
+					reading = DistanceReading(EchoStatus.OK, distance, pulse_duration)
+				else:
+					self.miss_count += 1
+
+		except Exception as e:
+			self.error_count += 1
+			reading = DistanceReading(EchoStatus.ERROR, None, None)
+			print(f'UltrasonicSensor::measure_distance()::{e}')
+
+		if (self.trigger_pin == self.echo_pin):
+			self._setup_GPIO_pin()
+				# back to TRIG; separate pins keep their setup between pings
+		return reading
+
+	def return_distance(self, significant_figures: int = 2) -> float:
+		'''
+			Returns the distance [cm] of an object to the ultrasonic sensor (`measure_distance()`, rounded).
+
+			Convention:
+			- `None`: no object detected (either too close or too far, or no echo before the deadline),
+				or no reading (sensor busy, GPIO error)
+			- `float` otherwise
+		'''
+		reading = self.measure_distance()
+		if reading.status != EchoStatus.OK:
+			return None
+		return round(reading.distance_cm, significant_figures)
+	
+def main():
+	CURRENT_SCOPE = 'ultrasonic_sensor.py::main()::'
+	ultrasonic_object_1 = UltrasonicSensor(18)
+	ultrasonic_object_2 = UltrasonicSensor(14)
+
+	try:
+		print(f'{CURRENT_SCOPE}{ultrasonic_object_1.measure_distance()}')
+		print(f'{CURRENT_SCOPE}{ultrasonic_object_2.return_distance()}')
+		print(f'{CURRENT_SCOPE}worst case {ultrasonic_object_1.get_echo_deadline() * 1e3:.1f} ms per ping, {ultrasonic_object_1.get_stats()}')
+
+	except KeyboardInterrupt:
+		print(f'{CURRENT_SCOPE}program interrupted')
+	
+	finally:
+		ultrasonic_object_1.teardown()
+		ultrasonic_object_2.teardown()
+
+
+if __name__ == '__main__':
 	main()
\ No newline at end of file
@@ -17,6 +17,8 @@ import libcamera
 import cv2
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
+
+from tracing import TRACER, EVENT_CAMERA_FRAME
 DEFAULT_PICTURES_PATH = './'
 DEFAULT_VIDEOS_PATH = './'
 
@@ -115,12 +117,19 @@ class Vilib(object):
 		fps = 0
 		start_time = 0
 		framecount = 0
+		total_frame_count = 0
 		try:
 			start_time = time.time()
 			while True:
 				# ----------- extract image data ----------------
 				# st = time.time()
+				is_tracing = TRACER.is_enabled
+					# latched so all three timestamps exist if tracing is toggled mid-frame
+				if is_tracing:
+					capture_start_time_ns = time.perf_counter_ns()
 				Vilib.img = picam2.capture_array()
+				if is_tracing:
+					process_start_time_ns = time.perf_counter_ns()
 				# print(f'picam2.capture_array(): {time.time() - st:.6f}')
 				# st = time.time()
 
@@ -137,6 +146,12 @@ class Vilib(object):
 				Vilib.img = Vilib.hands_detect_fuc(Vilib.img)
 				Vilib.img = Vilib.pose_detect_fuc(Vilib.img)
 
+				total_frame_count += 1
+				if is_tracing:
+					frame_end_time_ns = time.perf_counter_ns()
+					TRACER.emit(EVENT_CAMERA_FRAME, total_frame_count,
+						(process_start_time_ns - capture_start_time_ns) // 1000, (frame_end_time_ns - process_start_time_ns) // 1000)
+
 				# ----------- calculate fps and draw fps ----------------
 				# calculate fps
 				framecount += 1
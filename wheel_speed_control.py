@@ -0,0 +1,271 @@
+'''
+Closed-loop per-wheel speed control for `TravelMotor`.
+
+`WheelEncoder` timestamps every encoder edge from a `gpio_backend` edge callback and turns the recent
+tick timestamps into a speed estimate. `WheelSpeedController` runs on `control_loop.FixedRateLoop`;
+each tick, per wheel:
+	duty = calibration feedforward(target speed) + PID(target speed - measured speed)
+and all four duties go out in one `apply_wheel_duties()` call (one I2C transaction).
+
+Encoders are single channel (one slotted disc per wheel): a wheel's direction is taken from its target.
+
+`drivetrain_simulated.SimulatedDrivetrain` stands in for the motors and encoders;
+`main()` uses it to benchmark settling time and tick cost without the car.
+
+'''
+from bisect import bisect_left
+from collections import deque
+from math import copysign, pi
+from time import monotonic, perf_counter
+
+from actuation_models import ManueverType
+from control_loop import FixedRateLoop
+from gpio_backend import GPIO_Backend, EDGE_RISING, acquire_gpio
+from motor_calibration import MotorCalibration, load_calibration
+from config import GENERAL_I2C_PWM_DRIVER_SETTINGS, WHEEL_SPEED_CONTROL_SETTINGS
+
+I2C_MAX_BITS = GENERAL_I2C_PWM_DRIVER_SETTINGS['I2C_MAX_BITS']
+
+ENCODER_PINS = (
+	WHEEL_SPEED_CONTROL_SETTINGS['FRONT_LEFT_ENCODER_PIN'],
+	WHEEL_SPEED_CONTROL_SETTINGS['FRONT_RIGHT_ENCODER_PIN'],
+	WHEEL_SPEED_CONTROL_SETTINGS['REAR_LEFT_ENCODER_PIN'],
+	WHEEL_SPEED_CONTROL_SETTINGS['REAR_RIGHT_ENCODER_PIN']
+)
+TICKS_PER_METER = WHEEL_SPEED_CONTROL_SETTINGS['TICKS_PER_REVOLUTION'] / (pi * WHEEL_SPEED_CONTROL_SETTINGS['WHEEL_DIAMETER'])
+SPEED_WINDOW = WHEEL_SPEED_CONTROL_SETTINGS['SPEED_WINDOW']
+STALL_TIMEOUT = WHEEL_SPEED_CONTROL_SETTINGS['STALL_TIMEOUT']
+CONTROL_RATE = WHEEL_SPEED_CONTROL_SETTINGS['CONTROL_RATE']
+PROPORTIONAL_GAIN = WHEEL_SPEED_CONTROL_SETTINGS['PROPORTIONAL_GAIN']
+INTEGRAL_GAIN = WHEEL_SPEED_CONTROL_SETTINGS['INTEGRAL_GAIN']
+DERIVATIVE_GAIN = WHEEL_SPEED_CONTROL_SETTINGS['DERIVATIVE_GAIN']
+
+class WheelEncoder:
+	'''
+		Keeps the last `history_size` tick timestamps. The edge callback only appends to a bounded deque;
+		the control loop reads a snapshot, so neither side takes a lock.
+	'''
+
+	def __init__(self, pin: int, ticks_per_meter: float = TICKS_PER_METER, speed_window: float = SPEED_WINDOW,
+			  stall_timeout: float = STALL_TIMEOUT, history_size: int = 64):
+		'''
+			`speed_window` [s]: ticks this close to the last one are averaged
+			`stall_timeout` [s]: no tick for this long reads as 0 m/s
+		'''
+		self.pin = pin
+		self.ticks_per_meter = ticks_per_meter
+		self.speed_window = speed_window
+		self.stall_timeout = stall_timeout
+		self._tick_times = deque(maxlen = history_size)
+		self.tick_count = 0
+		self.gpio = None
+
+	def attach(self, gpio: GPIO_Backend = None) -> None:
+		'''
+			Starts timestamping rising edges on `pin`; `gpio` defaults to `acquire_gpio()`.
+		'''
+		self.gpio = gpio if gpio is not None else acquire_gpio()
+		self.gpio.add_edge_callback(self.pin, EDGE_RISING, self._on_edge)
+
+	def detach(self) -> None:
+		self.gpio.remove_edge_callback(self.pin)
+
+	def _on_edge(self, _pin: int, _level: int, timestamp_ns: int) -> None:
+		self.record_tick(timestamp_ns / 1e9)
+
+	def record_tick(self, timestamp: float) -> None:
+		'''
+			`timestamp` [s] on the controller's clock (`monotonic()`, the GPIO backends' edge clock, on the car).
+		'''
+		self._tick_times.append(timestamp)
+		self.tick_count += 1
+
+	def get_speed(self, now: float) -> float:
+		'''
+			Speed magnitude [m/s]: tick rate over the last `speed_window`, capped by the time since the
+			last tick so a slowing wheel reads slower before its next tick arrives.
+		'''
+		tick_times = tuple(self._tick_times)
+		if len(tick_times) < 2:
+			return 0.0
+		last_tick_time = tick_times[-1]
+		time_since_last_tick = now - last_tick_time
+		if time_since_last_tick > self.stall_timeout:
+			return 0.0
+
+		first_index = min(bisect_left(tick_times, last_tick_time - self.speed_window), len(tick_times) - 2)
+		window_time = last_tick_time - tick_times[first_index]
+		if window_time <= 0:
+			return 0.0
+		tick_rate = (len(tick_times) - 1 - first_index) / window_time
+		if time_since_last_tick > 0:
+			tick_rate = min(tick_rate, 1.0 / time_since_last_tick)
+		return tick_rate / self.ticks_per_meter
+
+class WheelPID:
+	'''
+		PID on speed magnitude, output in duty on top of a feedforward duty.
+		Derivative acts on the measurement (no kick on setpoint steps); the integrator is
+		frozen while the output is saturated (anti-windup).
+	'''
+
+	def __init__(self, proportional_gain: float = PROPORTIONAL_GAIN, integral_gain: float = INTEGRAL_GAIN,
+			  derivative_gain: float = DERIVATIVE_GAIN, output_limit: float = I2C_MAX_BITS):
+		self.proportional_gain = proportional_gain
+		self.integral_gain = integral_gain
+		self.derivative_gain = derivative_gain
+		self.output_limit = output_limit
+		self.reset()
+
+	def reset(self) -> None:
+		self.integral = 0.0
+		self._previous_measurement = None
+
+	def update(self, target: float, measurement: float, dt: float, feedforward: float = 0.0) -> float:
+		'''
+			Returns the duty magnitude, clamped to [0, `output_limit`].
+		'''
+		error = target - measurement
+		derivative = 0.0
+		if (self._previous_measurement is not None) and (dt > 0):
+			derivative = -(measurement - self._previous_measurement) / dt
+		self._previous_measurement = measurement
+
+		integral = self.integral + error * dt
+		output = feedforward + self.proportional_gain * error + self.integral_gain * integral + self.derivative_gain * derivative
+		if 0 <= output <= self.output_limit:
+			self.integral = integral
+		return max(0.0, min(self.output_limit, output))
+
+class WheelSpeedController(FixedRateLoop):
+	'''
+		Fixed-rate closed-loop speed control of all four wheels; posts/reads commands like `MotorControlLoop`.
+	'''
+
+	def __init__(self, drivetrain, encoders: list[WheelEncoder], calibration: MotorCalibration = None,
+			  control_rate: float = CONTROL_RATE, proportional_gain: float = PROPORTIONAL_GAIN,
+			  integral_gain: float = INTEGRAL_GAIN, derivative_gain: float = DERIVATIVE_GAIN, clock = monotonic):
+		'''
+			`drivetrain`: `TravelMotor` (or `SimulatedDrivetrain`): `get_wheel_speed_targets()`, `apply_wheel_duties()`, `stop()`, `emergency_stop()`
+			`encoders`: one per wheel, in wheel order (front left, front right, rear left, rear right)
+			`calibration`: feedforward, defaults to `load_calibration()`
+			`clock`: time source of the encoder timestamps
+		'''
+		super().__init__(control_rate, 'wheel_speed_controller')
+		self.drivetrain = drivetrain
+		self.encoders = list(encoders)
+		self.calibration = calibration if calibration is not None else load_calibration()
+		self.clock = clock
+		self.wheel_pids = [WheelPID(proportional_gain, integral_gain, derivative_gain) for _ in self.encoders]
+
+		self._latest_command = (0.0, ManueverType.STRAIGHT, False)
+		self._previous_tick_time = None
+		self._target_wheel_signs = [0, 0, 0, 0]
+		self._applied_wheel_duties = None
+		self._applied_servomotor_pulses = None
+		self._is_emergency_stopped = False
+		self.measured_wheel_speeds = [0.0, 0.0, 0.0, 0.0]
+
+	def set_velocity_command(self, speed: float = 0.0, manuever: ManueverType = ManueverType.STRAIGHT, is_reversing: bool = False) -> None:
+		'''
+			`speed` [m/s] of the fastest wheel; negative = reverse.
+		'''
+		self._latest_command = (speed, manuever, is_reversing)
+
+	def _reset_wheels(self) -> None:
+		for wheel_pid in self.wheel_pids:
+			wheel_pid.reset()
+		self._target_wheel_signs = [0, 0, 0, 0]
+		self._applied_wheel_duties = None
+
+	def _on_stop(self) -> None:
+		self._reset_wheels()
+		self._previous_tick_time = None
+		self.drivetrain.stop()
+
+	def _tick(self) -> None:
+		speed, manuever, is_reversing = self._latest_command
+		now = self.clock()
+		dt = (now - self._previous_tick_time) if self._previous_tick_time is not None else self.control_period
+		self._previous_tick_time = now
+
+		if manuever == ManueverType.EMERGENCY_BRAKE:
+			if not self._is_emergency_stopped:
+				self.drivetrain.emergency_stop()
+				self._is_emergency_stopped = True
+				self._reset_wheels()
+			return
+		self._is_emergency_stopped = False
+
+		target_wheel_speeds, servomotor_pulses = self.drivetrain.get_wheel_speed_targets(speed, manuever, is_reversing)
+		feedforward_duties = self.calibration.get_wheel_duties(target_wheel_speeds)
+
+		wheel_duties = []
+		for wheel_index, (wheel_pid, encoder, target_speed, feedforward_duty) in enumerate(
+				zip(self.wheel_pids, self.encoders, target_wheel_speeds, feedforward_duties)):
+			measured_speed = encoder.get_speed(now)
+			self.measured_wheel_speeds[wheel_index] = copysign(measured_speed, target_speed)
+
+			target_sign = (target_speed > 0) - (target_speed < 0)
+			if target_sign != self._target_wheel_signs[wheel_index]:
+				wheel_pid.reset()
+					# direction change: the old integral belongs to the other direction
+				self._target_wheel_signs[wheel_index] = target_sign
+			if target_sign == 0:
+				wheel_duties.append(0)
+				continue
+
+			duty = wheel_pid.update(abs(target_speed), measured_speed, dt, abs(feedforward_duty))
+			wheel_duties.append(int(copysign(duty, target_speed)))
+
+		if (wheel_duties != self._applied_wheel_duties) or (servomotor_pulses != self._applied_servomotor_pulses):
+			self.drivetrain.apply_wheel_duties(wheel_duties, servomotor_pulses)
+			self._applied_wheel_duties = wheel_duties
+			self._applied_servomotor_pulses = servomotor_pulses
+
+def _get_settling_time(samples: list[tuple[float, float]], target_speed: float, tolerance: float) -> float:
+	'''
+		Time of the last `(time, speed)` sample outside `target_speed` +/- `tolerance` (relative); `None` if it never settles.
+	'''
+	settling_time = 0.0
+	for sample_time, speed in samples:
+		if abs(speed - target_speed) > tolerance * abs(target_speed):
+			settling_time = sample_time
+	return None if settling_time == samples[-1][0] else settling_time
+
+def main():
+	'''
+		Step response on `SimulatedDrivetrain`: uneven wheels (load, slip) with a deadband the linear
+		feedforward does not know about, feedforward only vs. feedforward + PID. Simulated time, so it runs anywhere.
+	'''
+	from drivetrain_simulated import SimulatedDrivetrain, SimulatedWheel
+
+	CURRENT_SCOPE = 'wheel_speed_control.py::main()::'
+	TARGET_SPEED = 0.3			# [m/s]
+	DURATION = 3.0				# [s]
+	TOLERANCE = 0.05
+
+	for label, gains in (('feedforward only', (0, 0, 0)), ('feedforward + PID', (PROPORTIONAL_GAIN, INTEGRAL_GAIN, DERIVATIVE_GAIN))):
+		encoders = [WheelEncoder(pin) for pin in ENCODER_PINS]
+		drivetrain = SimulatedDrivetrain(encoders, [SimulatedWheel(gain = gain, deadband_duty = 600) for gain in (1.0, 0.8, 0.9, 0.75)])
+		controller = WheelSpeedController(drivetrain, encoders, MotorCalibration.from_linear(), *((CONTROL_RATE,) + gains), clock = drivetrain.get_time)
+		controller.set_velocity_command(TARGET_SPEED)
+
+		speed_samples = [[] for _ in encoders]
+		tick_times = []
+		for tick_index in range(int(DURATION * CONTROL_RATE)):
+			drivetrain.advance(tick_index * controller.control_period)
+			tick_start_time = perf_counter()
+			controller._tick()
+			tick_times.append(perf_counter() - tick_start_time)
+			for wheel_index, wheel_speed in enumerate(drivetrain.wheel_speeds):
+				speed_samples[wheel_index].append((drivetrain.get_time(), wheel_speed))
+
+		print(f'{CURRENT_SCOPE}{label}: {drivetrain.update_count} drivetrain updates, tick {sum(tick_times) / len(tick_times) * 1e6:.1f} us mean, {max(tick_times) * 1e6:.1f} us max')
+		for wheel_index, samples in enumerate(speed_samples):
+			settling_time = _get_settling_time(samples, TARGET_SPEED, TOLERANCE)
+			settling_str = f'{settling_time:.2f} s' if settling_time is not None else 'not settled'
+			print(f'{CURRENT_SCOPE}\twheel {wheel_index}: {samples[-1][1]:.3f} m/s, settling ({TOLERANCE:.0%}): {settling_str}')
+
+if __name__ == '__main__':
+	main()